@@ -223,7 +223,7 @@ class LearningEngine:
         prompt_names = ['test_generation_basic', 'test_generation_advanced', 'test_generation_edge_cases']
         prompt_versions = {}
         for prompt_name in prompt_names:
-            versions = self.storage.ai_prompts.list_prompt_versions(prompt_name)
+            versions = self.storage.ai_prompts.list_prompt_versions_summary(prompt_name)
             prompt_versions[prompt_name] = len(versions)
         
         # Count test cases in library
@@ -168,7 +168,7 @@ class PromptRefiner:
         improved_template = self._apply_improvements(current_template, improvements, issues)
         
         # Get next version number
-        versions = self.storage.ai_prompts.list_prompt_versions(prompt_name)
+        versions = self.storage.ai_prompts.list_prompt_versions_summary(prompt_name)
         next_version = max([v['prompt_version'] for v in versions], default=current_version) + 1
         
         # Create metadata
@@ -175,23 +175,21 @@ class ValidationUI:
         Returns:
             Dictionary mapping (method, path) tuples to lists of test cases
         """
-        # Get all test cases for the schema
-        all_test_cases = self.storage.ai_tests.get_all_test_cases(
+        # Stream all test cases for the schema
+        all_test_cases = self.storage.ai_tests.iter_all_test_cases(
             schema_file=schema_file,
             limit=1000
         )
         
-        # Filter by method and path if specified
-        if method:
-            all_test_cases = [tc for tc in all_test_cases if tc['method'].upper() == method.upper()]
-        if path:
-            all_test_cases = [tc for tc in all_test_cases if tc['path'] == path]
-        
-        # Group by endpoint
+        # Group by endpoint, filtering by method and path if specified
         from collections import defaultdict
         endpoint_groups = defaultdict(list)
         
         for test_case in all_test_cases:
+            if method and test_case['method'].upper() != method.upper():
+                continue
+            if path and test_case['path'] != path:
+                continue
             key = (test_case['method'], test_case['path'])
             endpoint_groups[key].append(test_case)
         
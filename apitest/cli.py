@@ -572,21 +572,6 @@ def main(schema_file: str, base_url: Optional[str], auth: Optional[str],
             )
             test_generator.schema_file = schema_file  # Set schema_file for context
         
-        tester = APITester(
-            schema=schema,
-            auth_handlers=auth_handlers,
-            timeout=final_timeout,
-            parallel=parallel,
-            verbose=verbose,
-            path_params=path_params_dict,
-            store_results=store_results,
-            schema_file=schema_file,
-            use_smart_data=use_smart_data,
-            compare_baseline=compare_baseline,
-            test_generator=test_generator,
-            storage=storage
-        )
-        
         # Cache token if enabled and auth was provided
         if use_cached_token and schema_file and final_base_url and final_auth:
             try:
@@ -679,21 +664,36 @@ def main(schema_file: str, base_url: Optional[str], auth: Optional[str],
             console.print("[dim]Run without --dry-run to execute tests.[/dim]\n")
             sys.exit(0)
         
-        # Run tests with progress indicator
-        if not parallel and endpoint_count > 3:  # Show progress for sequential execution with multiple endpoints
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                BarColumn(),
-                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-                TimeElapsedColumn(),
-                console=console,
-                transient=True
-            ) as progress:
-                task = progress.add_task("[cyan]Testing endpoints...", total=endpoint_count)
-                results = tester.run_tests(progress=progress, task=task)
-        else:
-            results = tester.run_tests()
+        # Run tests with progress indicator (the tester's HTTP session is
+        # closed when the block exits, even if the run fails)
+        with APITester(
+            schema=schema,
+            auth_handlers=auth_handlers,
+            timeout=final_timeout,
+            parallel=parallel,
+            verbose=verbose,
+            path_params=path_params_dict,
+            store_results=store_results,
+            schema_file=schema_file,
+            use_smart_data=use_smart_data,
+            compare_baseline=compare_baseline,
+            test_generator=test_generator,
+            storage=storage
+        ) as tester:
+            if not parallel and endpoint_count > 3:  # Show progress for sequential execution with multiple endpoints
+                with Progress(
+                    SpinnerColumn(),
+                    TextColumn("[progress.description]{task.description}"),
+                    BarColumn(),
+                    TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+                    TimeElapsedColumn(),
+                    console=console,
+                    transient=True
+                ) as progress:
+                    task = progress.add_task("[cyan]Testing endpoints...", total=endpoint_count)
+                    results = tester.run_tests(progress=progress, task=task)
+            else:
+                results = tester.run_tests()
         
         # Handle AI test validation if enabled
         if validate_ai and not auto_approve_ai:
@@ -787,9 +787,10 @@ def main(schema_file: str, base_url: Optional[str], auth: Optional[str],
             if summary_only:
                 # Show only summary
                 total = len(results.results)
-                passed = len(results.get_passed())
-                failed = len(results.get_failed())
-                errors = len(results.get_errors())
+                counts = results.get_status_counts()
+                passed = counts[TestStatus.PASS]
+                failed = counts[TestStatus.FAIL]
+                errors = counts[TestStatus.ERROR]
                 success_rate = results.get_success_rate()
                 
                 if failed > 0 or errors > 0:
@@ -11,6 +11,47 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Placeholder strings for string properties, by format
+_STRING_FORMAT_VALUES = {
+    'email': 'test@example.com',
+    'date': '2024-01-01',
+    'date-time': '2024-01-01T00:00:00Z',
+    'uri': 'https://example.com',
+    'uuid': '123e4567-e89b-12d3-a456-426614174000',
+}
+
+# Values for array items and nested object properties, by type (lists and
+# dicts are built fresh per call since callers may modify the data)
+_NESTED_VALUES = {'string': 'test', 'integer': 1}
+
+
+def _generate_array(prop_schema: Dict[str, Any]) -> List[Any]:
+    """One-item array for a string or integer items schema, otherwise empty"""
+    items_schema = prop_schema.get('items', {})
+    if not items_schema:
+        return []
+    item_type = items_schema.get('type', 'string')
+    return [_NESTED_VALUES[item_type]] if item_type in _NESTED_VALUES else []
+
+
+def _generate_object(prop_schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Object with placeholder values (None for other types) for its direct properties"""
+    return {
+        nested_name: _NESTED_VALUES.get(nested_schema.get('type', 'string'))
+        for nested_name, nested_schema in prop_schema.get('properties', {}).items()
+    }
+
+
+# Test value generators for request body properties, by schema type
+_PROPERTY_GENERATORS = {
+    'string': lambda prop_schema: _STRING_FORMAT_VALUES.get(prop_schema.get('format', ''), 'test'),
+    'integer': lambda prop_schema: prop_schema.get('minimum', 1),
+    'number': lambda prop_schema: float(prop_schema.get('minimum', 1.0)),
+    'boolean': lambda prop_schema: True,
+    'array': _generate_array,
+    'object': _generate_object,
+}
+
 
 @dataclass
 class TestCase:
@@ -278,58 +319,11 @@ class TestGenerator:
                 data[prop_name] = prop_schema['enum'][0]
                 continue
             
-            prop_type = prop_schema.get('type', 'string')
-            prop_format = prop_schema.get('format', '')
-            
-            # Generate test values based on type and format
-            if prop_type == 'string':
-                if prop_format == 'email':
-                    data[prop_name] = 'test@example.com'
-                elif prop_format == 'date':
-                    data[prop_name] = '2024-01-01'
-                elif prop_format == 'date-time':
-                    data[prop_name] = '2024-01-01T00:00:00Z'
-                elif prop_format == 'uri':
-                    data[prop_name] = 'https://example.com'
-                elif prop_format == 'uuid':
-                    data[prop_name] = '123e4567-e89b-12d3-a456-426614174000'
-                else:
-                    data[prop_name] = 'test'
-            elif prop_type == 'integer':
-                data[prop_name] = prop_schema.get('minimum', 1) if 'minimum' in prop_schema else 1
-            elif prop_type == 'number':
-                data[prop_name] = float(prop_schema.get('minimum', 1.0)) if 'minimum' in prop_schema else 1.0
-            elif prop_type == 'boolean':
-                data[prop_name] = True
-            elif prop_type == 'array':
-                items_schema = prop_schema.get('items', {})
-                if items_schema:
-                    # Generate one item for array
-                    item_type = items_schema.get('type', 'string')
-                    if item_type == 'string':
-                        data[prop_name] = ['test']
-                    elif item_type == 'integer':
-                        data[prop_name] = [1]
-                    else:
-                        data[prop_name] = []
-                else:
-                    data[prop_name] = []
-            elif prop_type == 'object':
-                # Recursively generate nested object
-                nested_props = prop_schema.get('properties', {})
-                if nested_props:
-                    nested_data = {}
-                    for nested_name, nested_schema in nested_props.items():
-                        nested_type = nested_schema.get('type', 'string')
-                        if nested_type == 'string':
-                            nested_data[nested_name] = 'test'
-                        elif nested_type == 'integer':
-                            nested_data[nested_name] = 1
-                        else:
-                            nested_data[nested_name] = None
-                    data[prop_name] = nested_data
-                else:
-                    data[prop_name] = {}
+            # Generate test values based on type and format; unknown types
+            # are left out
+            generate = _PROPERTY_GENERATORS.get(prop_schema.get('type', 'string'))
+            if generate is not None:
+                data[prop_name] = generate(prop_schema)
         
         return data
 
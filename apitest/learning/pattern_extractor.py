@@ -163,29 +163,7 @@ class PatternExtractor:
         if not test_result_ids:
             return []
         
-        cursor = self.db.conn.cursor()
-        placeholders = ','.join(['?'] * len(test_result_ids))
-        query = f"""
-            SELECT request_body 
-            FROM request_response_storage 
-            WHERE test_result_id IN ({placeholders})
-            AND request_body IS NOT NULL
-        """
-        
-        cursor.execute(query, test_result_ids)
-        rows = cursor.fetchall()
-        
-        request_bodies = []
-        for row in rows:
-            try:
-                if row['request_body']:
-                    request_bodies.append(json.loads(row['request_body']))
-                else:
-                    request_bodies.append(None)
-            except (json.JSONDecodeError, TypeError):
-                request_bodies.append(None)
-        
-        return request_bodies
+        return self.db.get_request_bodies(test_result_ids)
     
     def _analyze_request_body(self, body: Any, field_patterns: Dict, field_path: str):
         """
@@ -377,13 +355,9 @@ class PatternExtractor:
     def _get_request_body(self, test_id: int) -> Optional[Dict[str, Any]]:
         """Get request body for a test ID"""
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                SELECT request_body FROM request_responses WHERE test_id = ?
-            """, (test_id,))
-            row = cursor.fetchone()
-            if row and row[0]:
-                return json.loads(row[0])
+            for row in self.db.get_request_responses(test_id, include_response_body=False):
+                if row['request_body']:
+                    return row['request_body']
         except Exception as e:
             logger.debug(f"Failed to get request body: {e}")
         return None
@@ -391,13 +365,9 @@ class PatternExtractor:
     def _get_response_body(self, test_id: int) -> Optional[Dict[str, Any]]:
         """Get response body for a test ID"""
         try:
-            cursor = self.db.conn.cursor()
-            cursor.execute("""
-                SELECT response_body FROM request_responses WHERE test_id = ?
-            """, (test_id,))
-            row = cursor.fetchone()
-            if row and row[0]:
-                return json.loads(row[0])
+            for row in self.db.get_request_responses(test_id):
+                if row['response_body']:
+                    return row['response_body']
         except Exception as e:
             logger.debug(f"Failed to get response body: {e}")
         return None
@@ -4,6 +4,7 @@ Report generation for test results
 
 import json
 import csv
+import sys
 from typing import Dict, Any, List
 from pathlib import Path
 import click
@@ -40,10 +41,11 @@ class Reporter:
         
         # Summary
         total = len(results.results)
-        passed = len(results.get_passed())
-        failed = len(results.get_failed())
-        warnings = len(results.get_warnings())
-        errors = len(results.get_errors())
+        counts = results.get_status_counts()
+        passed = counts[TestStatus.PASS]
+        failed = counts[TestStatus.FAIL]
+        warnings = counts[TestStatus.WARNING]
+        errors = counts[TestStatus.ERROR]
         
         self.console.print(f"[white]📄 Found [bold]{total}[/bold] endpoints to test[/white]")
         self.console.print()
@@ -126,10 +128,11 @@ class Reporter:
             verbose: Whether to include detailed response examples
         """
         total = len(results.results)
-        passed = len(results.get_passed())
-        failed = len(results.get_failed())
-        warnings = len(results.get_warnings())
-        errors = len(results.get_errors())
+        counts = results.get_status_counts()
+        passed = counts[TestStatus.PASS]
+        failed = counts[TestStatus.FAIL]
+        warnings = counts[TestStatus.WARNING]
+        errors = counts[TestStatus.ERROR]
         success_rate = results.get_success_rate()
         
         schema_title = schema.get('info', {}).get('title', 'API')
@@ -942,19 +945,23 @@ class Reporter:
     
     def generate_json_report(self, results: TestResults, output_path: str):
         """Generate JSON report"""
+        counts = results.get_status_counts()
         report = {
             'summary': {
                 'total': len(results.results),
-                'passed': len(results.get_passed()),
-                'failed': len(results.get_failed()),
-                'warnings': len(results.get_warnings()),
-                'errors': len(results.get_errors()),
+                'passed': counts[TestStatus.PASS],
+                'failed': counts[TestStatus.FAIL],
+                'warnings': counts[TestStatus.WARNING],
+                'errors': counts[TestStatus.ERROR],
                 'success_rate': results.get_success_rate(),
                 'total_time_seconds': results.total_time_seconds
             },
+            # Each endpoint's method is a fresh .upper() string; interning
+            # keeps one copy per method across thousands of rows (status
+            # values are already shared by the TestStatus members)
             'results': [
                 {
-                    'method': r.method,
+                    'method': sys.intern(r.method),
                     'path': r.path,
                     'status_code': r.status_code,
                     'expected_status': r.expected_status,
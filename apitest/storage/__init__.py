@@ -10,19 +10,13 @@ Provides local-only storage for:
 - Test case library
 
 All data is stored locally on your machine only - never sent to external servers.
+
+Submodules are imported lazily on first attribute access (PEP 562), so
+importing this package does not pull in sqlite3 or the keyring backends
+until they are actually needed.
 """
 
-from apitest.storage.database import Database, get_db_path, Storage
-from apitest.storage.token_store import TokenStore
-from apitest.storage.history import TestHistory
-from apitest.storage.test_case_library import (
-    get_library_dir,
-    save_test_case_to_library,
-    load_test_case_from_library,
-    list_test_cases_in_library,
-    get_test_cases_by_endpoint,
-    delete_test_case_from_library
-)
+import importlib
 
 __all__ = [
     'Database', 'get_db_path', 'Storage', 'TokenStore', 'TestHistory',
@@ -31,3 +25,33 @@ __all__ = [
     'delete_test_case_from_library'
 ]
 
+# Public name -> module that defines it
+_LAZY_ATTRS = {
+    'Database': 'apitest.storage.database',
+    'get_db_path': 'apitest.storage.database',
+    'Storage': 'apitest.storage.database',
+    'TokenStore': 'apitest.storage.token_store',
+    'TestHistory': 'apitest.storage.history',
+    'get_library_dir': 'apitest.storage.test_case_library',
+    'save_test_case_to_library': 'apitest.storage.test_case_library',
+    'load_test_case_from_library': 'apitest.storage.test_case_library',
+    'list_test_cases_in_library': 'apitest.storage.test_case_library',
+    'get_test_cases_by_endpoint': 'apitest.storage.test_case_library',
+    'delete_test_case_from_library': 'apitest.storage.test_case_library',
+}
+
+
+def __getattr__(name):
+    """Import public storage attributes on first access"""
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    module = importlib.import_module(module_name)
+    value = getattr(module, name)
+    globals()[name] = value  # Cache so later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
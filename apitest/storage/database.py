@@ -8,15 +8,716 @@ Never synced to external servers.
 import sqlite3
 import json
 import os
+import threading
+import time
+import weakref
+import zlib
 from pathlib import Path
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional
+from datetime import datetime, timezone
 import logging
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+
+from apitest.utils import json_dumps, json_dumps_bytes, json_loads
 
 logger = logging.getLogger(__name__)
 
 # Database schema version for migration tracking
-CURRENT_SCHEMA_VERSION = 2
+CURRENT_SCHEMA_VERSION = 7
+
+# Page size for new databases (large JSON payload rows)
+DB_PAGE_SIZE = 16384
+
+# Cap the -wal file left behind after checkpoints (64MB)
+WAL_JOURNAL_SIZE_LIMIT = 67108864
+
+# WAL pages before SQLite checkpoints automatically (SQLite's default, pinned)
+WAL_AUTOCHECKPOINT_PAGES = 1000
+
+# Commits between explicit WAL checkpoints during long sessions
+WAL_CHECKPOINT_INTERVAL = 1000
+
+# Cache/mmap tuning shared by the writer and per-thread reader connections
+_CACHE_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # 64MB (negative = KiB)
+    "PRAGMA mmap_size=268435456",  # 256MB
+)
+
+# Seconds a cached active/latest prompt lookup stays valid. Writes through
+# this Database invalidate at once; the TTL bounds staleness from writes made
+# by other processes sharing the file.
+PROMPT_CACHE_TTL = 30.0
+
+# zlib level for stored request/response payloads (fast, still several x on JSON)
+PAYLOAD_COMPRESSION_LEVEL = 3
+
+# Read size for streaming large response bodies out of their BLOB
+PAYLOAD_READ_CHUNK_SIZE = 65536
+
+# Preset zlib dictionaries for request/response headers, by version id. Header
+# names and common values repeat on every row, but a single small row gives
+# zlib nothing to back-reference; against a dictionary a typical header set
+# shrinks ~3x. Only stable content belongs here (names and standard value
+# tokens, nothing run- or server-specific). Stored headers are the version id
+# byte followed by the zlib stream, so a published dictionary must never
+# change: add a new version and point HEADER_ZDICT_VERSION at it. Ids must stay
+# below 8 so they can't be mistaken for a zlib stream's first byte.
+HEADER_ZDICTS = {
+    1: (
+        b'"Age":"","Expires":"","Last-Modified":"","Set-Cookie":"","ETag":"W/","Location":"",'
+        b'"Date":"","Server":"","Content-Length":"","Pragma":"no-cache","Content-Encoding":"gzip",'
+        b'"Transfer-Encoding":"chunked","Accept-Encoding":"gzip, deflate, br",'
+        b'"Accept-Language":"en-US,en;q=0.9","X-Request-Id":"","X-RateLimit-Limit":"",'
+        b'"X-RateLimit-Remaining":"","X-RateLimit-Reset":"","X-Frame-Options":"DENY",'
+        b'"X-XSS-Protection":"1; mode=block","X-Content-Type-Options":"nosniff",'
+        b'"Strict-Transport-Security":"max-age=31536000; includeSubDomains",'
+        b'"Access-Control-Allow-Origin":"*","Access-Control-Allow-Credentials":"true",'
+        b'"Access-Control-Allow-Methods":"GET, POST, PUT, PATCH, DELETE, OPTIONS",'
+        b'"Access-Control-Allow-Headers":"Content-Type, Authorization","Vary":"Accept-Encoding",'
+        b'"Cache-Control":"no-cache, no-store, must-revalidate, private, max-age=0",'
+        b'"Connection":"keep-alive","User-Agent":"python-requests/","Authorization":"Bearer ",'
+        b'"Accept":"application/json",{"Content-Type":"application/json; charset=utf-8"}'
+    ),
+}
+HEADER_ZDICT_VERSION = 1
+
+# Dictionary of header rows written before version ids (a bare zlib stream
+# with FDICT set). Kept only to decode those rows.
+_LEGACY_HEADER_ZDICT = (
+    b'"Expires":"","Last-Modified":"","Set-Cookie":"","ETag":"W/","Location":"",'
+    b'"Pragma":"no-cache","Content-Encoding":"gzip","Transfer-Encoding":"chunked",'
+    b'"Accept-Encoding":"gzip, deflate, br","Accept-Language":"en-US,en;q=0.9",'
+    b'"User-Agent":"python-requests/","X-Frame-Options":"DENY","X-XSS-Protection":"1; mode=block",'
+    b'"Access-Control-Allow-Origin":"*","Access-Control-Allow-Methods":"GET, POST, PUT, DELETE, OPTIONS",'
+    b'"Access-Control-Allow-Headers":"Content-Type, Authorization","X-RateLimit-Limit":"",'
+    b'"X-RateLimit-Remaining":"","X-Request-Id":"","X-Powered-By":"Express",'
+    b'"Strict-Transport-Security":"max-age=31536000; includeSubDomains",'
+    b'"X-Content-Type-Options":"nosniff","Vary":"Accept-Encoding","Server":"nginx",'
+    b'"Cache-Control":"no-cache, no-store, must-revalidate","Connection":"keep-alive",'
+    b'"Authorization":"Bearer ","Accept":"application/json","Content-Length":"",'
+    b'"Date":"Mon, Tue, Wed, Thu, Fri, Sat, Sun, Jan Feb Mar Apr May Jun Jul Aug Sep Oct Nov Dec 2026 GMT",'
+    b'{"Content-Type":"application/json; charset=utf-8"}'
+)
+
+# Insert statements shared by the single-row and bulk save methods
+_SQL_INSERT_TEST_RESULT = """
+    INSERT INTO test_results (
+        schema_file, method, path, status, status_code, expected_status,
+        response_time_ms, error_message, schema_mismatch, response_size_bytes,
+        auth_attempts, auth_succeeded
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# RETURNING (SQLite 3.35+) hands back the new id without a lastrowid lookup
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+_SQL_INSERT_TEST_RESULT_RETURNING = _SQL_INSERT_TEST_RESULT.rstrip() + " RETURNING id"
+
+_SQL_INSERT_REQUEST_RESPONSE = """
+    INSERT INTO request_response_storage (
+        test_result_id, endpoint_id,
+        request_headers, request_body, request_params,
+        response_status_code, response_headers, response_body,
+        response_time_ms
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Test results table layout, shared with the v4 migration rebuild. No
+# UNIQUE(schema_file, method, path, timestamp): with 1-second timestamps it
+# rejected legitimate repeat runs and cost a unique-index probe per insert.
+_TEST_RESULTS_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        schema_file TEXT NOT NULL,
+        method TEXT NOT NULL,
+        path TEXT NOT NULL,
+        status TEXT NOT NULL,
+        status_code INTEGER,
+        expected_status INTEGER,
+        response_time_ms REAL,
+        error_message TEXT,
+        schema_mismatch BOOLEAN DEFAULT 0,
+        response_size_bytes INTEGER DEFAULT 0,
+        auth_attempts INTEGER DEFAULT 1,
+        auth_succeeded BOOLEAN DEFAULT 1,
+        timestamp INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))  -- Unix seconds, UTC
+    )
+"""
+
+_TEST_RESULTS_INDEX_DDL = (
+    """
+    CREATE INDEX IF NOT EXISTS idx_test_results_schema 
+    ON test_results(schema_file, timestamp DESC)
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_test_results_path 
+    ON test_results(method, path, timestamp DESC)
+    """,
+    # Full endpoint filter used by get_test_history(schema_file, method, path)
+    """
+    CREATE INDEX IF NOT EXISTS idx_test_results_full 
+    ON test_results(schema_file, method, path, timestamp DESC)
+    """,
+)
+
+# Request/response table layout, shared with the v3 migration rebuild
+_REQUEST_RESPONSE_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        test_result_id INTEGER,
+        endpoint_id INTEGER NOT NULL,  -- endpoints(id): (method, path) stored once
+        request_headers BLOB,  -- zlib-compressed JSON
+        request_body BLOB,     -- zlib-compressed JSON
+        request_params TEXT,   -- JSON
+        response_status_code INTEGER,
+        response_headers BLOB, -- zlib-compressed JSON
+        response_body BLOB,    -- zlib-compressed JSON (can be large)
+        response_time_ms REAL,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (test_result_id) REFERENCES test_results(id) ON DELETE CASCADE,
+        FOREIGN KEY (endpoint_id) REFERENCES endpoints(id)
+    )
+"""
+
+_REQUEST_RESPONSE_COLUMNS = (
+    'id', 'test_result_id', 'request_method', 'request_path',
+    'request_headers', 'request_body', 'request_params',
+    'response_status_code', 'response_headers', 'response_body',
+    'response_time_ms', 'timestamp'
+)
+
+# Idempotent schema DDL, run with executescript() on open
+_CORE_SCHEMA_DDL = f"""
+    -- Schema versions table (for tracking migrations)
+    CREATE TABLE IF NOT EXISTS schema_versions (
+        version INTEGER PRIMARY KEY,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        description TEXT
+    );
+    
+    -- Test results table
+    {_TEST_RESULTS_TABLE_DDL.format(table='test_results')};
+    
+    -- Endpoint lookup table (each method/path pair stored once)
+    CREATE TABLE IF NOT EXISTS endpoints (
+        id INTEGER PRIMARY KEY,
+        method TEXT NOT NULL,
+        path TEXT NOT NULL,
+        UNIQUE(method, path)
+    );
+    
+    -- Request/response storage table (full payloads for learning)
+    {_REQUEST_RESPONSE_TABLE_DDL.format(table='request_response_storage')};
+    
+    -- Baseline tracking table
+    CREATE TABLE IF NOT EXISTS baselines (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        schema_file TEXT NOT NULL,
+        method TEXT NOT NULL,
+        path TEXT NOT NULL,
+        status_code INTEGER NOT NULL,
+        response_time_ms REAL,
+        response_schema TEXT,  -- JSON schema of response
+        established_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(schema_file, method, path)
+    );
+    
+    -- Indexes for better query performance
+    {';'.join(_TEST_RESULTS_INDEX_DDL)};
+    
+    CREATE INDEX IF NOT EXISTS idx_baselines_schema 
+    ON baselines(schema_file, method, path);
+    
+    CREATE INDEX IF NOT EXISTS idx_request_response_test_id 
+    ON request_response_storage(test_result_id);
+"""
+
+# AI tables (schema version 2)
+_AI_SCHEMA_DDL = """
+    -- AI test cases table
+    CREATE TABLE IF NOT EXISTS ai_test_cases (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        schema_file TEXT NOT NULL,
+        method TEXT NOT NULL,
+        path TEXT NOT NULL,
+        test_case_json TEXT NOT NULL,  -- JSON string of test case
+        validation_status TEXT DEFAULT 'pending',  -- pending, approved, rejected, needs_improvement
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        version INTEGER DEFAULT 1
+    );
+    
+    -- Validation feedback table
+    CREATE TABLE IF NOT EXISTS validation_feedback (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        test_case_id INTEGER NOT NULL,
+        status TEXT NOT NULL,  -- approved, rejected, needs_improvement
+        feedback_text TEXT,
+        annotations_json TEXT,  -- JSON string of annotations
+        validated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        validated_by TEXT,  -- Optional identifier (e.g., username)
+        FOREIGN KEY (test_case_id) REFERENCES ai_test_cases(id) ON DELETE CASCADE
+    );
+    
+    -- AI prompts table
+    CREATE TABLE IF NOT EXISTS ai_prompts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        prompt_name TEXT NOT NULL,
+        prompt_version INTEGER NOT NULL,
+        prompt_template TEXT NOT NULL,
+        metadata_json TEXT,  -- JSON string of metadata
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_active BOOLEAN DEFAULT 0,
+        UNIQUE(prompt_name, prompt_version)
+    );
+    
+    -- Patterns table (for learned patterns)
+    CREATE TABLE IF NOT EXISTS patterns (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pattern_type TEXT NOT NULL,  -- e.g., 'data_generation', 'test_scenario', etc.
+        pattern_data TEXT NOT NULL,  -- JSON string of pattern data
+        effectiveness_score REAL DEFAULT 0.0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    
+    -- Indexes for AI tables
+    -- Equality columns first, then the ORDER BY column, so the getters
+    -- read rows already sorted
+    CREATE INDEX IF NOT EXISTS idx_ai_test_cases_endpoint_created 
+    ON ai_test_cases(schema_file, method, path, created_at DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_ai_test_cases_status_schema 
+    ON ai_test_cases(validation_status, schema_file, created_at DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_validation_feedback_test_case_validated 
+    ON validation_feedback(test_case_id, validated_at DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_validation_feedback_validated 
+    ON validation_feedback(validated_at DESC);
+    
+    -- (prompt_name, prompt_version) lookups use the UNIQUE constraint's index
+    CREATE INDEX IF NOT EXISTS idx_ai_prompts_name_active 
+    ON ai_prompts(prompt_name, is_active, prompt_version DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_patterns_type_effectiveness 
+    ON patterns(pattern_type, effectiveness_score DESC, created_at DESC);
+    
+    CREATE INDEX IF NOT EXISTS idx_patterns_effectiveness 
+    ON patterns(effectiveness_score);
+"""
+
+_SCHEMA_DDL = _CORE_SCHEMA_DDL + _AI_SCHEMA_DDL
+
+# Fixed column order for tuple-row readers (see _rows_to_dicts)
+_TEST_RESULT_COLUMNS = (
+    'id', 'schema_file', 'method', 'path', 'status', 'status_code',
+    'expected_status', 'response_time_ms', 'error_message', 'schema_mismatch',
+    'response_size_bytes', 'auth_attempts', 'auth_succeeded', 'timestamp'
+)
+
+# test_results.timestamp is stored as Unix seconds but still returned in
+# CURRENT_TIMESTAMP's 'YYYY-MM-DD HH:MM:SS' form
+_TEST_RESULT_TIMESTAMP_SQL = "datetime(timestamp, 'unixepoch')"
+_TEST_RESULT_SELECT = ', '.join(
+    f"{_TEST_RESULT_TIMESTAMP_SQL} AS timestamp" if col == 'timestamp' else col
+    for col in _TEST_RESULT_COLUMNS
+)
+
+_BASELINE_COLUMNS = (
+    'id', 'schema_file', 'method', 'path', 'status_code',
+    'response_time_ms', 'response_schema', 'established_at'
+)
+
+# Updates in place (keeping id) rather than INSERT OR REPLACE's delete + insert
+_SQL_UPSERT_BASELINE = """
+    INSERT INTO baselines (
+        schema_file, method, path, status_code,
+        response_time_ms, response_schema, established_at
+    ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(schema_file, method, path) DO UPDATE SET
+        status_code = excluded.status_code,
+        response_time_ms = excluded.response_time_ms,
+        response_schema = excluded.response_schema,
+        established_at = excluded.established_at
+"""
+
+_SQL_SELECT_BASELINE = f"""
+    SELECT {', '.join(_BASELINE_COLUMNS)} FROM baselines
+    WHERE schema_file = ? AND method = ? AND path = ?
+"""
+
+# Optional get_test_history filters as (column, operator), one mask bit each
+_HISTORY_FILTERS = (
+    ('schema_file', '='),
+    ('method', '='),
+    ('path', '='),
+    ('timestamp', '>='),
+    ('timestamp', '<='),
+)
+
+_SQL_TEST_HISTORY = f"""
+    SELECT {_TEST_RESULT_SELECT} FROM test_results
+    {{where}}
+    ORDER BY timestamp DESC, id DESC LIMIT ?
+"""
+
+# Plain json_group_array() over an ordered subquery doesn't guarantee
+# element order; as a window aggregate it consumes rows in window order
+_SQL_TEST_HISTORY_JSON = """
+    SELECT json_group_array(json_object({fields})) OVER (
+        ORDER BY row_num ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING
+    ) FROM (
+        SELECT {columns}, ROW_NUMBER() OVER (ORDER BY timestamp DESC, id DESC) AS row_num
+        FROM test_results
+        {{where}}
+        ORDER BY timestamp DESC, id DESC LIMIT ?
+    )
+    LIMIT 1
+""".format(columns=', '.join(_TEST_RESULT_COLUMNS), fields=', '.join(
+    f"'{col}', json(CASE WHEN {col} THEN 'true' ELSE 'false' END)"
+    if col in ('schema_mismatch', 'auth_succeeded')
+    else f"'{col}', {_TEST_RESULT_TIMESTAMP_SQL}" if col == 'timestamp'
+    else f"'{col}', {col}"
+    for col in _TEST_RESULT_COLUMNS
+))
+
+# AI table writers
+_SQL_INSERT_AI_TEST_CASE = """
+    INSERT INTO ai_test_cases (
+        schema_file, method, path, test_case_json, validation_status, version
+    ) VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_UPDATE_AI_TEST_CASE_STATUS = """
+    UPDATE ai_test_cases
+    SET validation_status = ?
+    WHERE id = ?
+"""
+
+_SQL_DELETE_AI_TEST_CASE = "DELETE FROM ai_test_cases WHERE id = ?"
+
+_SQL_INSERT_VALIDATION_FEEDBACK = """
+    INSERT INTO validation_feedback (
+        test_case_id, status, feedback_text, annotations_json, validated_by
+    ) VALUES (?, ?, ?, ?, ?)
+"""
+
+# Inserts a prompt at the given version, or one past the newest stored
+# version when that is NULL; the version is computed inside the INSERT so
+# concurrent saves can't both read the same MAX
+_SQL_INSERT_AI_PROMPT = """
+    INSERT INTO ai_prompts (
+        prompt_name, prompt_version, prompt_template, metadata_json
+    ) VALUES (
+        ?,
+        COALESCE(?, COALESCE(
+            (SELECT MAX(prompt_version) FROM ai_prompts WHERE prompt_name = ?), 0
+        ) + 1),
+        ?, ?
+    )
+"""
+
+# Activates one version and deactivates the rest in a single pass over the
+# prompt's rows
+_SQL_SET_ACTIVE_AI_PROMPT = """
+    UPDATE ai_prompts
+    SET is_active = CASE WHEN prompt_version = ? THEN 1 ELSE 0 END
+    WHERE prompt_name = ?
+"""
+
+_SQL_INSERT_PATTERN = """
+    INSERT INTO patterns (
+        pattern_type, pattern_data, effectiveness_score
+    ) VALUES (?, ?, ?)
+"""
+
+_SQL_UPDATE_PATTERN_EFFECTIVENESS = """
+    UPDATE patterns
+    SET effectiveness_score = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE id = ?
+"""
+
+_SQL_DELETE_PATTERN = "DELETE FROM patterns WHERE id = ?"
+
+# Explicit AI table column lists (instead of SELECT *).
+# test_case_json, annotations_json, metadata_json and pattern_data are
+# written as UTF-8 JSON BLOBs (json_dumps_bytes): reads then skip sqlite3's
+# text decode and json_loads parses the bytes as-is. Rows written as TEXT
+# before this decode the same way, so no migration is needed.
+_AI_TEST_CASE_COLUMNS = (
+    'id', 'schema_file', 'method', 'path', 'test_case_json',
+    'validation_status', 'created_at', 'version'
+)
+
+_VALIDATION_FEEDBACK_COLUMNS = (
+    'id', 'test_case_id', 'status', 'feedback_text', 'annotations_json',
+    'validated_at', 'validated_by'
+)
+
+_AI_PROMPT_COLUMNS = (
+    'id', 'prompt_name', 'prompt_version', 'prompt_template',
+    'metadata_json', 'created_at', 'is_active'
+)
+
+# Version listings that don't need the (large) template text
+_AI_PROMPT_SUMMARY_COLUMNS = tuple(
+    col for col in _AI_PROMPT_COLUMNS if col != 'prompt_template'
+)
+
+_PATTERN_COLUMNS = (
+    'id', 'pattern_type', 'pattern_data', 'effectiveness_score',
+    'created_at', 'updated_at'
+)
+
+# AI table reads. Every variant is a fixed string, so sqlite3's statement
+# cache (cached_statements) reuses the prepared statement across calls.
+_AI_TEST_CASE_QUERIES = {
+    'by_id': "WHERE id = ?",
+    'by_endpoint': "WHERE schema_file = ? AND method = ? AND path = ? ORDER BY created_at DESC",
+    'by_status': "WHERE validation_status = ? ORDER BY created_at DESC LIMIT ?",
+    'by_status_schema': (
+        "WHERE validation_status = ? AND schema_file = ? ORDER BY created_at DESC LIMIT ?"
+    ),
+    'all': "ORDER BY schema_file, method, path, created_at DESC LIMIT ?",
+    'all_schema': "WHERE schema_file = ? ORDER BY schema_file, method, path, created_at DESC LIMIT ?",
+}
+
+_SQL_SELECT_VALIDATION_FEEDBACK = (
+    f"SELECT {', '.join(_VALIDATION_FEEDBACK_COLUMNS)} FROM validation_feedback"
+)
+_SQL_GET_VALIDATION_FEEDBACK = f"{_SQL_SELECT_VALIDATION_FEEDBACK} WHERE id = ?"
+_SQL_GET_VALIDATIONS_BY_TEST_CASE = f"""
+    {_SQL_SELECT_VALIDATION_FEEDBACK}
+    WHERE test_case_id = ?
+    ORDER BY validated_at DESC
+"""
+_FEEDBACK_CORPUS_COLUMNS = _VALIDATION_FEEDBACK_COLUMNS + ('schema_file', 'method', 'path')
+_SQL_GET_FEEDBACK_CORPUS = f"""
+    SELECT {', '.join(f"vf.{col}" for col in _VALIDATION_FEEDBACK_COLUMNS)},
+           atc.schema_file, atc.method, atc.path
+    FROM validation_feedback vf
+    JOIN ai_test_cases atc ON vf.test_case_id = atc.id
+    ORDER BY vf.validated_at DESC
+    LIMIT ?
+"""
+_SQL_FEEDBACK_STATUS_COUNTS = """
+    SELECT status, COUNT(*) as count
+    FROM validation_feedback
+    GROUP BY status
+"""
+
+_SQL_SELECT_AI_PROMPTS = f"SELECT {', '.join(_AI_PROMPT_COLUMNS)} FROM ai_prompts"
+_SQL_GET_AI_PROMPT_VERSION = f"""
+    {_SQL_SELECT_AI_PROMPTS}
+    WHERE prompt_name = ? AND prompt_version = ?
+"""
+_SQL_GET_ACTIVE_AI_PROMPT = f"""
+    {_SQL_SELECT_AI_PROMPTS}
+    WHERE prompt_name = ? AND is_active = 1
+    ORDER BY prompt_version DESC
+    LIMIT 1
+"""
+_SQL_LIST_AI_PROMPT_VERSIONS = f"""
+    {_SQL_SELECT_AI_PROMPTS}
+    WHERE prompt_name = ?
+    ORDER BY prompt_version DESC
+"""
+_SQL_LIST_AI_PROMPT_VERSIONS_SUMMARY = f"""
+    SELECT {', '.join(_AI_PROMPT_SUMMARY_COLUMNS)} FROM ai_prompts
+    WHERE prompt_name = ?
+    ORDER BY prompt_version DESC
+"""
+_SQL_GET_LATEST_AI_PROMPT = f"""
+    {_SQL_SELECT_AI_PROMPTS}
+    WHERE prompt_name = ?
+    ORDER BY prompt_version DESC
+    LIMIT 1
+"""
+
+_SQL_SELECT_PATTERNS = f"""
+    SELECT {', '.join(_PATTERN_COLUMNS)} FROM patterns
+    WHERE effectiveness_score >= ?
+    ORDER BY effectiveness_score DESC, created_at DESC
+"""
+_SQL_SELECT_PATTERNS_BY_TYPE = f"""
+    SELECT {', '.join(_PATTERN_COLUMNS)} FROM patterns
+    WHERE effectiveness_score >= ? AND pattern_type = ?
+    ORDER BY effectiveness_score DESC, created_at DESC
+"""
+
+
+def encode_payload(value: Any, zdict_version: Optional[int] = None) -> Optional[bytes]:
+    """
+    Serialize a request/response payload for storage
+    
+    Payloads are compact JSON compressed with zlib and stored as BLOBs.
+    
+    Args:
+        value: JSON-serializable payload
+        zdict_version: Optional HEADER_ZDICTS id to compress against
+            (HEADER_ZDICT_VERSION for headers); stored as the first byte
+    
+    Returns:
+        Compressed bytes, or None for empty payloads
+    """
+    if not value:
+        return None
+    if zdict_version is None:
+        return zlib.compress(json_dumps_bytes(value), PAYLOAD_COMPRESSION_LEVEL)
+    compressor = zlib.compressobj(PAYLOAD_COMPRESSION_LEVEL, zdict=HEADER_ZDICTS[zdict_version])
+    return bytes((zdict_version,)) + compressor.compress(json_dumps_bytes(value)) + compressor.flush()
+
+
+def decode_payload(value: Optional[Any]) -> Any:
+    """
+    Decode a stored request/response payload
+    
+    Accepts compressed BLOBs (with or without a HEADER_ZDICTS version id) and
+    JSON TEXT written by older versions.
+    
+    Args:
+        value: Raw column value
+    
+    Returns:
+        Decoded payload, or None if nothing was stored
+    """
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        zdict = HEADER_ZDICTS.get(value[0]) if value else None
+        if zdict is not None:
+            decompressor = zlib.decompressobj(zdict=zdict)
+            value = decompressor.decompress(value[1:]) + decompressor.flush()
+        elif len(value) > 1 and value[1] & 0x20:
+            # FDICT set without a version id: written against the legacy dictionary
+            decompressor = zlib.decompressobj(zdict=_LEGACY_HEADER_ZDICT)
+            value = decompressor.decompress(value) + decompressor.flush()
+        else:
+            value = zlib.decompress(value)
+    return json_loads(value)
+
+
+def _write_method(method):
+    """
+    Run a Database write method under the writer lock and in a transaction
+    
+    With autocommit on, each call is its own transaction (or joins an open
+    transaction() block). With autocommit off, the first write opens a
+    transaction that stays open until transaction() or close() commits it.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            if not self.autocommit and self._transaction_depth == 0:
+                if not self.conn.in_transaction:
+                    self.conn.execute("BEGIN IMMEDIATE")
+                return method(self, *args, **kwargs)
+            with self.transaction():
+                return method(self, *args, **kwargs)
+    return wrapper
+
+
+class _ReaderHandle:
+    """Thread-local owner of a reader connection (see Database._read_conn)"""
+    __slots__ = ('conn', '__weakref__')
+    
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def _close_reader(conn: sqlite3.Connection, readers: list, lock: threading.Lock):
+    """Close a reader connection once its thread has exited"""
+    with lock:
+        if conn not in readers:
+            return  # Already closed by Database.close()
+        readers.remove(conn)
+    conn.close()
+
+
+def _backup_to_disk(conn: sqlite3.Connection, db_path: str):
+    """Copy an in-memory database back to its file (see Database.in_memory)"""
+    disk = sqlite3.connect(db_path)
+    try:
+        conn.backup(disk)
+    finally:
+        disk.close()
+
+
+def _release_connections(conn: sqlite3.Connection, readers: list,
+                         lock: threading.Lock, backup_path: Optional[str] = None):
+    """
+    Close a Database's connections (see Database.close)
+    
+    Registered with weakref.finalize, so it also runs when a Database is
+    garbage collected or the interpreter exits without close(). Pending
+    autocommit=False writes are committed and in-memory databases copied
+    back to backup_path first.
+    """
+    with lock:
+        pending = list(readers)
+        readers.clear()
+    for reader in pending:
+        reader.close()
+    try:
+        if conn.in_transaction:
+            conn.commit()
+        if backup_path is not None:
+            _backup_to_disk(conn, backup_path)
+        conn.close()
+    except sqlite3.ProgrammingError:
+        pass  # Connection was already closed
+
+
+def _sql_timestamp(value: datetime) -> int:
+    """
+    Convert a datetime to the Unix seconds stored in test_results.timestamp
+    
+    Aware datetimes are converted to UTC; naive ones are assumed to be UTC
+    already (as CURRENT_TIMESTAMP was).
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def _rows_to_dicts(columns: tuple, rows: List[tuple]) -> List[Dict[str, Any]]:
+    """Convert tuple rows to dictionaries keyed by a known column order"""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+@lru_cache(maxsize=None)
+def _test_history_sql(mask: int, as_json: bool = False) -> str:
+    """
+    SQL for one combination of get_test_history filters
+    
+    Built once per filter mask, so repeated calls pass sqlite3 the identical
+    string and reuse its cached prepared statement.
+    """
+    clauses = [
+        f"{column} {operator} ?"
+        for bit, (column, operator) in enumerate(_HISTORY_FILTERS)
+        if mask & (1 << bit)
+    ]
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    template = _SQL_TEST_HISTORY_JSON if as_json else _SQL_TEST_HISTORY
+    return template.format(where=where)
+
+
+@lru_cache(maxsize=None)
+def _ai_test_case_sql(query: str, load_json: bool = True) -> str:
+    """
+    SELECT for one of _AI_TEST_CASE_QUERIES, built once per (query, load_json)
+    
+    With load_json False, test_case_json is selected as NULL so the column
+    is never read.
+    """
+    columns = ', '.join(
+        'NULL AS test_case_json' if col == 'test_case_json' and not load_json else col
+        for col in _AI_TEST_CASE_COLUMNS
+    )
+    return f"SELECT {columns} FROM ai_test_cases {_AI_TEST_CASE_QUERIES[query]}"
+
 
 # Database location (local file only)
 def get_db_path() -> Path:
@@ -27,218 +728,166 @@ def get_db_path() -> Path:
 
 
 class Database:
-    """Local SQLite database manager for test results and history"""
+    """
+    Local SQLite database manager for test results and history
     
-    def __init__(self, db_path: Optional[Path] = None):
+    Call close() (or use it as a context manager) when done; that is where
+    pending writes are flushed and the WAL checkpointed. A Database that is
+    never closed only has its connections released when it is collected.
+    """
+    
+    def __init__(self, db_path: Optional[Path] = None, journal_mode: Optional[str] = 'WAL',
+                 autocommit: bool = True, in_memory: bool = False):
         """
         Initialize database connection
         
         Args:
             db_path: Optional path to database file. Defaults to ~/.apitest/data.db
+            journal_mode: SQLite journal mode to use (default: WAL). Pass None to
+                keep SQLite's defaults (rollback journal, synchronous=FULL).
+            autocommit: Commit after every write outside of transaction().
+                When False, writes are only committed by transaction() or close().
+            in_memory: Load db_path into an in-memory database and work there,
+                copying it back to disk on close() or interpreter exit. Much
+                cheaper commits, but writes since the last save are lost if
+                the process dies.
         """
         self.db_path = db_path or get_db_path()
-        self.conn: Optional[sqlite3.Connection] = None
+        self.journal_mode = journal_mode
+        self.autocommit = autocommit
+        self.in_memory = in_memory
+        self._release: Optional[weakref.finalize] = None
+        self._transaction_depth = 0
+        self._rollback_only = False
+        self._endpoint_ids: Dict[tuple, int] = {}
+        self._baseline_cache: Optional[Dict[tuple, Dict[str, Any]]] = None
+        # (lookup, prompt_name) -> (fetched_at, prompt or None)
+        self._prompt_cache: Dict[tuple, tuple] = {}
+        self._commits_since_checkpoint = 0
+        self.conn: Optional[sqlite3.Connection] = None  # Writer connection
+        self._write_lock = threading.RLock()
+        self._local = threading.local()  # Per-thread reader connection
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
         self._initialize()
     
     def _initialize(self):
         """Initialize database and create schema if needed"""
         # Ensure directory exists
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        if str(self.db_path) != ':memory:':
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
         
         # Connect to database
         self.conn = sqlite3.connect(
-            str(self.db_path),
+            ':memory:' if self.in_memory else str(self.db_path),
             check_same_thread=False,
-            timeout=30.0
+            timeout=30.0,
+            cached_statements=256,  # Reuse compiled statements for the fixed SQL constants
+            isolation_level=None  # No implicit BEGIN/COMMIT; see transaction()
         )
         self.conn.row_factory = sqlite3.Row  # Enable column access by name
+        self._release = weakref.finalize(
+            self, _release_connections, self.conn, self._readers, self._readers_lock,
+            str(self.db_path) if self.in_memory else None
+        )
+        if self.in_memory:
+            self._load_from_disk()
+        
+        # Tune connection before any schema work
+        self._configure_page_size()
+        self._configure_connection()
+        
+        # Warm open: the header's user_version says setup already ran
+        user_version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if user_version == CURRENT_SCHEMA_VERSION:
+            return
         
         # Create tables
         self._create_schema()
         
         # Run migrations if needed
         self._run_migrations()
+        self.conn.execute(f"PRAGMA user_version = {CURRENT_SCHEMA_VERSION}")
+        self._commits_since_checkpoint = 0  # Migration commits don't count
+    
+    def _load_from_disk(self):
+        """
+        Copy db_path into the in-memory connection (in_memory=True)
+        
+        The reverse copy is made by _release_connections, on close() or at
+        interpreter exit, whichever comes first.
+        """
+        if self.db_path.exists():
+            disk = sqlite3.connect(str(self.db_path))
+            try:
+                disk.backup(self.conn)
+            finally:
+                disk.close()
+    
+    def _configure_page_size(self):
+        """
+        Use 16KB pages for newly created databases
+        
+        Response bodies are stored inline and routinely exceed the default
+        4KB page, spilling into overflow pages. page_size only takes effect
+        before the first table is written (and before WAL is enabled), so
+        existing databases keep their current page size.
+        """
+        is_empty = self.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0] == 0
+        if is_empty:
+            self.conn.execute(f"PRAGMA page_size={DB_PAGE_SIZE}")
+    
+    def _configure_connection(self):
+        """
+        Apply performance PRAGMAs to the connection
+        
+        WAL with synchronous=NORMAL avoids an fsync per commit and lets readers
+        run alongside a writer. Skipped when journal_mode is None; in-memory
+        databases have no journal file, so they only get the cache PRAGMAs.
+        """
+        if not self.journal_mode:
+            return
+        
+        if not self._in_memory():
+            self.conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute(f"PRAGMA wal_autocheckpoint={WAL_AUTOCHECKPOINT_PAGES}")
+            self.conn.execute(f"PRAGMA journal_size_limit={WAL_JOURNAL_SIZE_LIMIT}")
+        for pragma in _CACHE_PRAGMAS:
+            self.conn.execute(pragma)
+        self.conn.execute("PRAGMA busy_timeout=30000")
+    
+    def _in_memory(self) -> bool:
+        """Whether the database lives in memory (db_path ':memory:' or in_memory=True)"""
+        return self.in_memory or str(self.db_path) == ':memory:'
+    
+    def _uses_wal(self) -> bool:
+        """Whether the database file runs in WAL mode"""
+        return (
+            bool(self.journal_mode) and self.journal_mode.upper() == 'WAL'
+            and not self._in_memory()
+        )
     
     def _create_schema(self):
         """Create database schema if it doesn't exist"""
-        cursor = self.conn.cursor()
+        # One parse/plan pass for all the idempotent DDL
+        self._execute_ddl(_SCHEMA_DDL)
+    
+    def _execute_ddl(self, script: str):
+        """
+        Run a DDL script as a single transaction
         
-        # Schema versions table (for tracking migrations)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS schema_versions (
-                version INTEGER PRIMARY KEY,
-                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                description TEXT
-            )
-        """)
-        
-        # Test results table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS test_results (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                schema_file TEXT NOT NULL,
-                method TEXT NOT NULL,
-                path TEXT NOT NULL,
-                status TEXT NOT NULL,
-                status_code INTEGER,
-                expected_status INTEGER,
-                response_time_ms REAL,
-                error_message TEXT,
-                schema_mismatch BOOLEAN DEFAULT 0,
-                response_size_bytes INTEGER DEFAULT 0,
-                auth_attempts INTEGER DEFAULT 1,
-                auth_succeeded BOOLEAN DEFAULT 1,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(schema_file, method, path, timestamp)
-            )
-        """)
-        
-        # Request/response storage table (full payloads for learning)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS request_response_storage (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                test_result_id INTEGER,
-                request_method TEXT NOT NULL,
-                request_path TEXT NOT NULL,
-                request_headers TEXT,  -- JSON
-                request_body TEXT,     -- JSON
-                request_params TEXT,   -- JSON
-                response_status_code INTEGER,
-                response_headers TEXT, -- JSON
-                response_body TEXT,    -- JSON (can be large)
-                response_time_ms REAL,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (test_result_id) REFERENCES test_results(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # Baseline tracking table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS baselines (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                schema_file TEXT NOT NULL,
-                method TEXT NOT NULL,
-                path TEXT NOT NULL,
-                status_code INTEGER NOT NULL,
-                response_time_ms REAL,
-                response_schema TEXT,  -- JSON schema of response
-                established_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(schema_file, method, path)
-            )
-        """)
-        
-        # Create indexes for better query performance
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_test_results_schema 
-            ON test_results(schema_file, timestamp DESC)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_test_results_path 
-            ON test_results(method, path, timestamp DESC)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_baselines_schema 
-            ON baselines(schema_file, method, path)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_request_response_test_id 
-            ON request_response_storage(test_result_id)
-        """)
-        
-        # AI test cases table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ai_test_cases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                schema_file TEXT NOT NULL,
-                method TEXT NOT NULL,
-                path TEXT NOT NULL,
-                test_case_json TEXT NOT NULL,  -- JSON string of test case
-                validation_status TEXT DEFAULT 'pending',  -- pending, approved, rejected, needs_improvement
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                version INTEGER DEFAULT 1
-            )
-        """)
-        
-        # Validation feedback table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS validation_feedback (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                test_case_id INTEGER NOT NULL,
-                status TEXT NOT NULL,  -- approved, rejected, needs_improvement
-                feedback_text TEXT,
-                annotations_json TEXT,  -- JSON string of annotations
-                validated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                validated_by TEXT,  -- Optional identifier (e.g., username)
-                FOREIGN KEY (test_case_id) REFERENCES ai_test_cases(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # AI prompts table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ai_prompts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                prompt_name TEXT NOT NULL,
-                prompt_version INTEGER NOT NULL,
-                prompt_template TEXT NOT NULL,
-                metadata_json TEXT,  -- JSON string of metadata
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_active BOOLEAN DEFAULT 0,
-                UNIQUE(prompt_name, prompt_version)
-            )
-        """)
-        
-        # Patterns table (for learned patterns)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS patterns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pattern_type TEXT NOT NULL,  -- e.g., 'data_generation', 'test_scenario', etc.
-                pattern_data TEXT NOT NULL,  -- JSON string of pattern data
-                effectiveness_score REAL DEFAULT 0.0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create indexes for AI tables
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ai_test_cases_endpoint 
-            ON ai_test_cases(schema_file, method, path)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ai_test_cases_status 
-            ON ai_test_cases(validation_status)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_validation_feedback_test_case 
-            ON validation_feedback(test_case_id)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ai_prompts_name_version 
-            ON ai_prompts(prompt_name, prompt_version)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ai_prompts_active 
-            ON ai_prompts(is_active)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_patterns_type 
-            ON patterns(pattern_type)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_patterns_effectiveness 
-            ON patterns(effectiveness_score)
-        """)
-        
-        self.conn.commit()
+        executescript() alone commits every statement separately on this
+        isolation_level=None connection; one BEGIN/COMMIT around the script
+        makes it one journal commit, and a failing statement rolls back the
+        whole script instead of leaving it half applied.
+        """
+        try:
+            self.conn.executescript(f"BEGIN;\n{script}\nCOMMIT;")
+        except sqlite3.Error:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            raise
     
     def _run_migrations(self):
         """Run database migrations if needed"""
@@ -271,6 +920,56 @@ class Database:
                     VALUES (2, 'Added AI test cases, validation feedback, AI prompts, and patterns tables')
                 """)
                 self.conn.commit()
+                current_version = 2
+            
+            # Migration 3: Move request method/path into the endpoints lookup table
+            if current_version < 3:
+                self._migrate_to_v3(cursor)
+                cursor.execute("""
+                    INSERT INTO schema_versions (version, description)
+                    VALUES (3, 'Normalized request/response method and path into endpoints table')
+                """)
+                self.conn.commit()
+                current_version = 3
+            
+            # Migration 4: Drop the UNIQUE constraint on test_results
+            if current_version < 4:
+                self._migrate_to_v4(cursor)
+                cursor.execute("""
+                    INSERT INTO schema_versions (version, description)
+                    VALUES (4, 'Dropped UNIQUE(schema_file, method, path, timestamp) from test_results')
+                """)
+                self.conn.commit()
+                current_version = 4
+            
+            # Migration 5: Replace the narrow ai_test_cases indexes
+            if current_version < 5:
+                self._migrate_to_v5(cursor)
+                cursor.execute("""
+                    INSERT INTO schema_versions (version, description)
+                    VALUES (5, 'Composite ai_test_cases indexes matching getter filters and ordering')
+                """)
+                self.conn.commit()
+                current_version = 5
+            
+            # Migration 6: Store test_results.timestamp as Unix seconds
+            if current_version < 6:
+                self._migrate_to_v6(cursor)
+                cursor.execute("""
+                    INSERT INTO schema_versions (version, description)
+                    VALUES (6, 'Stored test_results.timestamp as INTEGER Unix seconds')
+                """)
+                self.conn.commit()
+                current_version = 6
+            
+            # Migration 7: Composite indexes for the feedback, prompt and pattern getters
+            if current_version < 7:
+                self._migrate_to_v7(cursor)
+                cursor.execute("""
+                    INSERT INTO schema_versions (version, description)
+                    VALUES (7, 'Composite validation_feedback, ai_prompts and patterns indexes')
+                """)
+                self.conn.commit()
     
     def _migrate_to_v2(self, cursor):
         """
@@ -281,98 +980,162 @@ class Database:
         """
         logger.info("Running migration to version 2: Adding AI-related tables")
         
-        # AI test cases table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ai_test_cases (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                schema_file TEXT NOT NULL,
-                method TEXT NOT NULL,
-                path TEXT NOT NULL,
-                test_case_json TEXT NOT NULL,
-                validation_status TEXT DEFAULT 'pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                version INTEGER DEFAULT 1
-            )
-        """)
-        
-        # Validation feedback table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS validation_feedback (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                test_case_id INTEGER NOT NULL,
-                status TEXT NOT NULL,
-                feedback_text TEXT,
-                annotations_json TEXT,
-                validated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                validated_by TEXT,
-                FOREIGN KEY (test_case_id) REFERENCES ai_test_cases(id) ON DELETE CASCADE
-            )
-        """)
-        
-        # AI prompts table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS ai_prompts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                prompt_name TEXT NOT NULL,
-                prompt_version INTEGER NOT NULL,
-                prompt_template TEXT NOT NULL,
-                metadata_json TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_active BOOLEAN DEFAULT 0,
-                UNIQUE(prompt_name, prompt_version)
-            )
-        """)
-        
-        # Patterns table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS patterns (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pattern_type TEXT NOT NULL,
-                pattern_data TEXT NOT NULL,
-                effectiveness_score REAL DEFAULT 0.0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create indexes for AI tables
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ai_test_cases_endpoint 
-            ON ai_test_cases(schema_file, method, path)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ai_test_cases_status 
-            ON ai_test_cases(validation_status)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_validation_feedback_test_case 
-            ON validation_feedback(test_case_id)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ai_prompts_name_version 
-            ON ai_prompts(prompt_name, prompt_version)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_ai_prompts_active 
-            ON ai_prompts(is_active)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_patterns_type 
-            ON patterns(pattern_type)
-        """)
-        
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_patterns_effectiveness 
-            ON patterns(effectiveness_score)
-        """)
+        self._execute_ddl(_AI_SCHEMA_DDL)
         
         logger.info("Migration to version 2 completed successfully")
     
+    def _migrate_to_v3(self, cursor):
+        """
+        Migration to version 3: Reference endpoints from request_response_storage
+        
+        Older databases repeat request_method/request_path on every payload row.
+        The table is rebuilt with an endpoint_id column pointing at the
+        endpoints lookup table. Databases created with the v3 layout are left as is.
+        
+        Args:
+            cursor: Database cursor for executing SQL
+        """
+        cursor.execute("PRAGMA table_info(request_response_storage)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if 'request_method' not in columns:
+            return
+        
+        logger.info("Running migration to version 3: Normalizing request/response endpoints")
+        
+        with self.transaction():
+            cursor.execute("""
+                INSERT OR IGNORE INTO endpoints (method, path)
+                SELECT DISTINCT request_method, request_path FROM request_response_storage
+            """)
+            cursor.execute(_REQUEST_RESPONSE_TABLE_DDL.format(table='request_response_storage_v3'))
+            cursor.execute("""
+                INSERT INTO request_response_storage_v3 (
+                    id, test_result_id, endpoint_id,
+                    request_headers, request_body, request_params,
+                    response_status_code, response_headers, response_body,
+                    response_time_ms, timestamp
+                )
+                SELECT r.id, r.test_result_id, e.id,
+                       r.request_headers, r.request_body, r.request_params,
+                       r.response_status_code, r.response_headers, r.response_body,
+                       r.response_time_ms, r.timestamp
+                FROM request_response_storage r
+                JOIN endpoints e ON e.method = r.request_method AND e.path = r.request_path
+            """)
+            cursor.execute("DROP TABLE request_response_storage")
+            cursor.execute("ALTER TABLE request_response_storage_v3 RENAME TO request_response_storage")
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_request_response_test_id 
+                ON request_response_storage(test_result_id)
+            """)
+    
+    def _migrate_to_v4(self, cursor):
+        """
+        Migration to version 4: Rebuild test_results without its UNIQUE constraint
+        
+        SQLite can't drop a table constraint in place, so older tables are
+        copied into the current layout (ids preserved) and their indexes
+        recreated, including idx_test_results_full, which takes over from the
+        dropped UNIQUE autoindex. Databases created with the v4 layout are
+        left as is.
+        
+        Args:
+            cursor: Database cursor for executing SQL
+        """
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = 'test_results' "
+            "AND name LIKE 'sqlite_autoindex_%'"
+        )
+        if cursor.fetchone()[0] == 0:
+            return
+        
+        logger.info("Running migration to version 4: Dropping test_results UNIQUE constraint")
+        
+        columns = ', '.join(_TEST_RESULT_COLUMNS)
+        with self.transaction():
+            cursor.execute(_TEST_RESULTS_TABLE_DDL.format(table='test_results_v4'))
+            cursor.execute(f"INSERT INTO test_results_v4 ({columns}) SELECT {columns} FROM test_results")
+            cursor.execute("DROP TABLE test_results")
+            cursor.execute("ALTER TABLE test_results_v4 RENAME TO test_results")
+            for statement in _TEST_RESULTS_INDEX_DDL:
+                cursor.execute(statement)
+        # Give the planner statistics for the rebuilt table and its indexes
+        cursor.execute("ANALYZE")
+    
+    def _migrate_to_v5(self, cursor):
+        """
+        Migration to version 5: Composite indexes for the AI test case getters
+        
+        The single-column status and endpoint indexes are superseded by
+        indexes that also cover the schema_file filter and created_at ordering.
+        
+        Args:
+            cursor: Database cursor for executing SQL
+        """
+        logger.info("Running migration to version 5: Replacing ai_test_cases indexes")
+        
+        cursor.execute("DROP INDEX IF EXISTS idx_ai_test_cases_endpoint")
+        cursor.execute("DROP INDEX IF EXISTS idx_ai_test_cases_status")
+        self._execute_ddl(_AI_SCHEMA_DDL)
+        # Give the planner statistics for the new indexes
+        cursor.execute("ANALYZE")
+    
+    def _migrate_to_v6(self, cursor):
+        """
+        Migration to version 6: INTEGER Unix-second timestamps on test_results
+        
+        Older tables declare timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        (text values), so they are rebuilt (ids preserved) with existing
+        values converted. Tables already in the current layout only need any text
+        values carried over by the v4 rebuild converted in place.
+        
+        Args:
+            cursor: Database cursor for executing SQL
+        """
+        logger.info("Running migration to version 6: Converting test_results timestamps")
+        
+        to_epoch = "CAST(strftime('%s', timestamp) AS INTEGER)"
+        cursor.execute("PRAGMA table_info(test_results)")
+        column_types = {row[1]: row[2] for row in cursor.fetchall()}
+        
+        with self.transaction():
+            if column_types.get('timestamp', '').upper() == 'INTEGER':
+                cursor.execute(f"UPDATE test_results SET timestamp = {to_epoch} WHERE typeof(timestamp) = 'text'")
+                return
+            
+            columns = ', '.join(_TEST_RESULT_COLUMNS)
+            values = ', '.join(
+                f"COALESCE({to_epoch}, 0)" if col == 'timestamp' else col
+                for col in _TEST_RESULT_COLUMNS
+            )
+            cursor.execute(_TEST_RESULTS_TABLE_DDL.format(table='test_results_v6'))
+            cursor.execute(f"INSERT INTO test_results_v6 ({columns}) SELECT {values} FROM test_results")
+            cursor.execute("DROP TABLE test_results")
+            cursor.execute("ALTER TABLE test_results_v6 RENAME TO test_results")
+            for statement in _TEST_RESULTS_INDEX_DDL:
+                cursor.execute(statement)
+    
+    def _migrate_to_v7(self, cursor):
+        """
+        Migration to version 7: Composite indexes for the remaining AI getters
+        
+        Replaces the single-column validation_feedback, ai_prompts and
+        patterns indexes with ones matching each getter's filter and ORDER
+        BY, and drops idx_ai_prompts_name_version, which duplicated the
+        UNIQUE(prompt_name, prompt_version) index.
+        
+        Args:
+            cursor: Database cursor for executing SQL
+        """
+        logger.info("Running migration to version 7: Replacing AI table indexes")
+        
+        for name in ('idx_validation_feedback_test_case', 'idx_ai_prompts_name_version',
+                     'idx_ai_prompts_active', 'idx_patterns_type'):
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        self._execute_ddl(_AI_SCHEMA_DDL)
+        # Give the planner statistics for the new indexes
+        cursor.execute("ANALYZE")
+    
     def save_test_result(self, schema_file: str, method: str, path: str, 
                         status: str, status_code: Optional[int] = None,
                         expected_status: Optional[int] = None,
@@ -402,20 +1165,37 @@ class Database:
         Returns:
             ID of inserted test result
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO test_results (
-                schema_file, method, path, status, status_code, expected_status,
-                response_time_ms, error_message, schema_mismatch, response_size_bytes,
-                auth_attempts, auth_succeeded
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        return self.save_test_result_row((
             schema_file, method, path, status, status_code, expected_status,
             response_time_ms, error_message, schema_mismatch, response_size_bytes,
             auth_attempts, auth_succeeded
         ))
-        self.conn.commit()
-        return cursor.lastrowid
+    
+    @_write_method
+    def save_test_result_row(self, row: tuple) -> int:
+        """
+        Save a test result given as a positional row
+        
+        Fast path for hot insert loops: the row is bound as-is, skipping
+        save_test_result()'s keyword handling.
+        
+        Args:
+            row: Tuple in save_test_result() argument order with all 12 columns
+                (schema_file, method, path, status, status_code, expected_status,
+                response_time_ms, error_message, schema_mismatch,
+                response_size_bytes, auth_attempts, auth_succeeded)
+        
+        Returns:
+            ID of inserted test result
+        """
+        return self._insert_test_result(row)
+    
+    def _insert_test_result(self, params: tuple) -> int:
+        """Insert one test_results row and return its id"""
+        if _SQLITE_HAS_RETURNING:
+            # fetchall() steps the statement to completion before any commit
+            return self.conn.execute(_SQL_INSERT_TEST_RESULT_RETURNING, params).fetchall()[0][0]
+        return self.conn.execute(_SQL_INSERT_TEST_RESULT, params).lastrowid
     
     def save_request_response(self, test_result_id: int, request_method: str,
                              request_path: str, request_headers: Optional[Dict[str, str]] = None,
@@ -440,25 +1220,223 @@ class Database:
             response_body: Response body as dict
             response_time_ms: Response time in milliseconds
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO request_response_storage (
-                test_result_id, request_method, request_path,
-                request_headers, request_body, request_params,
-                response_status_code, response_headers, response_body,
-                response_time_ms
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        self._insert_request_responses([self._encode_request_response(
+            test_result_id, request_method, request_path, request_headers,
+            request_body, request_params, response_status_code, response_headers,
+            response_body, response_time_ms
+        )])
+    
+    def _endpoint_id(self, method: str, path: str) -> int:
+        """
+        Get the endpoints row id for a method/path pair, inserting it if needed
+        
+        Ids are memoized per Database instance, so repeated saves for the same
+        endpoint skip the lookup entirely.
+        
+        Args:
+            method: HTTP method
+            path: API endpoint path
+        
+        Returns:
+            endpoints.id for the pair
+        """
+        key = (method, path)
+        endpoint_id = self._endpoint_ids.get(key)
+        if endpoint_id is None:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO endpoints (method, path) VALUES (?, ?)", key
+            )
+            endpoint_id = self.conn.execute(
+                "SELECT id FROM endpoints WHERE method = ? AND path = ?", key
+            ).fetchone()[0]
+            self._endpoint_ids[key] = endpoint_id
+        return endpoint_id
+    
+    @staticmethod
+    def _encode_request_response(test_result_id: int, request_method: str,
+                                 request_path: str, request_headers: Optional[Dict[str, str]] = None,
+                                 request_body: Optional[Dict[str, Any]] = None,
+                                 request_params: Optional[Dict[str, Any]] = None,
+                                 response_status_code: Optional[int] = None,
+                                 response_headers: Optional[Dict[str, str]] = None,
+                                 response_body: Optional[Dict[str, Any]] = None,
+                                 response_time_ms: float = 0.0) -> tuple:
+        """
+        Encode one set of save_request_response() arguments
+        
+        Runs before the write transaction is entered, so compression doesn't
+        hold the writer lock and a payload that fails to encode raises before
+        anything is written. The result still carries (method, path); see
+        _insert_request_responses().
+        """
+        return (
             test_result_id, request_method, request_path,
-            json.dumps(request_headers) if request_headers else None,
-            json.dumps(request_body) if request_body else None,
-            json.dumps(request_params) if request_params else None,
+            encode_payload(request_headers, HEADER_ZDICT_VERSION),
+            encode_payload(request_body),
+            json_dumps(request_params) if request_params else None,
             response_status_code,
-            json.dumps(response_headers) if response_headers else None,
-            json.dumps(response_body) if response_body else None,
+            encode_payload(response_headers, HEADER_ZDICT_VERSION),
+            encode_payload(response_body),
             response_time_ms
-        ))
-        self.conn.commit()
+        )
+    
+    @_write_method
+    def save_test_results_bulk(self, rows: List[tuple], return_ids: bool = False):
+        """
+        Save many test results in a single transaction
+        
+        Args:
+            rows: Tuples in save_test_result() argument order
+                (schema_file, method, path, status, status_code, expected_status,
+                response_time_ms, error_message, schema_mismatch,
+                response_size_bytes, auth_attempts, auth_succeeded)
+            return_ids: Return the inserted row ids instead of a count. Rows are
+                then inserted one statement at a time (still one commit).
+        
+        Returns:
+            Number of rows inserted, or list of new IDs in row order if return_ids
+        """
+        if not rows:
+            return [] if return_ids else 0
+        
+        with self.transaction():
+            if return_ids:
+                return [self._insert_test_result(tuple(row)) for row in rows]
+            self.conn.executemany(_SQL_INSERT_TEST_RESULT, rows)
+        return len(rows)
+    
+    @_write_method
+    def _insert_request_responses(self, encoded: List[tuple]) -> int:
+        """Insert rows from _encode_request_response(), resolving endpoint ids"""
+        params = [
+            (row[0], self._endpoint_id(row[1], row[2])) + row[3:]
+            for row in encoded
+        ]
+        self.conn.executemany(_SQL_INSERT_REQUEST_RESPONSE, params)
+        return len(params)
+    
+    def save_request_responses_bulk(self, rows: List[tuple]) -> int:
+        """
+        Save many request/response payloads in a single transaction
+        
+        Args:
+            rows: Tuples in save_request_response() argument order; dict
+                payloads are encoded here before binding
+        
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        
+        return self._insert_request_responses(
+            [self._encode_request_response(*row) for row in rows]
+        )
+    
+    def get_request_bodies(self, test_result_ids: List[int]) -> List[Any]:
+        """
+        Get decoded request bodies for several test results
+        
+        Args:
+            test_result_ids: IDs of the associated test results
+        
+        Returns:
+            Request bodies (None where a stored body can't be decoded)
+        """
+        if not test_result_ids:
+            return []
+        
+        placeholders = ','.join(['?'] * len(test_result_ids))
+        cursor = self._tuple_cursor()
+        cursor.execute(f"""
+            SELECT request_body
+            FROM request_response_storage
+            WHERE test_result_id IN ({placeholders})
+            AND request_body IS NOT NULL
+        """, list(test_result_ids))
+        
+        bodies = []
+        for (value,) in cursor.fetchall():
+            try:
+                bodies.append(decode_payload(value))
+            except (json.JSONDecodeError, TypeError, zlib.error):
+                bodies.append(None)
+        return bodies
+    
+    def get_request_responses(self, test_result_id: int,
+                              include_response_body: bool = True) -> List[Dict[str, Any]]:
+        """
+        Get stored request/response payloads for a test result
+        
+        Args:
+            test_result_id: ID of the associated test result
+            include_response_body: Load and decode response bodies; when False
+                response_body is None (see get_response_body())
+        
+        Returns:
+            List of dictionaries with decoded payloads and the endpoint's
+            request_method/request_path
+        """
+        response_body = 'r.response_body' if include_response_body else 'NULL'
+        cursor = self._tuple_cursor()
+        cursor.execute(f"""
+            SELECT r.id, r.test_result_id, e.method, e.path,
+                   r.request_headers, r.request_body, r.request_params,
+                   r.response_status_code, r.response_headers, {response_body},
+                   r.response_time_ms, r.timestamp
+            FROM request_response_storage r
+            JOIN endpoints e ON e.id = r.endpoint_id
+            WHERE r.test_result_id = ?
+            ORDER BY r.id
+        """, (test_result_id,))
+        
+        results = _rows_to_dicts(_REQUEST_RESPONSE_COLUMNS, cursor.fetchall())
+        for result in results:
+            for field in ('request_headers', 'request_body', 'response_headers', 'response_body'):
+                result[field] = decode_payload(result[field])
+            if result['request_params']:
+                result['request_params'] = json_loads(result['request_params'])
+        
+        return results
+    
+    def get_response_body(self, request_response_id: int) -> Any:
+        """
+        Get a single stored response body
+        
+        Compressed bodies are read through incremental BLOB I/O in
+        PAYLOAD_READ_CHUNK_SIZE pieces and decompressed as they stream, so
+        the raw column value is never held in memory as one buffer.
+        
+        Args:
+            request_response_id: ID of the request_response_storage row
+        
+        Returns:
+            Decoded response body, or None if the row or body doesn't exist
+        """
+        conn = self._read_conn()
+        row = conn.execute(
+            "SELECT typeof(response_body), length(response_body) FROM request_response_storage WHERE id = ?",
+            (request_response_id,)
+        ).fetchone()
+        if not row or row[0] == 'null':
+            return None
+        
+        if row[0] != 'blob' or not hasattr(conn, 'blobopen'):
+            # Legacy JSON TEXT, or Python < 3.11 without blobopen()
+            value = conn.execute(
+                "SELECT response_body FROM request_response_storage WHERE id = ?",
+                (request_response_id,)
+            ).fetchone()[0]
+            return decode_payload(value)
+        
+        decompressor = zlib.decompressobj()
+        parts = []
+        with conn.blobopen('request_response_storage', 'response_body',
+                           request_response_id, readonly=True) as blob:
+            for _ in range(0, row[1], PAYLOAD_READ_CHUNK_SIZE):
+                parts.append(decompressor.decompress(blob.read(PAYLOAD_READ_CHUNK_SIZE)))
+        parts.append(decompressor.flush())
+        return json_loads(b''.join(parts))
     
     def get_test_history(self, schema_file: Optional[str] = None,
                         method: Optional[str] = None,
@@ -480,58 +1458,113 @@ class Database:
         Returns:
             List of test result dictionaries
         """
-        cursor = self.conn.cursor()
-        query = "SELECT * FROM test_results WHERE 1=1"
-        params = []
-        
-        if schema_file:
-            query += " AND schema_file = ?"
-            params.append(schema_file)
+        mask, params = self._test_history_filters(
+            schema_file, method, path, start_date, end_date
+        )
+        params.append(limit)
         
-        if method:
-            query += " AND method = ?"
-            params.append(method.upper())
+        cursor = self._tuple_cursor()
+        cursor.execute(_test_history_sql(mask), params)
         
-        if path:
-            query += " AND path = ?"
-            params.append(path)
+        results = _rows_to_dicts(_TEST_RESULT_COLUMNS, cursor.fetchall())
+        for result in results:
+            result['schema_mismatch'] = bool(result['schema_mismatch'])
+            result['auth_succeeded'] = bool(result['auth_succeeded'])
         
-        if start_date:
-            query += " AND timestamp >= ?"
-            params.append(start_date.isoformat())
+        return results
+    
+    def get_test_history_json(self, schema_file: Optional[str] = None,
+                              method: Optional[str] = None,
+                              path: Optional[str] = None,
+                              limit: int = 100,
+                              start_date: Optional[datetime] = None,
+                              end_date: Optional[datetime] = None) -> str:
+        """
+        Get test history serialized as a JSON array by SQLite itself
         
-        if end_date:
-            query += " AND timestamp <= ?"
-            params.append(end_date.isoformat())
+        Same filters and ordering as get_test_history(), but skips building
+        Python dicts entirely - useful for exporting large histories.
         
-        query += " ORDER BY timestamp DESC LIMIT ?"
+        Returns:
+            JSON array string of test result objects
+        """
+        mask, params = self._test_history_filters(
+            schema_file, method, path, start_date, end_date
+        )
         params.append(limit)
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        # Convert rows to dictionaries
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'schema_file': row['schema_file'],
-                'method': row['method'],
-                'path': row['path'],
-                'status': row['status'],
-                'status_code': row['status_code'],
-                'expected_status': row['expected_status'],
-                'response_time_ms': row['response_time_ms'],
-                'error_message': row['error_message'],
-                'schema_mismatch': bool(row['schema_mismatch']),
-                'response_size_bytes': row['response_size_bytes'],
-                'auth_attempts': row['auth_attempts'],
-                'auth_succeeded': bool(row['auth_succeeded']),
-                'timestamp': row['timestamp']
-            })
-        
-        return results
+        row = self._read_conn().execute(_test_history_sql(mask, as_json=True), params).fetchone()
+        return row[0] if row else '[]'
+    
+    @staticmethod
+    def _test_history_filters(schema_file: Optional[str], method: Optional[str],
+                              path: Optional[str], start_date: Optional[datetime],
+                              end_date: Optional[datetime]) -> tuple:
+        """Filter mask (see _HISTORY_FILTERS) and parameters for the history readers"""
+        values = (
+            schema_file,
+            method.upper() if method else None,
+            path,
+            _sql_timestamp(start_date) if start_date else None,
+            _sql_timestamp(end_date) if end_date else None,
+        )
+        mask = 0
+        params = []
+        for bit, value in enumerate(values):
+            if value:
+                mask |= 1 << bit
+                params.append(value)
+        return mask, params
     
+    def _read_conn(self) -> sqlite3.Connection:
+        """
+        Connection to use for reads on the calling thread
+        
+        In WAL mode each thread gets its own read-only connection, so reads
+        don't queue behind the writer. A reader is closed when its thread
+        exits (thread-local data is released then), so short-lived worker
+        pools don't accumulate connections. The writer connection is used
+        instead when readers are unavailable (no WAL, autocommit off) or when
+        this thread has uncommitted writes it needs to see.
+        """
+        if not self._readers_enabled():
+            return self.conn
+        if self.conn.in_transaction and self._write_lock.acquire(blocking=False):
+            # Pending writes belong to this thread (or nobody is writing)
+            self._write_lock.release()
+            return self.conn
+        
+        handle = getattr(self._local, 'reader', None)
+        if handle is None:
+            reader = sqlite3.connect(
+                f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+                uri=True,
+                isolation_level=None,  # Each read sees the latest commit
+                check_same_thread=False,  # Closed from close() on any thread
+                timeout=30.0,
+                cached_statements=256
+            )
+            reader.row_factory = sqlite3.Row
+            for pragma in _CACHE_PRAGMAS:
+                reader.execute(pragma)
+            with self._readers_lock:
+                self._readers.append(reader)
+            handle = _ReaderHandle(reader)
+            weakref.finalize(handle, _close_reader, reader, self._readers, self._readers_lock)
+            self._local.reader = handle
+        return handle.conn
+    
+    def _readers_enabled(self) -> bool:
+        """Whether reads can go to separate per-thread connections"""
+        return self.autocommit and self._uses_wal()
+    
+    def _tuple_cursor(self) -> sqlite3.Cursor:
+        """Cursor that returns plain tuples instead of sqlite3.Row objects"""
+        cursor = self._read_conn().cursor()
+        cursor.row_factory = None
+        return cursor
+    
+    @_write_method
     def establish_baseline(self, schema_file: str, method: str, path: str,
                           status_code: int, response_time_ms: float,
                           response_schema: Optional[Dict[str, Any]] = None):
@@ -546,18 +1579,17 @@ class Database:
             response_time_ms: Expected response time
             response_schema: JSON schema of the response
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO baselines (
-                schema_file, method, path, status_code, 
-                response_time_ms, response_schema, established_at
-            ) VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
+        self.conn.execute(_SQL_UPSERT_BASELINE, (
             schema_file, method, path, status_code,
             response_time_ms,
-            json.dumps(response_schema) if response_schema else None
+            json_dumps(response_schema) if response_schema else None
         ))
-        self.conn.commit()
+        if self._baseline_cache is not None:
+            cursor = self.conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(_SQL_SELECT_BASELINE, (schema_file, method, path))
+            baseline = self._baseline_from_row(cursor.fetchone())
+            self._baseline_cache[(schema_file, method, path)] = baseline
     
     def get_baseline(self, schema_file: str, method: str, path: str) -> Optional[Dict[str, Any]]:
         """
@@ -571,27 +1603,42 @@ class Database:
         Returns:
             Baseline dictionary or None if not found
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM baselines
-            WHERE schema_file = ? AND method = ? AND path = ?
-        """, (schema_file, method.upper(), path))
+        baseline = self._baselines().get((schema_file, method.upper(), path))
+        return dict(baseline) if baseline else None
+    
+    def get_baseline_keys(self, schema_file: str) -> set:
+        """
+        Get the endpoints of a schema that have a baseline
         
-        row = cursor.fetchone()
-        if not row:
-            return None
+        Args:
+            schema_file: Path or identifier for the schema file
         
+        Returns:
+            Set of (method, path) tuples
+        """
         return {
-            'id': row['id'],
-            'schema_file': row['schema_file'],
-            'method': row['method'],
-            'path': row['path'],
-            'status_code': row['status_code'],
-            'response_time_ms': row['response_time_ms'],
-            'response_schema': json.loads(row['response_schema']) if row['response_schema'] else None,
-            'established_at': row['established_at']
+            (method, path) for schema, method, path in self._baselines()
+            if schema == schema_file
         }
     
+    def _baselines(self) -> Dict[tuple, Dict[str, Any]]:
+        """Return the baseline cache, keyed by (schema_file, method, path)"""
+        if self._baseline_cache is None:
+            # One query loads every baseline; later lookups are dict hits
+            self._baseline_cache = {
+                (b['schema_file'], b['method'], b['path']): b
+                for b in self.get_all_baselines()
+            }
+        return self._baseline_cache
+    
+    @staticmethod
+    def _baseline_from_row(row: tuple) -> Dict[str, Any]:
+        """Build a baseline dict from a tuple row in _BASELINE_COLUMNS order"""
+        baseline = dict(zip(_BASELINE_COLUMNS, row))
+        if baseline['response_schema']:
+            baseline['response_schema'] = json_loads(baseline['response_schema'])
+        return baseline
+    
     def get_all_baselines(self, schema_file: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Get all baselines, optionally filtered by schema file
@@ -602,36 +1649,24 @@ class Database:
         Returns:
             List of baseline dictionaries
         """
-        cursor = self.conn.cursor()
+        cursor = self._tuple_cursor()
+        columns = ', '.join(_BASELINE_COLUMNS)
         
         if schema_file:
-            cursor.execute("""
-                SELECT * FROM baselines WHERE schema_file = ?
+            cursor.execute(f"""
+                SELECT {columns} FROM baselines WHERE schema_file = ?
                 ORDER BY method, path
             """, (schema_file,))
         else:
-            cursor.execute("""
-                SELECT * FROM baselines
+            cursor.execute(f"""
+                SELECT {columns} FROM baselines
                 ORDER BY schema_file, method, path
             """)
         
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'schema_file': row['schema_file'],
-                'method': row['method'],
-                'path': row['path'],
-                'status_code': row['status_code'],
-                'response_time_ms': row['response_time_ms'],
-                'response_schema': json.loads(row['response_schema']) if row['response_schema'] else None,
-                'established_at': row['established_at']
-            })
-        
-        return results
+        return [self._baseline_from_row(row) for row in cursor.fetchall()]
     
     # AI Test Cases methods
+    @_write_method
     def save_ai_test_case(self, schema_file: str, method: str, path: str,
                           test_case_json: Dict[str, Any],
                           validation_status: str = 'pending',
@@ -650,94 +1685,78 @@ class Database:
         Returns:
             ID of inserted test case
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO ai_test_cases (
-                schema_file, method, path, test_case_json, validation_status, version
-            ) VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            schema_file, method.upper(), path,
-            json.dumps(test_case_json), validation_status, version
+        cursor = self.conn.execute(_SQL_INSERT_AI_TEST_CASE, self._ai_test_case_params(
+            schema_file, method, path, test_case_json, validation_status, version
         ))
-        self.conn.commit()
         return cursor.lastrowid
     
+    @_write_method
+    def save_ai_test_cases_bulk(self, rows: List[tuple]) -> int:
+        """
+        Save many AI test cases in a single transaction
+        
+        Args:
+            rows: Tuples in save_ai_test_case() argument order
+                (schema_file, method, path, test_case_json[, validation_status[, version]])
+        
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        
+        params = [self._ai_test_case_params(*row) for row in rows]
+        self.conn.executemany(_SQL_INSERT_AI_TEST_CASE, params)
+        return len(params)
+    
+    @staticmethod
+    def _ai_test_case_params(schema_file: str, method: str, path: str,
+                             test_case_json: Dict[str, Any],
+                             validation_status: str = 'pending',
+                             version: int = 1) -> tuple:
+        """Build the bound parameters for an ai_test_cases insert"""
+        return (
+            schema_file, method.upper(), path,
+            json_dumps_bytes(test_case_json), validation_status, version
+        )
+    
+    @staticmethod
+    def _ai_test_case_from_row(row: tuple) -> Dict[str, Any]:
+        """Build an AI test case dict from a tuple row in _AI_TEST_CASE_COLUMNS order"""
+        test_case = dict(zip(_AI_TEST_CASE_COLUMNS, row))
+        if test_case['test_case_json'] is not None:
+            test_case['test_case_json'] = json_loads(test_case['test_case_json'])
+        return test_case
+    
     def get_ai_test_case(self, test_case_id: int) -> Optional[Dict[str, Any]]:
         """Get an AI test case by ID"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM ai_test_cases WHERE id = ?", (test_case_id,))
+        cursor = self._tuple_cursor()
+        cursor.execute(_ai_test_case_sql('by_id'), (test_case_id,))
         row = cursor.fetchone()
         if not row:
             return None
         
-        return {
-            'id': row['id'],
-            'schema_file': row['schema_file'],
-            'method': row['method'],
-            'path': row['path'],
-            'test_case_json': json.loads(row['test_case_json']),
-            'validation_status': row['validation_status'],
-            'created_at': row['created_at'],
-            'version': row['version']
-        }
+        return self._ai_test_case_from_row(row)
     
     def get_ai_test_cases_by_endpoint(self, schema_file: str, method: str,
-                                      path: str) -> List[Dict[str, Any]]:
-        """Get all AI test cases for a specific endpoint"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM ai_test_cases
-            WHERE schema_file = ? AND method = ? AND path = ?
-            ORDER BY created_at DESC
-        """, (schema_file, method.upper(), path))
-        
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'schema_file': row['schema_file'],
-                'method': row['method'],
-                'path': row['path'],
-                'test_case_json': json.loads(row['test_case_json']),
-                'validation_status': row['validation_status'],
-                'created_at': row['created_at'],
-                'version': row['version']
-            })
-        return results
+                                      path: str, load_json: bool = True) -> List[Dict[str, Any]]:
+        """Get all AI test cases for a specific endpoint (test_case_json is None unless load_json)"""
+        cursor = self._tuple_cursor()
+        cursor.execute(
+            _ai_test_case_sql('by_endpoint', load_json), (schema_file, method.upper(), path)
+        )
+        
+        return [self._ai_test_case_from_row(row) for row in cursor.fetchall()]
     
     def get_validated_ai_test_cases(self, schema_file: Optional[str] = None,
-                                    limit: int = 100) -> List[Dict[str, Any]]:
-        """Get validated (approved) AI test cases"""
-        cursor = self.conn.cursor()
-        query = "SELECT * FROM ai_test_cases WHERE validation_status = 'approved'"
-        params = []
-        
-        if schema_file:
-            query += " AND schema_file = ?"
-            params.append(schema_file)
-        
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'schema_file': row['schema_file'],
-                'method': row['method'],
-                'path': row['path'],
-                'test_case_json': json.loads(row['test_case_json']),
-                'validation_status': row['validation_status'],
-                'created_at': row['created_at'],
-                'version': row['version']
-            })
-        return results
+                                    limit: int = 100,
+                                    load_json: bool = True) -> List[Dict[str, Any]]:
+        """Get validated (approved) AI test cases (test_case_json is None unless load_json)"""
+        return self.get_ai_test_cases_by_status('approved', schema_file, limit, load_json)
     
     def get_ai_test_cases_by_status(self, status: str, schema_file: Optional[str] = None,
-                                    limit: int = 100) -> List[Dict[str, Any]]:
+                                    limit: int = 100,
+                                    load_json: bool = True) -> List[Dict[str, Any]]:
         """
         Get AI test cases by validation status
         
@@ -745,410 +1764,508 @@ class Database:
             status: Validation status ('pending', 'approved', 'rejected', 'needs_improvement')
             schema_file: Optional schema file to filter by
             limit: Maximum number of results to return
+            load_json: Read and decode test_case_json (None when False)
             
         Returns:
             List of test case dictionaries
         """
-        cursor = self.conn.cursor()
-        query = "SELECT * FROM ai_test_cases WHERE validation_status = ?"
-        params = [status]
-        
+        cursor = self._tuple_cursor()
         if schema_file:
-            query += " AND schema_file = ?"
-            params.append(schema_file)
-        
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'schema_file': row['schema_file'],
-                'method': row['method'],
-                'path': row['path'],
-                'test_case_json': json.loads(row['test_case_json']),
-                'validation_status': row['validation_status'],
-                'created_at': row['created_at'],
-                'version': row['version']
-            })
-        return results
+            cursor.execute(
+                _ai_test_case_sql('by_status_schema', load_json), (status, schema_file, limit)
+            )
+        else:
+            cursor.execute(_ai_test_case_sql('by_status', load_json), (status, limit))
+        return [self._ai_test_case_from_row(row) for row in cursor.fetchall()]
     
     def get_all_ai_test_cases(self, schema_file: Optional[str] = None,
-                              limit: int = 1000) -> List[Dict[str, Any]]:
+                              limit: int = 1000,
+                              load_json: bool = True) -> List[Dict[str, Any]]:
         """
         Get all AI test cases (regardless of status)
         
         Args:
             schema_file: Optional schema file to filter by
             limit: Maximum number of results to return
+            load_json: Read and decode test_case_json (None when False)
             
         Returns:
             List of test case dictionaries
         """
-        cursor = self.conn.cursor()
-        query = "SELECT * FROM ai_test_cases"
-        params = []
+        return list(self.iter_all_ai_test_cases(schema_file, limit, load_json))
+    
+    def iter_all_ai_test_cases(self, schema_file: Optional[str] = None,
+                               limit: int = 1000,
+                               load_json: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all AI test cases, one dict per row, as the cursor steps
         
+        Same rows and order as get_all_ai_test_cases(); use it when the
+        caller makes a single pass so the result is never held as a list.
+        """
+        cursor = self._tuple_cursor()
         if schema_file:
-            query += " WHERE schema_file = ?"
-            params.append(schema_file)
-        
-        query += " ORDER BY schema_file, method, path, created_at DESC LIMIT ?"
-        params.append(limit)
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'schema_file': row['schema_file'],
-                'method': row['method'],
-                'path': row['path'],
-                'test_case_json': json.loads(row['test_case_json']),
-                'validation_status': row['validation_status'],
-                'created_at': row['created_at'],
-                'version': row['version']
-            })
-        return results
+            cursor.execute(_ai_test_case_sql('all_schema', load_json), (schema_file, limit))
+        else:
+            cursor.execute(_ai_test_case_sql('all', load_json), (limit,))
+        for row in cursor:
+            yield self._ai_test_case_from_row(row)
     
+    @_write_method
     def update_ai_test_case_validation_status(self, test_case_id: int,
                                               status: str) -> None:
         """Update validation status of an AI test case"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE ai_test_cases
-            SET validation_status = ?
-            WHERE id = ?
-        """, (status, test_case_id))
-        self.conn.commit()
+        self.conn.execute(_SQL_UPDATE_AI_TEST_CASE_STATUS, (status, test_case_id))
     
+    @_write_method
     def delete_ai_test_case(self, test_case_id: int) -> None:
         """Delete an AI test case"""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM ai_test_cases WHERE id = ?", (test_case_id,))
-        self.conn.commit()
+        self.conn.execute(_SQL_DELETE_AI_TEST_CASE, (test_case_id,))
     
     # Validation Feedback methods
+    @_write_method
     def save_validation_feedback(self, test_case_id: int, status: str,
                                  feedback_text: Optional[str] = None,
                                  annotations: Optional[Dict[str, Any]] = None,
                                  validated_by: Optional[str] = None) -> int:
         """Save validation feedback for an AI test case"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO validation_feedback (
-                test_case_id, status, feedback_text, annotations_json, validated_by
-            ) VALUES (?, ?, ?, ?, ?)
-        """, (
-            test_case_id, status, feedback_text,
-            json.dumps(annotations) if annotations else None,
-            validated_by
+        cursor = self.conn.execute(_SQL_INSERT_VALIDATION_FEEDBACK, self._validation_feedback_params(
+            test_case_id, status, feedback_text, annotations, validated_by
         ))
-        self.conn.commit()
         return cursor.lastrowid
     
+    @_write_method
+    def save_validation_feedbacks_bulk(self, rows: List[tuple]) -> int:
+        """
+        Save many validation feedback entries in a single transaction
+        
+        Args:
+            rows: Tuples in save_validation_feedback() argument order
+                (test_case_id, status[, feedback_text[, annotations[, validated_by]]])
+        
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        
+        params = [self._validation_feedback_params(*row) for row in rows]
+        self.conn.executemany(_SQL_INSERT_VALIDATION_FEEDBACK, params)
+        return len(params)
+    
+    @staticmethod
+    def _validation_feedback_params(test_case_id: int, status: str,
+                                    feedback_text: Optional[str] = None,
+                                    annotations: Optional[Dict[str, Any]] = None,
+                                    validated_by: Optional[str] = None) -> tuple:
+        """Build the bound parameters for a validation_feedback insert"""
+        return (
+            test_case_id, status, feedback_text,
+            json_dumps_bytes(annotations) if annotations else None,
+            validated_by
+        )
+    
+    @staticmethod
+    def _validation_from_row(row: tuple,
+                             columns: tuple = _VALIDATION_FEEDBACK_COLUMNS) -> Dict[str, Any]:
+        """Build a validation feedback dict from a tuple row in columns order"""
+        feedback = dict(zip(columns, row))
+        if feedback['annotations_json']:
+            feedback['annotations_json'] = json_loads(feedback['annotations_json'])
+        return feedback
+    
     def get_validation_feedback(self, validation_id: int) -> Optional[Dict[str, Any]]:
         """Get validation feedback by ID"""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM validation_feedback WHERE id = ?", (validation_id,))
+        cursor = self._tuple_cursor()
+        cursor.execute(_SQL_GET_VALIDATION_FEEDBACK, (validation_id,))
         row = cursor.fetchone()
         if not row:
             return None
         
-        return {
-            'id': row['id'],
-            'test_case_id': row['test_case_id'],
-            'status': row['status'],
-            'feedback_text': row['feedback_text'],
-            'annotations_json': json.loads(row['annotations_json']) if row['annotations_json'] else None,
-            'validated_at': row['validated_at'],
-            'validated_by': row['validated_by']
-        }
+        return self._validation_from_row(row)
     
     def get_validations_by_test_case(self, test_case_id: int) -> List[Dict[str, Any]]:
         """Get all validation feedback for a test case"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM validation_feedback
-            WHERE test_case_id = ?
-            ORDER BY validated_at DESC
-        """, (test_case_id,))
-        
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'test_case_id': row['test_case_id'],
-                'status': row['status'],
-                'feedback_text': row['feedback_text'],
-                'annotations_json': json.loads(row['annotations_json']) if row['annotations_json'] else None,
-                'validated_at': row['validated_at'],
-                'validated_by': row['validated_by']
-            })
-        return results
+        cursor = self._tuple_cursor()
+        cursor.execute(_SQL_GET_VALIDATIONS_BY_TEST_CASE, (test_case_id,))
+        
+        return [self._validation_from_row(row) for row in cursor.fetchall()]
     
     def get_feedback_corpus(self, limit: int = 1000) -> List[Dict[str, Any]]:
         """Get feedback corpus for learning"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT vf.*, atc.schema_file, atc.method, atc.path
-            FROM validation_feedback vf
-            JOIN ai_test_cases atc ON vf.test_case_id = atc.id
-            ORDER BY vf.validated_at DESC
-            LIMIT ?
-        """, (limit,))
-        
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'test_case_id': row['test_case_id'],
-                'status': row['status'],
-                'feedback_text': row['feedback_text'],
-                'annotations_json': json.loads(row['annotations_json']) if row['annotations_json'] else None,
-                'validated_at': row['validated_at'],
-                'validated_by': row['validated_by'],
-                'schema_file': row['schema_file'],
-                'method': row['method'],
-                'path': row['path']
-            })
-        return results
+        return list(self.iter_feedback_corpus(limit))
+    
+    def iter_feedback_corpus(self, limit: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream the feedback corpus, one dict per row, as the cursor steps"""
+        cursor = self._tuple_cursor()
+        cursor.execute(_SQL_GET_FEEDBACK_CORPUS, (limit,))
+        for row in cursor:
+            yield self._validation_from_row(row, _FEEDBACK_CORPUS_COLUMNS)
     
     def get_feedback_stats(self) -> Dict[str, Any]:
         """Get statistics about validation feedback"""
-        cursor = self.conn.cursor()
+        cursor = self._tuple_cursor()
         
-        # Count by status
-        cursor.execute("""
-            SELECT status, COUNT(*) as count
-            FROM validation_feedback
-            GROUP BY status
-        """)
-        status_counts = {row['status']: row['count'] for row in cursor.fetchall()}
-        
-        # Total count
-        cursor.execute("SELECT COUNT(*) as total FROM validation_feedback")
-        total = cursor.fetchone()['total']
+        # Count by status; the groups cover every row, so they also give the total
+        cursor.execute(_SQL_FEEDBACK_STATUS_COUNTS)
+        status_counts = {status: count for status, count in cursor.fetchall()}
         
         return {
-            'total': total,
+            'total': sum(status_counts.values()),
             'by_status': status_counts
         }
     
     # AI Prompts methods
+    @_write_method
     def save_ai_prompt(self, prompt_name: str, prompt_template: str,
                        metadata: Optional[Dict[str, Any]] = None,
                        version: Optional[int] = None) -> int:
-        """Save an AI prompt template"""
-        cursor = self.conn.cursor()
-        
-        # Get next version if not specified
-        if version is None:
-            cursor.execute("""
-                SELECT MAX(prompt_version) as max_version
-                FROM ai_prompts
-                WHERE prompt_name = ?
-            """, (prompt_name,))
-            result = cursor.fetchone()
-            version = (result['max_version'] or 0) + 1
-        
-        cursor.execute("""
-            INSERT INTO ai_prompts (
-                prompt_name, prompt_version, prompt_template, metadata_json
-            ) VALUES (?, ?, ?, ?)
-        """, (
-            prompt_name, version, prompt_template,
-            json.dumps(metadata) if metadata else None
+        """Save an AI prompt template (version defaults to the next one)"""
+        cursor = self.conn.execute(_SQL_INSERT_AI_PROMPT, (
+            prompt_name, version, prompt_name, prompt_template,
+            json_dumps_bytes(metadata) if metadata else None
         ))
-        self.conn.commit()
+        self._invalidate_prompt(prompt_name)
         return cursor.lastrowid
     
+    @staticmethod
+    def _prompt_from_row(row: tuple, columns: tuple = _AI_PROMPT_COLUMNS) -> Dict[str, Any]:
+        """Build a prompt dict from a tuple row in columns order"""
+        prompt = dict(zip(columns, row))
+        if prompt['metadata_json']:
+            prompt['metadata_json'] = json_loads(prompt['metadata_json'])
+        prompt['is_active'] = bool(prompt['is_active'])
+        return prompt
+    
+    def _cached_prompt(self, lookup: str, prompt_name: str, sql: str) -> Optional[Dict[str, Any]]:
+        """
+        Run a single-prompt lookup through the prompt cache
+        
+        Prompts are read on every AI generation but change rarely, so the
+        result (including "not found") is kept for PROMPT_CACHE_TTL seconds or
+        until this Database writes a prompt with that name. The raw row is
+        cached and decoded on every hit, so callers never share the metadata
+        dict.
+        """
+        key = (lookup, prompt_name)
+        now = time.monotonic()
+        entry = self._prompt_cache.get(key)
+        if entry is None or now - entry[0] >= PROMPT_CACHE_TTL:
+            cursor = self._tuple_cursor()
+            cursor.execute(sql, (prompt_name,))
+            entry = (now, cursor.fetchone())
+            self._prompt_cache[key] = entry
+        
+        row = entry[1]
+        return self._prompt_from_row(row) if row else None
+    
+    def _invalidate_prompt(self, prompt_name: str) -> None:
+        """Drop cached lookups for a prompt after it was written"""
+        self._prompt_cache.pop(('active', prompt_name), None)
+        self._prompt_cache.pop(('latest', prompt_name), None)
+    
     def get_ai_prompt(self, prompt_name: str, version: Optional[int] = None) -> Optional[Dict[str, Any]]:
         """Get an AI prompt by name and version"""
-        cursor = self.conn.cursor()
-        if version:
-            cursor.execute("""
-                SELECT * FROM ai_prompts
-                WHERE prompt_name = ? AND prompt_version = ?
-            """, (prompt_name, version))
-        else:
-            cursor.execute("""
-                SELECT * FROM ai_prompts
-                WHERE prompt_name = ? AND is_active = 1
-                ORDER BY prompt_version DESC
-                LIMIT 1
-            """, (prompt_name,))
+        if not version:
+            return self.get_active_ai_prompt(prompt_name)
         
+        cursor = self._tuple_cursor()
+        cursor.execute(_SQL_GET_AI_PROMPT_VERSION, (prompt_name, version))
         row = cursor.fetchone()
         if not row:
             return None
         
-        return {
-            'id': row['id'],
-            'prompt_name': row['prompt_name'],
-            'prompt_version': row['prompt_version'],
-            'prompt_template': row['prompt_template'],
-            'metadata_json': json.loads(row['metadata_json']) if row['metadata_json'] else None,
-            'created_at': row['created_at'],
-            'is_active': bool(row['is_active'])
-        }
+        return self._prompt_from_row(row)
     
     def get_latest_ai_prompt(self, prompt_name: str) -> Optional[Dict[str, Any]]:
         """Get the latest version of an AI prompt"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM ai_prompts
-            WHERE prompt_name = ?
-            ORDER BY prompt_version DESC
-            LIMIT 1
-        """, (prompt_name,))
-        
-        row = cursor.fetchone()
-        if not row:
-            return None
-        
-        return {
-            'id': row['id'],
-            'prompt_name': row['prompt_name'],
-            'prompt_version': row['prompt_version'],
-            'prompt_template': row['prompt_template'],
-            'metadata_json': json.loads(row['metadata_json']) if row['metadata_json'] else None,
-            'created_at': row['created_at'],
-            'is_active': bool(row['is_active'])
-        }
+        return self._cached_prompt('latest', prompt_name, _SQL_GET_LATEST_AI_PROMPT)
     
     def list_ai_prompt_versions(self, prompt_name: str) -> List[Dict[str, Any]]:
         """List all versions of an AI prompt"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM ai_prompts
-            WHERE prompt_name = ?
-            ORDER BY prompt_version DESC
-        """, (prompt_name,))
-        
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'prompt_name': row['prompt_name'],
-                'prompt_version': row['prompt_version'],
-                'prompt_template': row['prompt_template'],
-                'metadata_json': json.loads(row['metadata_json']) if row['metadata_json'] else None,
-                'created_at': row['created_at'],
-                'is_active': bool(row['is_active'])
-            })
-        return results
+        cursor = self._tuple_cursor()
+        cursor.execute(_SQL_LIST_AI_PROMPT_VERSIONS, (prompt_name,))
+        
+        return [self._prompt_from_row(row) for row in cursor.fetchall()]
+    
+    def list_ai_prompt_versions_summary(self, prompt_name: str) -> List[Dict[str, Any]]:
+        """List all versions of an AI prompt without prompt_template"""
+        cursor = self._tuple_cursor()
+        cursor.execute(_SQL_LIST_AI_PROMPT_VERSIONS_SUMMARY, (prompt_name,))
+        
+        return [
+            self._prompt_from_row(row, _AI_PROMPT_SUMMARY_COLUMNS)
+            for row in cursor.fetchall()
+        ]
     
+    @_write_method
     def set_active_ai_prompt(self, prompt_name: str, version: int) -> None:
         """Set a specific version of a prompt as active"""
-        cursor = self.conn.cursor()
-        # First, deactivate all versions of this prompt
-        cursor.execute("""
-            UPDATE ai_prompts
-            SET is_active = 0
-            WHERE prompt_name = ?
-        """, (prompt_name,))
-        # Then activate the specified version
-        cursor.execute("""
-            UPDATE ai_prompts
-            SET is_active = 1
-            WHERE prompt_name = ? AND prompt_version = ?
-        """, (prompt_name, version))
-        self.conn.commit()
+        self.conn.execute(_SQL_SET_ACTIVE_AI_PROMPT, (version, prompt_name))
+        self._invalidate_prompt(prompt_name)
     
     def get_active_ai_prompt(self, prompt_name: str) -> Optional[Dict[str, Any]]:
         """Get the active version of an AI prompt"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM ai_prompts
-            WHERE prompt_name = ? AND is_active = 1
-            ORDER BY prompt_version DESC
-            LIMIT 1
-        """, (prompt_name,))
-        
-        row = cursor.fetchone()
-        if not row:
-            return None
-        
-        return {
-            'id': row['id'],
-            'prompt_name': row['prompt_name'],
-            'prompt_version': row['prompt_version'],
-            'prompt_template': row['prompt_template'],
-            'metadata_json': json.loads(row['metadata_json']) if row['metadata_json'] else None,
-            'created_at': row['created_at'],
-            'is_active': bool(row['is_active'])
-        }
+        return self._cached_prompt('active', prompt_name, _SQL_GET_ACTIVE_AI_PROMPT)
     
     # Patterns methods
+    @_write_method
     def save_pattern(self, pattern_type: str, pattern_data: Dict[str, Any],
                      effectiveness_score: float = 0.0) -> int:
         """Save a learned pattern"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO patterns (
-                pattern_type, pattern_data, effectiveness_score
-            ) VALUES (?, ?, ?)
-        """, (
-            pattern_type, json.dumps(pattern_data), effectiveness_score
+        cursor = self.conn.execute(_SQL_INSERT_PATTERN, self._pattern_params(
+            pattern_type, pattern_data, effectiveness_score
         ))
-        self.conn.commit()
         return cursor.lastrowid
     
+    @_write_method
+    def save_patterns_bulk(self, rows: List[tuple]) -> int:
+        """
+        Save many learned patterns in a single transaction
+        
+        Args:
+            rows: Tuples in save_pattern() argument order
+                (pattern_type, pattern_data[, effectiveness_score])
+        
+        Returns:
+            Number of rows inserted
+        """
+        if not rows:
+            return 0
+        
+        params = [self._pattern_params(*row) for row in rows]
+        self.conn.executemany(_SQL_INSERT_PATTERN, params)
+        return len(params)
+    
+    @staticmethod
+    def _pattern_params(pattern_type: str, pattern_data: Dict[str, Any],
+                        effectiveness_score: float = 0.0) -> tuple:
+        """Build the bound parameters for a patterns insert"""
+        return (pattern_type, json_dumps_bytes(pattern_data), effectiveness_score)
+    
     def get_patterns(self, pattern_type: Optional[str] = None,
                      min_effectiveness: float = 0.0) -> List[Dict[str, Any]]:
         """Get patterns, optionally filtered by type and effectiveness"""
-        cursor = self.conn.cursor()
-        query = "SELECT * FROM patterns WHERE effectiveness_score >= ?"
-        params = [min_effectiveness]
-        
+        return list(self.iter_patterns(pattern_type, min_effectiveness))
+    
+    def iter_patterns(self, pattern_type: Optional[str] = None,
+                      min_effectiveness: float = 0.0) -> Iterator[Dict[str, Any]]:
+        """Stream patterns, one dict per row, as the cursor steps"""
+        cursor = self._tuple_cursor()
         if pattern_type:
-            query += " AND pattern_type = ?"
-            params.append(pattern_type)
-        
-        query += " ORDER BY effectiveness_score DESC, created_at DESC"
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        results = []
-        for row in rows:
-            results.append({
-                'id': row['id'],
-                'pattern_type': row['pattern_type'],
-                'pattern_data': json.loads(row['pattern_data']),
-                'effectiveness_score': row['effectiveness_score'],
-                'created_at': row['created_at'],
-                'updated_at': row['updated_at']
-            })
-        return results
+            cursor.execute(_SQL_SELECT_PATTERNS_BY_TYPE, (min_effectiveness, pattern_type))
+        else:
+            cursor.execute(_SQL_SELECT_PATTERNS, (min_effectiveness,))
+        for row in cursor:
+            pattern = dict(zip(_PATTERN_COLUMNS, row))
+            pattern['pattern_data'] = json_loads(pattern['pattern_data'])
+            yield pattern
     
+    @_write_method
     def update_pattern_effectiveness(self, pattern_id: int, score: float) -> None:
         """Update effectiveness score of a pattern"""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE patterns
-            SET effectiveness_score = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ?
-        """, (score, pattern_id))
-        self.conn.commit()
+        self.conn.execute(_SQL_UPDATE_PATTERN_EFFECTIVENESS, (score, pattern_id))
     
+    @_write_method
     def delete_pattern(self, pattern_id: int) -> None:
         """Delete a pattern"""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM patterns WHERE id = ?", (pattern_id,))
-        self.conn.commit()
+        self.conn.execute(_SQL_DELETE_PATTERN, (pattern_id,))
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group writes into a single transaction
+        
+        The connection runs with isolation_level=None, so sqlite3 never opens
+        or commits transactions on its own: the block starts with BEGIN
+        IMMEDIATE (taking the write lock up front instead of failing with
+        SQLITE_BUSY on lock upgrade) and writes inside it are committed once
+        on exit (one fsync for the whole batch) or rolled back if an exception
+        escapes. Nested blocks join the outermost transaction.
+        
+        Example:
+            with db.transaction():
+                for result in results:
+                    db.save_test_result(...)
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+    
+    def begin(self):
+        """
+        Start a transaction, or join the one already open
+        
+        Every begin() must be paired with commit() or rollback() on the same
+        thread; transaction() does this for you. Other threads' writes wait
+        until the outermost transaction ends.
+        """
+        self._write_lock.acquire()
+        try:
+            if self._transaction_depth == 0:
+                self._rollback_only = False
+                if not self.conn.in_transaction:
+                    self.conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self._write_lock.release()
+            raise
+        self._transaction_depth += 1
+    
+    def commit(self):
+        """
+        End a begin() block, committing when it is the outermost one
+        
+        Also flushes writes left pending by autocommit=False when called
+        outside begin().
+        
+        Raises:
+            sqlite3.OperationalError: If a nested block called rollback(); the
+                whole transaction is rolled back instead
+        """
+        if self._transaction_depth == 0:
+            with self._write_lock:
+                if self.conn.in_transaction:
+                    self.conn.commit()
+                    self._after_commit()
+            return
+        
+        try:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                if self._rollback_only:
+                    self._discard()
+                    raise sqlite3.OperationalError(
+                        "Transaction rolled back: a nested block called rollback()"
+                    )
+                self.conn.commit()
+                self._after_commit()
+        finally:
+            self._write_lock.release()
+    
+    def rollback(self):
+        """
+        End a begin() block, discarding its writes
+        
+        A nested rollback marks the outer transaction so it is rolled back too
+        (use savepoint() for a partial rollback). Outside begin(), discards
+        writes left pending by autocommit=False.
+        """
+        if self._transaction_depth == 0:
+            with self._write_lock:
+                if self.conn.in_transaction:
+                    self._discard()
+            return
+        
+        try:
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self._discard()
+            else:
+                self._rollback_only = True
+        finally:
+            self._write_lock.release()
+    
+    @contextmanager
+    def savepoint(self):
+        """
+        Group writes that may fail without failing the enclosing transaction
+        
+        Works like transaction(), but inside an open transaction an exception
+        only rolls back the writes made in this block (ROLLBACK TO SAVEPOINT)
+        and the outer transaction can still commit. The exception propagates.
+        
+        Example:
+            with db.transaction():
+                db.save_test_results_bulk(rows)
+                try:
+                    with db.savepoint():
+                        db.establish_baseline(...)
+                except sqlite3.Error:
+                    pass  # Results are still committed
+        """
+        self.begin()
+        name = f"sp_{self._transaction_depth}"
+        rollback_only = self._rollback_only
+        try:
+            self.conn.execute(f"SAVEPOINT {name}")
+        except BaseException:
+            self.rollback()
+            raise
+        try:
+            yield self
+        except BaseException:
+            self.conn.execute(f"ROLLBACK TO {name}")
+            self.conn.execute(f"RELEASE {name}")
+            # Failed writes in the block marked the transaction rollback-only;
+            # the savepoint already undid them, so restore the earlier state
+            self._rollback_only = rollback_only
+            self._forget_writes()
+            self.commit()
+            raise
+        self.conn.execute(f"RELEASE {name}")
+        self.commit()
+    
+    def _discard(self):
+        """Roll back the open transaction and forget state it wrote"""
+        self.conn.rollback()
+        self._forget_writes()
+    
+    def _forget_writes(self):
+        """Drop cached state that rolled-back writes may have populated"""
+        # Endpoint ids and baselines written by the transaction are gone
+        self._endpoint_ids.clear()
+        self._baseline_cache = None
+        self._prompt_cache.clear()
+    
+    def _after_commit(self):
+        """Checkpoint the WAL every WAL_CHECKPOINT_INTERVAL commits"""
+        self._commits_since_checkpoint += 1
+        if self._commits_since_checkpoint >= WAL_CHECKPOINT_INTERVAL:
+            self.checkpoint()
+    
+    def checkpoint(self, mode: str = 'PASSIVE'):
+        """
+        Copy the WAL back into the database file
+        
+        Keeps the -wal file from growing without bound during long test
+        sessions; journal_size_limit trims the file once it is reset. The
+        default PASSIVE mode never waits on readers. TRUNCATE/RESTART wait
+        on the busy handler (up to busy_timeout) until readers finish, so only
+        use them when no other connection is active. No-op unless the
+        database is in WAL mode.
+        
+        Args:
+            mode: wal_checkpoint mode (PASSIVE, FULL, RESTART or TRUNCATE)
+        """
+        self._commits_since_checkpoint = 0
+        if not self._uses_wal():
+            return
+        if mode.upper() not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Invalid checkpoint mode: {mode}")
+        with self._write_lock:
+            self.conn.execute(f"PRAGMA wal_checkpoint({mode.upper()})")
     
     def close(self):
         """Close database connection"""
+        self._local = threading.local()
+        self._baseline_cache = None
+        self._prompt_cache.clear()
+        
         if self.conn:
-            self.conn.close()
+            if self.conn.in_transaction and self._transaction_depth == 0:
+                # Flush writes left pending by autocommit=False
+                self.conn.commit()
+            if not self.conn.in_transaction:
+                # Refresh planner statistics for tables whose stats went stale
+                self.conn.execute("PRAGMA optimize")
+                self.checkpoint()
+            # Closes readers and the writer (saving in_memory databases);
+            # runs once and detaches the exit hook
+            self._release()
             self.conn = None
     
     def __enter__(self):
@@ -1156,20 +2273,36 @@ class Database:
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Context manager exit"""
-        self.close()
-    
-    def __del__(self):
-        """Cleanup on deletion"""
+        """Context manager exit: roll back pending writes on error, then close"""
+        if exc_type is not None and self.conn and self._transaction_depth == 0:
+            self.rollback()
         self.close()
 
 
-class ResultsNamespace:
-    """Namespace for test results and history operations"""
+class _Namespace:
+    """Base for the Storage namespaces: a view over one shared Database"""
     
     def __init__(self, db: Database):
         self._db = db
     
+    def batch(self):
+        """
+        Group this namespace's writes into one transaction
+        
+        Usage:
+            with storage.patterns.batch():
+                for pattern_id, score in scores.items():
+                    storage.patterns.update_pattern_effectiveness(pattern_id, score)
+        
+        Same as Database.transaction(); writes through other namespaces inside
+        the block join the same transaction.
+        """
+        return self._db.transaction()
+
+
+class ResultsNamespace(_Namespace):
+    """Namespace for test results and history operations"""
+    
     def save_test_result(self, schema_file: str, method: str, path: str, 
                         status: str, status_code: Optional[int] = None,
                         expected_status: Optional[int] = None,
@@ -1201,6 +2334,14 @@ class ResultsNamespace:
             response_body, response_time_ms
         )
     
+    def save_test_results_bulk(self, rows: List[tuple], return_ids: bool = False):
+        """Save many test results in one transaction"""
+        return self._db.save_test_results_bulk(rows, return_ids)
+    
+    def save_request_responses_bulk(self, rows: List[tuple]) -> int:
+        """Save many request/response payloads in one transaction"""
+        return self._db.save_request_responses_bulk(rows)
+    
     def get_test_history(self, schema_file: Optional[str] = None,
                         method: Optional[str] = None,
                         path: Optional[str] = None,
@@ -1213,12 +2354,9 @@ class ResultsNamespace:
         )
 
 
-class BaselinesNamespace:
+class BaselinesNamespace(_Namespace):
     """Namespace for baseline operations"""
     
-    def __init__(self, db: Database):
-        self._db = db
-    
     def establish_baseline(self, schema_file: str, method: str, path: str,
                           status_code: int, response_time_ms: float,
                           response_schema: Optional[Dict[str, Any]] = None):
@@ -1231,17 +2369,18 @@ class BaselinesNamespace:
         """Get baseline for an endpoint"""
         return self._db.get_baseline(schema_file, method, path)
     
+    def get_baseline_keys(self, schema_file: str) -> set:
+        """Get the (method, path) endpoints of a schema that have a baseline"""
+        return self._db.get_baseline_keys(schema_file)
+    
     def get_all_baselines(self, schema_file: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get all baselines, optionally filtered by schema file"""
         return self._db.get_all_baselines(schema_file)
 
 
-class AITestsNamespace:
+class AITestsNamespace(_Namespace):
     """Namespace for AI test cases operations"""
     
-    def __init__(self, db: Database):
-        self._db = db
-    
     def save_test_case(self, schema_file: str, method: str, path: str,
                       test_case_json: Dict[str, Any],
                       validation_status: str = 'pending') -> int:
@@ -1250,6 +2389,10 @@ class AITestsNamespace:
             schema_file, method, path, test_case_json, validation_status
         )
     
+    def save_test_cases_bulk(self, rows: List[tuple]) -> int:
+        """Save many AI-generated test cases in one transaction"""
+        return self._db.save_ai_test_cases_bulk(rows)
+    
     def get_test_case(self, test_case_id: int) -> Optional[Dict[str, Any]]:
         """Get an AI test case by ID"""
         return self._db.get_ai_test_case(test_case_id)
@@ -1274,6 +2417,11 @@ class AITestsNamespace:
         """Get all AI test cases (regardless of status)"""
         return self._db.get_all_ai_test_cases(schema_file, limit)
     
+    def iter_all_test_cases(self, schema_file: Optional[str] = None,
+                            limit: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream all AI test cases without building a list"""
+        return self._db.iter_all_ai_test_cases(schema_file, limit)
+    
     def update_validation_status(self, test_case_id: int, status: str) -> None:
         """Update validation status of an AI test case"""
         return self._db.update_ai_test_case_validation_status(test_case_id, status)
@@ -1283,12 +2431,9 @@ class AITestsNamespace:
         return self._db.delete_ai_test_case(test_case_id)
 
 
-class ValidationFeedbackNamespace:
+class ValidationFeedbackNamespace(_Namespace):
     """Namespace for validation feedback operations"""
     
-    def __init__(self, db: Database):
-        self._db = db
-    
     def save_validation(self, test_case_id: int, status: str,
                        feedback_text: Optional[str] = None,
                        annotations: Optional[Dict[str, Any]] = None,
@@ -1298,6 +2443,10 @@ class ValidationFeedbackNamespace:
             test_case_id, status, feedback_text, annotations, validated_by
         )
     
+    def save_validations_bulk(self, rows: List[tuple]) -> int:
+        """Save many validation feedback entries in one transaction"""
+        return self._db.save_validation_feedbacks_bulk(rows)
+    
     def get_validation(self, validation_id: int) -> Optional[Dict[str, Any]]:
         """Get validation feedback by ID"""
         return self._db.get_validation_feedback(validation_id)
@@ -1310,17 +2459,18 @@ class ValidationFeedbackNamespace:
         """Get feedback corpus for learning"""
         return self._db.get_feedback_corpus(limit)
     
+    def iter_feedback_corpus(self, limit: int = 1000) -> Iterator[Dict[str, Any]]:
+        """Stream the feedback corpus without building a list"""
+        return self._db.iter_feedback_corpus(limit)
+    
     def get_feedback_stats(self) -> Dict[str, Any]:
         """Get statistics about validation feedback"""
         return self._db.get_feedback_stats()
 
 
-class AIPromptsNamespace:
+class AIPromptsNamespace(_Namespace):
     """Namespace for AI prompts operations"""
     
-    def __init__(self, db: Database):
-        self._db = db
-    
     def save_prompt(self, prompt_name: str, prompt_template: str,
                    metadata: Optional[Dict[str, Any]] = None,
                    version: Optional[int] = None) -> int:
@@ -1339,6 +2489,10 @@ class AIPromptsNamespace:
         """List all versions of an AI prompt"""
         return self._db.list_ai_prompt_versions(prompt_name)
     
+    def list_prompt_versions_summary(self, prompt_name: str) -> List[Dict[str, Any]]:
+        """List all versions of an AI prompt without the template text"""
+        return self._db.list_ai_prompt_versions_summary(prompt_name)
+    
     def set_active_prompt(self, prompt_name: str, version: int) -> None:
         """Set a specific version of a prompt as active"""
         return self._db.set_active_ai_prompt(prompt_name, version)
@@ -1348,12 +2502,9 @@ class AIPromptsNamespace:
         return self._db.get_active_ai_prompt(prompt_name)
 
 
-class PatternsNamespace:
+class PatternsNamespace(_Namespace):
     """Namespace for patterns operations"""
     
-    def __init__(self, db: Database):
-        self._db = db
-    
     def save_pattern(self, pattern_type: str, pattern_data: Dict[str, Any],
                      effectiveness_score: float = 0.0) -> int:
         """Save a learned pattern"""
@@ -1364,6 +2515,11 @@ class PatternsNamespace:
         """Get patterns, optionally filtered by type and effectiveness"""
         return self._db.get_patterns(pattern_type, min_effectiveness)
     
+    def iter_patterns(self, pattern_type: Optional[str] = None,
+                      min_effectiveness: float = 0.0) -> Iterator[Dict[str, Any]]:
+        """Stream patterns without building a list"""
+        return self._db.iter_patterns(pattern_type, min_effectiveness)
+    
     def update_pattern_effectiveness(self, pattern_id: int, score: float) -> None:
         """Update effectiveness score of a pattern"""
         return self._db.update_pattern_effectiveness(pattern_id, score)
@@ -1371,6 +2527,10 @@ class PatternsNamespace:
     def delete_pattern(self, pattern_id: int) -> None:
         """Delete a pattern"""
         return self._db.delete_pattern(pattern_id)
+    
+    def save_patterns_bulk(self, rows: List[tuple]) -> int:
+        """Save many learned patterns in one transaction"""
+        return self._db.save_patterns_bulk(rows)
 
 
 class Storage:
@@ -1391,6 +2551,14 @@ class Storage:
         self.ai_prompts = AIPromptsNamespace(self._db)
         self.patterns = PatternsNamespace(self._db)
     
+    def transaction(self):
+        """Group writes across namespaces into one transaction (see Database.transaction)"""
+        return self._db.transaction()
+    
+    def savepoint(self):
+        """Group writes that may fail without failing the enclosing transaction (see Database.savepoint)"""
+        return self._db.savepoint()
+    
     def close(self):
         """Close database connection"""
         self._db.close()
@@ -1402,8 +2570,4 @@ class Storage:
     def __exit__(self, exc_type, exc_val, exc_tb):
         """Context manager exit"""
         self.close()
-    
-    def __del__(self):
-        """Cleanup on deletion"""
-        self.close()
 
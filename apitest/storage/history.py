@@ -14,6 +14,44 @@ from apitest.tester import TestResults, TestResult, TestStatus
 
 logger = logging.getLogger(__name__)
 
+# JSON schema type per exact Python type of a decoded JSON value. bool has its
+# own entry, so one type() lookup tells it apart from int.
+_JSON_SCHEMA_TYPES = {
+    dict: 'object',
+    list: 'array',
+    bool: 'boolean',
+    int: 'integer',
+    float: 'number',
+    str: 'string',
+}
+
+
+def _json_schema_type(value: Any) -> str:
+    """JSON schema type for a value whose type isn't in _JSON_SCHEMA_TYPES"""
+    # Subclasses (OrderedDict, IntEnum, ...) resolve as their base type; None
+    # and anything else is reported as a string
+    if isinstance(value, dict):
+        return 'object'
+    if isinstance(value, list):
+        return 'array'
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'integer'
+    if isinstance(value, float):
+        return 'number'
+    return 'string'
+
+
+# Property schemas shared by every extracted schema. Extracted schemas are only
+# serialized into the baselines table, never mutated, so one instance per type
+# is enough (MappingProxyType would be safer but isn't JSON-serializable).
+_PROPERTY_SCHEMAS = {
+    type_name: {'type': type_name}
+    for type_name in ('object', 'array', 'boolean', 'integer', 'number', 'string')
+}
+_ARRAY_OF_OBJECTS_SCHEMA = {'type': 'array', 'items': _PROPERTY_SCHEMAS['object']}
+
 
 class TestHistory:
     """Manage test history and baseline tracking"""
@@ -26,6 +64,8 @@ class TestHistory:
             db: Optional Database instance. If None, creates a new one.
         """
         self.db = db or Database()
+        # Normalized identifier per schema_file argument (see _normalize_schema_identifier)
+        self._schema_identifiers: Dict[str, str] = {}
     
     def save_test_results(self, schema_file: str, test_results: TestResults,
                          store_payloads: bool = True) -> int:
@@ -40,67 +80,99 @@ class TestHistory:
         Returns:
             Number of results saved
         """
-        saved_count = 0
         schema_identifier = self._normalize_schema_identifier(schema_file)
+        results = test_results.results
+        rows = [
+            (
+                schema_identifier,
+                result.method,
+                result.path,
+                result.status.value,
+                result.status_code,
+                result.expected_status,
+                result.response_time_ms,
+                result.error_message,
+                result.schema_mismatch,
+                result.response_size_bytes,
+                result.auth_attempts,
+                result.auth_succeeded
+            )
+            for result in results
+        ]
         
         try:
-            for result in test_results.results:
-                # Save test result
-                test_id = self.db.save_test_result(
-                    schema_file=schema_identifier,
-                    method=result.method,
-                    path=result.path,
-                    status=result.status.value,
-                    status_code=result.status_code,
-                    expected_status=result.expected_status,
-                    response_time_ms=result.response_time_ms,
-                    error_message=result.error_message,
-                    schema_mismatch=result.schema_mismatch,
-                    response_size_bytes=result.response_size_bytes,
-                    auth_attempts=result.auth_attempts,
-                    auth_succeeded=result.auth_succeeded
-                )
-                saved_count += 1
+            # One transaction (one commit) for the whole run
+            with self.db.transaction():
+                if store_payloads:
+                    # Payload rows reference their test result, so ids are needed
+                    test_ids = self.db.save_test_results_bulk(rows, return_ids=True)
+                    self._save_payloads(results, test_ids)
+                else:
+                    self.db.save_test_results_bulk(rows)
                 
-                # Store request/response payloads if enabled and available
-                if store_payloads and hasattr(result, 'request_headers') and hasattr(result, 'response_body'):
-                    try:
-                        self.db.save_request_response(
-                            test_result_id=test_id,
-                            request_method=result.method,
-                            request_path=result.path,
-                            request_headers=getattr(result, 'request_headers', None),
-                            request_body=getattr(result, 'request_body', None),
-                            request_params=getattr(result, 'request_params', None),
-                            response_status_code=result.status_code,
-                            response_headers=getattr(result, 'response_headers', None),
-                            response_body=result.response_body,
-                            response_time_ms=result.response_time_ms
+                existing = self.db.get_baseline_keys(schema_identifier)
+                for result in results:
+                    # Establish baseline for first successful test
+                    if result.status == TestStatus.PASS and result.status_code:
+                        self._establish_baseline_if_needed(
+                            schema_identifier,
+                            result.method,
+                            result.path,
+                            result.status_code,
+                            result.response_time_ms,
+                            result.response_body,
+                            existing
                         )
-                    except Exception as e:
-                        logger.warning(f"Failed to save request/response payloads: {e}")
                 
-                # Establish baseline for first successful test
-                if result.status == TestStatus.PASS and result.status_code:
-                    self._establish_baseline_if_needed(
-                        schema_identifier,
-                        result.method,
-                        result.path,
-                        result.status_code,
-                        result.response_time_ms,
-                        result.response_body
-                    )
-            
-            logger.debug(f"Saved {saved_count} test results to database")
-            return saved_count
+            logger.debug(f"Saved {len(rows)} test results to database")
+            return len(rows)
             
         except Exception as e:
             logger.error(f"Failed to save test results: {e}")
             raise
     
+    def _save_payloads(self, results: List[TestResult], test_ids: List[int]):
+        """
+        Store request/response payloads for results that carry them
+        
+        Args:
+            results: Saved test results
+            test_ids: Database IDs of results, in the same order
+        """
+        payload_rows = [
+            (
+                test_id,
+                result.method,
+                result.path,
+                result.request_headers,
+                result.request_body,
+                result.request_params,
+                result.status_code,
+                result.response_headers,
+                result.response_body,
+                result.response_time_ms
+            )
+            for test_id, result in zip(test_ids, results)
+            if result.request_headers is not None
+        ]
+        
+        try:
+            with self.db.savepoint():
+                self.db.save_request_responses_bulk(payload_rows)
+        except Exception:
+            # Save row by row so only the bad payloads are skipped; each row's
+            # savepoint keeps a failure from rolling back the saved results
+            for row in payload_rows:
+                try:
+                    with self.db.savepoint():
+                        self.db.save_request_response(*row)
+                except Exception as e:
+                    logger.warning(f"Failed to save request/response payloads: {e}")
+    
     def _establish_baseline_if_needed(self, schema_file: str, method: str, path: str,
                                      status_code: int, response_time_ms: float,
-                                     response_body: Optional[Dict[str, Any]]):
+                                     response_body: Optional[Dict[str, Any]],
+                                     existing: Optional[set] = None):
         """
         Establish baseline for endpoint if one doesn't exist
         
@@ -111,26 +183,35 @@ class TestHistory:
             status_code: Response status code
             response_time_ms: Response time in milliseconds
             response_body: Response body (used to extract schema)
+            existing: (method, path) endpoints of schema_file known to have a
+                baseline; checked instead of the database and updated here
         """
         try:
             # Check if baseline already exists
-            existing_baseline = self.db.get_baseline(schema_file, method, path)
+            if existing is None:
+                has_baseline = self.db.get_baseline(schema_file, method, path) is not None
+            else:
+                has_baseline = (method.upper(), path) in existing
             
-            if not existing_baseline:
+            if not has_baseline:
                 # Extract response schema from response body
                 response_schema = None
                 if response_body:
                     response_schema = self._extract_schema_from_response(response_body)
                 
-                # Establish baseline
-                self.db.establish_baseline(
-                    schema_file=schema_file,
-                    method=method,
-                    path=path,
-                    status_code=status_code,
-                    response_time_ms=response_time_ms,
-                    response_schema=response_schema
-                )
+                # Establish baseline (in a savepoint, so a failure here doesn't
+                # roll back the results saved in the same transaction)
+                with self.db.savepoint():
+                    self.db.establish_baseline(
+                        schema_file=schema_file,
+                        method=method,
+                        path=path,
+                        status_code=status_code,
+                        response_time_ms=response_time_ms,
+                        response_schema=response_schema
+                    )
+                if existing is not None:
+                    existing.add((method.upper(), path))
                 logger.debug(f"Established baseline for {method} {path}")
         except Exception as e:
             logger.warning(f"Failed to establish baseline: {e}")
@@ -148,23 +229,15 @@ class TestHistory:
         if not isinstance(response_body, dict):
             return {'type': type(response_body).__name__}
         
-        schema = {'type': 'object', 'properties': {}}
+        properties = {}
+        schema = {'type': 'object', 'properties': properties}
         
         for key, value in response_body.items():
-            if isinstance(value, dict):
-                schema['properties'][key] = {'type': 'object'}
-            elif isinstance(value, list):
-                schema['properties'][key] = {'type': 'array'}
-                if value and isinstance(value[0], dict):
-                    schema['properties'][key]['items'] = {'type': 'object'}
-            elif isinstance(value, bool):
-                schema['properties'][key] = {'type': 'boolean'}
-            elif isinstance(value, int):
-                schema['properties'][key] = {'type': 'integer'}
-            elif isinstance(value, float):
-                schema['properties'][key] = {'type': 'number'}
+            type_name = _JSON_SCHEMA_TYPES.get(type(value)) or _json_schema_type(value)
+            if type_name == 'array' and value and isinstance(value[0], dict):
+                properties[key] = _ARRAY_OF_OBJECTS_SCHEMA
             else:
-                schema['properties'][key] = {'type': 'string'}
+                properties[key] = _PROPERTY_SCHEMAS[type_name]
         
         return schema
     
@@ -224,18 +297,22 @@ class TestHistory:
         """
         Normalize schema file identifier for storage
         
+        Memoized per TestHistory, so repeated lookups for the same schema
+        skip the stat() and path resolution.
+        
         Args:
             schema_file: Schema file path or identifier
             
         Returns:
             Normalized identifier (absolute path if file exists, otherwise as-is)
         """
-        # If it's a file path that exists, use absolute path for consistency
-        if os.path.exists(schema_file):
-            return os.path.abspath(schema_file)
-        
-        # Otherwise, use as-is (could be URL or identifier)
-        return schema_file
+        identifier = self._schema_identifiers.get(schema_file)
+        if identifier is None:
+            # If it's a file path that exists, use absolute path for consistency;
+            # otherwise use as-is (could be URL or identifier)
+            identifier = os.path.abspath(schema_file) if os.path.exists(schema_file) else schema_file
+            self._schema_identifiers[schema_file] = identifier
+        return identifier
     
     def close(self):
         """Close database connection"""
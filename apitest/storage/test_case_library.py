@@ -5,17 +5,60 @@ This module provides functionality for saving and loading validated test cases
 to/from a local directory structure.
 """
 
-import json
+import itertools
 import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
+from apitest.utils import json_dumps_bytes, json_loads
+
 logger = logging.getLogger(__name__)
 
+# Endpoint index over the library's JSON files, kept alongside them (not a
+# *.json file, so it is never listed as a test case). Rows are keyed by
+# filename and carry the file's mtime, so files added, edited or removed
+# outside this module are picked up on the next lookup.
+INDEX_FILENAME = '_index.sqlite'
+
+# Below this many files, reading them one by one beats starting a thread pool
+_PARALLEL_READ_MIN_FILES = 8
+
+_INDEX_DDL = """
+    CREATE TABLE IF NOT EXISTS idx (
+        filename TEXT PRIMARY KEY,
+        schema_file TEXT,
+        method TEXT,
+        path TEXT,
+        mtime_ns INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_endpoint ON idx(schema_file, method, path);
+"""
+
+_SQL_UPSERT_INDEX = """
+    INSERT OR REPLACE INTO idx (filename, schema_file, method, path, mtime_ns)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_SQL_FIND_BY_ENDPOINT = """
+    SELECT filename FROM idx
+    WHERE schema_file = ? AND method = ? AND path = ?
+    ORDER BY mtime_ns DESC
+"""
+
 
+@lru_cache(maxsize=1)
 def get_library_dir() -> Path:
-    """Get the path to the test case library directory"""
+    """
+    Get the path to the test case library directory
+    
+    The directory is created on the first call; later calls return the cached
+    path without touching the filesystem.
+    """
     library_dir = Path.home() / '.apitest' / 'validated_tests'
     library_dir.mkdir(parents=True, exist_ok=True)
     return library_dir
@@ -47,32 +90,131 @@ def save_test_case_to_library(test_case: Dict[str, Any],
         method = test_case.get('method', 'UNKNOWN')
         path = test_case.get('path', 'unknown')
         version = test_case.get('version', 1)
-        
-        # Sanitize path for filename (replace / with _)
-        safe_path = path.replace('/', '_').replace('{', '').replace('}', '')
-        safe_schema = Path(schema_file).stem if schema_file != 'unknown' else 'unknown'
-        
-        filename = f"{safe_schema}_{method}_{safe_path}_v{version}.json"
+        filename = _library_filename(schema_file, method, path, version)
     
-    file_path = library_dir / filename
+    original_path = library_dir / filename
     
-    # Ensure unique filename if file already exists
-    counter = 1
-    original_path = file_path
-    while file_path.exists():
-        stem = original_path.stem
-        suffix = original_path.suffix
-        file_path = library_dir / f"{stem}_{counter}{suffix}"
-        counter += 1
+    # Claim a unique filename: O_EXCL creates the file only if it doesn't
+    # exist yet, so concurrent saves can't pick the same name
+    for counter in itertools.count():
+        file_path = original_path if counter == 0 else (
+            library_dir / f"{original_path.stem}_{counter}{original_path.suffix}"
+        )
+        try:
+            fd = os.open(file_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            break
+        except FileExistsError:
+            continue
     
     # Save test case to file
-    with open(file_path, 'w') as f:
-        json.dump(test_case, f, indent=2)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(json_dumps_bytes(test_case, indent=True))
+    
+    try:
+        with _library_index(library_dir) as index:
+            index.execute(_SQL_UPSERT_INDEX, _index_row(
+                file_path.name, test_case, file_path.stat().st_mtime_ns
+            ))
+    except sqlite3.Error as e:
+        # The next lookup indexes the file from disk instead
+        logger.debug(f"Failed to index {file_path}: {e}")
     
     logger.debug(f"Saved test case to library: {file_path}")
     return file_path
 
 
+# Sanitize path for filename (replace / with _, drop template braces)
+_PATH_TRANS = str.maketrans({'/': '_', '{': '', '}': ''})
+
+
+@lru_cache(maxsize=4096)
+def _library_filename(schema_file: str, method: str, path: str, version: Any) -> str:
+    """Build the default library filename for a test case's endpoint and version"""
+    safe_path = path.translate(_PATH_TRANS)
+    safe_schema = Path(schema_file).stem if schema_file != 'unknown' else 'unknown'
+    return f"{safe_schema}_{method}_{safe_path}_v{version}.json"
+
+
+@contextmanager
+def _library_index(library_dir: Path):
+    """
+    Open the library's endpoint index, creating it on first use
+    
+    Commits on normal exit, rolls back on error, and always closes.
+    """
+    conn = sqlite3.connect(str(library_dir / INDEX_FILENAME), timeout=30.0)
+    try:
+        conn.executescript(_INDEX_DDL)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _index_row(filename: str, test_case: Any, mtime_ns: int) -> tuple:
+    """Index row for a library file (endpoint columns NULL if it isn't a test case)"""
+    if not isinstance(test_case, dict):
+        return (filename, None, None, None, mtime_ns)
+    method = test_case.get('method', '')
+    return (
+        filename, test_case.get('schema_file'),
+        method.upper() if isinstance(method, str) else None,
+        test_case.get('path'), mtime_ns
+    )
+
+
+def _sync_index(index: sqlite3.Connection, library_dir: Path) -> None:
+    """
+    Bring the index in line with the files on disk
+    
+    Only files that are new or whose mtime changed are parsed; rows for
+    files that no longer exist are dropped.
+    """
+    indexed = dict(index.execute("SELECT filename, mtime_ns FROM idx"))
+    on_disk = dict(_scan_library(library_dir))
+    
+    index.executemany(
+        "DELETE FROM idx WHERE filename = ?",
+        [(name,) for name in indexed if name not in on_disk]
+    )
+    
+    changed = [name for name, mtime_ns in on_disk.items() if indexed.get(name) != mtime_ns]
+    rows = []
+    for name, (test_case, error) in zip(changed, _read_test_cases(
+        [library_dir / name for name in changed]
+    )):
+        if error is not None:
+            logger.warning(f"Failed to load test case from {library_dir / name}: {error}")
+            # test_case is None: indexed as matching nothing until it changes
+        rows.append(_index_row(name, test_case, on_disk[name]))
+    index.executemany(_SQL_UPSERT_INDEX, rows)
+
+
+def _read_test_case(file_path: Path) -> Any:
+    """Parse a library file"""
+    with open(file_path, 'rb') as f:
+        return json_loads(f.read())
+
+
+def _read_test_cases(file_paths: List[Path]) -> List[Tuple[Any, Optional[Exception]]]:
+    """
+    Parse several library files, concurrently when there are many of them
+    
+    Returns:
+        (test_case, None) or (None, error) per path, in the order given
+    """
+    def read(file_path: Path) -> Tuple[Any, Optional[Exception]]:
+        try:
+            return _read_test_case(file_path), None
+        except Exception as e:
+            return None, e
+    
+    if len(file_paths) < _PARALLEL_READ_MIN_FILES:
+        return [read(file_path) for file_path in file_paths]
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as executor:
+        return list(executor.map(read, file_paths))
+
+
 def load_test_case_from_library(filename: str) -> Dict[str, Any]:
     """
     Load a test case from the library
@@ -93,10 +235,7 @@ def load_test_case_from_library(filename: str) -> Dict[str, Any]:
     if not file_path.exists():
         raise FileNotFoundError(f"Test case file not found: {file_path}")
     
-    with open(file_path, 'r') as f:
-        test_case = json.load(f)
-    
-    return test_case
+    return _read_test_case(file_path)
 
 
 def list_test_cases_in_library() -> List[Path]:
@@ -111,9 +250,24 @@ def list_test_cases_in_library() -> List[Path]:
     if not library_dir.exists():
         return []
     
-    # Get all JSON files
-    test_case_files = list(library_dir.glob('*.json'))
-    return sorted(test_case_files, key=lambda p: p.stat().st_mtime, reverse=True)
+    # Newest first
+    entries = sorted(_scan_library(library_dir), key=lambda entry: entry[1], reverse=True)
+    return [library_dir / name for name, _ in entries]
+
+
+def _scan_library(library_dir: Path) -> List[Tuple[str, int]]:
+    """
+    (filename, mtime_ns) for every JSON file in the library
+    
+    One os.scandir() pass: entry types come from the directory read itself,
+    and each file is stat()ed once, without building Path objects.
+    """
+    with os.scandir(library_dir) as it:
+        return [
+            (entry.name, entry.stat().st_mtime_ns)
+            for entry in it
+            if entry.name.endswith('.json') and entry.is_file()
+        ]
 
 
 def get_test_cases_by_endpoint(schema_file: str, method: str, 
@@ -129,12 +283,40 @@ def get_test_cases_by_endpoint(schema_file: str, method: str,
     Returns:
         List of test case dictionaries
     """
+    library_dir = get_library_dir()
+    try:
+        with _library_index(library_dir) as index:
+            _sync_index(index, library_dir)
+            filenames = [row[0] for row in index.execute(
+                _SQL_FIND_BY_ENDPOINT, (schema_file, method.upper(), path)
+            )]
+    except sqlite3.Error as e:
+        logger.warning(f"Test case library index unavailable, scanning files: {e}")
+        return _scan_test_cases_by_endpoint(schema_file, method, path)
+    
     test_cases = []
+    for filename, (test_case, error) in zip(filenames, _read_test_cases(
+        [library_dir / filename for filename in filenames]
+    )):
+        if error is not None:
+            logger.warning(f"Failed to load test case from {library_dir / filename}: {error}")
+        else:
+            test_cases.append(test_case)
+    
+    return test_cases
+
+
+def _scan_test_cases_by_endpoint(schema_file: str, method: str,
+                                 path: str) -> List[Dict[str, Any]]:
+    """Get test cases for an endpoint by parsing every library file"""
+    test_cases = []
+    file_paths = list_test_cases_in_library()
     
     # Load all test cases and filter
-    for file_path in list_test_cases_in_library():
+    for file_path, (test_case, error) in zip(file_paths, _read_test_cases(file_paths)):
         try:
-            test_case = load_test_case_from_library(file_path.name)
+            if error is not None:
+                raise error
             
             # Check if matches endpoint
             if (test_case.get('schema_file') == schema_file and
@@ -163,6 +345,12 @@ def delete_test_case_from_library(filename: str) -> bool:
     
     if file_path.exists():
         file_path.unlink()
+        try:
+            with _library_index(library_dir) as index:
+                index.execute("DELETE FROM idx WHERE filename = ?", (filename,))
+        except sqlite3.Error as e:
+            # The next lookup drops the row instead
+            logger.debug(f"Failed to unindex {file_path}: {e}")
         logger.debug(f"Deleted test case from library: {file_path}")
         return True
     
@@ -6,10 +6,10 @@ Windows Credential Manager, Linux Secret Service).
 Never sent to external servers.
 """
 
-import keyring
 import json
 import os
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 import logging
 
@@ -18,10 +18,17 @@ logger = logging.getLogger(__name__)
 # Service name for keyring (all tokens stored under this service)
 KEYRING_SERVICE = "apitest-cli"
 
+# Seconds a token read from the keyring is reused before reading it again.
+# Writes through the same TokenStore update the cache immediately.
+TOKEN_CACHE_TTL = 60.0
+
 
 class TokenStore:
     """Encrypted token storage using system keyring"""
     
+    # Services whose keyring backend was already probed in this process
+    _probed_services: set = set()
+    
     def __init__(self, service_name: str = KEYRING_SERVICE):
         """
         Initialize token store
@@ -29,16 +36,35 @@ class TokenStore:
         Args:
             service_name: Service name for keyring storage
         """
+        # Imported here rather than at module level: loading the keyring
+        # backends is slow and most CLI runs never touch tokens
+        import keyring
+        self._keyring = keyring
         self.service_name = service_name
+        # identifier -> (token, metadata, expires_at_epoch, cached_at); token is
+        # None if not stored, expires_at_epoch None if the token doesn't expire
+        self._cache: Dict[str, Tuple[Optional[str], Optional[Dict[str, Any]], Optional[float], float]] = {}
         self._verify_keyring_available()
     
     def _verify_keyring_available(self):
-        """Verify that keyring backend is available"""
+        """
+        Verify that keyring backend is available
+        
+        The probe (a write and a delete, each a keychain round trip) runs once
+        per service per process, and not at all with
+        APITEST_SKIP_KEYRING_PROBE=1 (e.g. in CI).
+        """
+        if os.getenv('APITEST_SKIP_KEYRING_PROBE') == '1':
+            return
+        if self.service_name in TokenStore._probed_services:
+            return
+        TokenStore._probed_services.add(self.service_name)
+        
         try:
             # Test keyring functionality
             test_key = f"__test_{os.getpid()}"
-            keyring.set_password(self.service_name, test_key, "test")
-            keyring.delete_password(self.service_name, test_key)
+            self._keyring.set_password(self.service_name, test_key, "test")
+            self._keyring.delete_password(self.service_name, test_key)
         except Exception as e:
             logger.warning(f"Keyring backend may not be available: {e}")
             logger.warning("Token caching will be disabled. Install keyring backend for your system:")
@@ -62,6 +88,16 @@ class TokenStore:
         """Get key name for token metadata"""
         return f"metadata:{identifier}"
     
+    def _get_entry_key_name(self, identifier: str) -> str:
+        """
+        Get key name for a token stored together with its metadata
+        
+        One JSON value {"token": ..., "metadata": {...}} replaces the separate
+        token:/metadata: entries older versions wrote, so each store or
+        lookup is a single keychain round trip.
+        """
+        return f"entry:{identifier}"
+    
     def store_token(self, identifier: str, token: str, 
                    expires_at: Optional[datetime] = None,
                    refresh_token: Optional[str] = None,
@@ -79,27 +115,86 @@ class TokenStore:
             metadata: Optional additional metadata
         """
         try:
-            # Store token
-            key_name = self._get_key_name(identifier)
-            keyring.set_password(self.service_name, key_name, token)
-            
-            # Store metadata (including expiration and refresh token)
-            metadata_key = self._get_metadata_key_name(identifier)
+            # Metadata includes expiration and refresh token
             metadata_dict = {
                 'token_type': token_type,
                 'expires_at': expires_at.isoformat() if expires_at else None,
+                # Same instant as Unix seconds: expiry checks compare one float
+                'expires_at_epoch': expires_at.timestamp() if expires_at else None,
                 'refresh_token': refresh_token,  # Will be stored if provided
                 'created_at': datetime.now().isoformat(),
                 **(metadata or {})
             }
-            metadata_json = json.dumps(metadata_dict)
-            keyring.set_password(self.service_name, metadata_key, metadata_json)
+            entry_json = json.dumps({'token': token, 'metadata': metadata_dict})
+            self._keyring.set_password(self.service_name, self._get_entry_key_name(identifier), entry_json)
+            self._cache[identifier] = (
+                token, metadata_dict, metadata_dict['expires_at_epoch'], time.monotonic()
+            )
             
             logger.debug(f"Token stored for identifier: {identifier}")
         except Exception as e:
+            self._cache.pop(identifier, None)
             logger.error(f"Failed to store token: {e}")
             raise
     
+    def _load(self, identifier: str) -> Tuple[Optional[str], Optional[Dict[str, Any]], Optional[float]]:
+        """
+        Get (token, metadata, expires_at_epoch) for an identifier, reading the
+        keyring at most once per TOKEN_CACHE_TTL
+        
+        Each keyring read is an IPC round trip to the OS keychain, and one
+        lookup (token_exists, get_token, is_token_expired) needs both the
+        token and its metadata. The expiry is worked out once per read, so
+        expiry checks compare one float.
+        
+        Raises:
+            Exception: Whatever the keyring backend raises on a cache miss
+        """
+        cached = self._cache.get(identifier)
+        if cached is not None and time.monotonic() - cached[3] < TOKEN_CACHE_TTL:
+            return cached[0], cached[1], cached[2]
+        
+        entry_json = self._keyring.get_password(self.service_name, self._get_entry_key_name(identifier))
+        if entry_json:
+            entry = json.loads(entry_json)
+            token, metadata = entry.get('token'), entry.get('metadata')
+        else:
+            token, metadata = self._load_legacy(identifier)
+        expires_at = self._expiry_epoch(metadata)
+        self._cache[identifier] = (token, metadata, expires_at, time.monotonic())
+        return token, metadata, expires_at
+    
+    def _load_legacy(self, identifier: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        Read a token stored as separate token:/metadata: entries
+        
+        A token found this way is rewritten as a single entry (see
+        _get_entry_key_name), so later lookups take one round trip.
+        """
+        token = self._keyring.get_password(self.service_name, self._get_key_name(identifier))
+        if not token:
+            return None, None
+        
+        metadata_json = self._keyring.get_password(self.service_name, self._get_metadata_key_name(identifier))
+        metadata = json.loads(metadata_json) if metadata_json else None
+        try:
+            self._keyring.set_password(
+                self.service_name, self._get_entry_key_name(identifier),
+                json.dumps({'token': token, 'metadata': metadata})
+            )
+            self._delete_legacy(identifier)
+        except Exception as e:
+            logger.debug(f"Failed to migrate token entry for {identifier}: {e}")
+        return token, metadata
+    
+    def _delete_legacy(self, identifier: str) -> None:
+        """Remove token:/metadata: entries left by older versions, if any"""
+        for key_name in (self._get_key_name(identifier), self._get_metadata_key_name(identifier)):
+            try:
+                self._keyring.delete_password(self.service_name, key_name)
+            except Exception:
+                pass  # Not stored in the old layout
+    
     def get_token(self, identifier: str) -> Optional[str]:
         """
         Get token from system keyring
@@ -111,14 +206,13 @@ class TokenStore:
             Token value or None if not found/expired
         """
         try:
-            key_name = self._get_key_name(identifier)
-            token = keyring.get_password(self.service_name, key_name)
+            token, _, expires_at = self._load(identifier)
             
             if not token:
                 return None
             
             # Check if token is expired
-            if self.is_token_expired(identifier):
+            if self._is_expired(expires_at):
                 logger.debug(f"Token expired for identifier: {identifier}")
                 # Optionally delete expired token
                 # self.delete_token(identifier)
@@ -140,13 +234,8 @@ class TokenStore:
             Metadata dictionary or None if not found
         """
         try:
-            metadata_key = self._get_metadata_key_name(identifier)
-            metadata_json = keyring.get_password(self.service_name, metadata_key)
-            
-            if not metadata_json:
-                return None
-            
-            return json.loads(metadata_json)
+            _, metadata, _ = self._load(identifier)
+            return dict(metadata) if metadata else None
         except Exception as e:
             logger.error(f"Failed to retrieve token metadata: {e}")
             return None
@@ -161,15 +250,38 @@ class TokenStore:
         Returns:
             True if token is expired, False otherwise (or if expiration not set)
         """
-        metadata = self.get_token_metadata(identifier)
-        if not metadata or not metadata.get('expires_at'):
-            return False  # No expiration set, assume not expired
-        
         try:
-            expires_at = datetime.fromisoformat(metadata['expires_at'])
-            return datetime.now() >= expires_at
-        except (ValueError, KeyError):
+            _, _, expires_at = self._load(identifier)
+        except Exception as e:
+            logger.error(f"Failed to retrieve token metadata: {e}")
             return False
+        return self._is_expired(expires_at)
+    
+    @staticmethod
+    def _expiry_epoch(metadata: Optional[Dict[str, Any]]) -> Optional[float]:
+        """
+        Get a token's expiry as Unix seconds from its metadata
+        
+        Metadata stored before expires_at_epoch existed only has the ISO
+        string, which is parsed here. Returns None if no (valid) expiration
+        is set.
+        """
+        if not metadata:
+            return None
+        
+        expires_at = metadata.get('expires_at_epoch')
+        if expires_at is None and metadata.get('expires_at'):
+            try:
+                expires_at = datetime.fromisoformat(metadata['expires_at']).timestamp()
+            except (ValueError, TypeError):
+                return None
+        return expires_at
+    
+    @staticmethod
+    def _is_expired(expires_at: Optional[float]) -> bool:
+        """Check a cached expiry epoch (see is_token_expired)"""
+        # No expiration set, assume not expired
+        return expires_at is not None and time.time() >= expires_at
     
     def get_refresh_token(self, identifier: str) -> Optional[str]:
         """
@@ -194,13 +306,12 @@ class TokenStore:
         Args:
             identifier: Unique identifier for the token
         """
+        self._cache.pop(identifier, None)
+        # A token stored by an older version and never read since is still in
+        # the old layout (storing over it doesn't remove it)
+        self._delete_legacy(identifier)
         try:
-            key_name = self._get_key_name(identifier)
-            metadata_key = self._get_metadata_key_name(identifier)
-            
-            keyring.delete_password(self.service_name, key_name)
-            keyring.delete_password(self.service_name, metadata_key)
-            
+            self._keyring.delete_password(self.service_name, self._get_entry_key_name(identifier))
             logger.debug(f"Token deleted for identifier: {identifier}")
         except Exception as e:
             logger.warning(f"Failed to delete token (may not exist): {e}")
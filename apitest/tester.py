@@ -2,7 +2,10 @@
 API endpoint tester
 """
 
+import re
 import time
+import http.cookiejar
+from collections import Counter
 import requests
 import jsonschema
 from typing import Dict, Any, List, Optional
@@ -14,10 +17,83 @@ import logging
 from apitest.schema_parser import SchemaParser
 from apitest.auth import AuthHandler
 from apitest.core.test_generator import TestGenerator
+from apitest.utils import json_dumps_bytes, json_loads
 from rich.console import Console
 
 logger = logging.getLogger(__name__)
 
+# Path template parameters, e.g. {id} in /users/{id}
+_PATH_PARAM_RE = re.compile(r'\{([^}]+)\}')
+
+# Default path parameter values, by schema type and then by string format
+_PATH_PARAM_TYPE_VALUES = {'integer': 1, 'number': 1.0}
+_PATH_PARAM_FORMAT_VALUES = {
+    'uuid': '123e4567-e89b-12d3-a456-426614174000',
+    'date': '2024-01-01',
+    'date-time': '2024-01-01T00:00:00Z',
+}
+
+# Operation keys of an OpenAPI path item that are tested, in test order
+HTTP_METHODS = ('get', 'post', 'put', 'delete', 'patch', 'head', 'options')
+
+# Success statuses preferred as an operation's expected status, in order
+_EXPECTED_2XX_STATUSES = (('200', 200), ('201', 201), ('202', 202), ('204', 204))
+
+# Upper bound on concurrent requests in parallel mode. Tests are network-bound,
+# so threads spend nearly all their time waiting on the server.
+MAX_PARALLEL_REQUESTS = 16
+
+
+def _create_session() -> requests.Session:
+    """
+    HTTP session shared by all requests of one APITester
+    
+    Connections are kept alive and reused, so testing many endpoints of the
+    same host pays for the TCP/TLS handshake once per pooled connection
+    rather than once per request. The pool is sized for parallel mode.
+    
+    Cookies set by responses are not kept: each test request must go out
+    with only the auth and headers it was built with, as it did before the
+    session was shared.
+    """
+    session = requests.Session()
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=MAX_PARALLEL_REQUESTS, pool_maxsize=MAX_PARALLEL_REQUESTS
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _json_body(response: requests.Response) -> Any:
+    """
+    Decode a JSON response body, with orjson when installed
+    
+    Raises:
+        ValueError: If the body is not valid JSON
+    """
+    try:
+        return json_loads(response.content)
+    except UnicodeDecodeError:
+        # Not UTF-8: let requests decode it using the declared charset
+        return response.json()
+
+
+def _raw_preview(response: requests.Response, length: int = 500) -> str:
+    """
+    First characters of a body that couldn't be parsed
+    
+    Decodes only a bounded prefix (enough bytes for `length` characters in
+    any UTF encoding) rather than the whole, possibly large, body.
+    """
+    prefix = response.content[:length * 4]
+    try:
+        return prefix.decode(response.encoding or 'utf-8', errors='replace')[:length]
+    except LookupError:
+        # Unknown charset name in Content-Type
+        return response.text[:length]
+
 
 class TestStatus(Enum):
     """Test result status"""
@@ -50,6 +126,9 @@ class TestResult:
     ai_metadata: Optional[Dict[str, Any]] = None  # AI generation metadata
     test_scenario: Optional[str] = None  # Test scenario description
     test_case_id: Optional[int] = None  # ID of AI test case in storage (if AI-generated)
+    request_headers: Optional[Dict[str, str]] = None  # History stores payloads only when set
+    request_params: Optional[Dict[str, Any]] = None
+    response_headers: Optional[Dict[str, str]] = None
 
 
 @dataclass
@@ -78,15 +157,24 @@ class TestResults:
         """Get all errors"""
         return [r for r in self.results if r.status == TestStatus.ERROR]
     
+    def get_status_counts(self) -> Dict[TestStatus, int]:
+        """
+        Count results per status in one pass
+        
+        Returns:
+            Counter keyed by TestStatus (0 for statuses with no results)
+        """
+        return Counter(r.status for r in self.results)
+    
     def has_failures(self) -> bool:
         """Check if there are any failures"""
-        return len(self.get_failed()) > 0 or len(self.get_errors()) > 0
+        return any(r.status in (TestStatus.FAIL, TestStatus.ERROR) for r in self.results)
     
     def get_success_rate(self) -> float:
         """Calculate success rate as percentage"""
         if not self.results:
             return 0.0
-        passed = len(self.get_passed())
+        passed = self.get_status_counts()[TestStatus.PASS]
         return (passed / len(self.results)) * 100
 
 
@@ -98,13 +186,15 @@ class APITester:
                  path_params: Optional[Dict[str, str]] = None,
                  store_results: bool = False, schema_file: Optional[str] = None,
                  use_smart_data: bool = False, compare_baseline: bool = False,
-                 test_generator: Optional[TestGenerator] = None, storage: Optional[Any] = None):
+                 test_generator: Optional[TestGenerator] = None, storage: Optional[Any] = None,
+                 max_workers: Optional[int] = None):
         self.schema = schema
         self.auth_handlers = auth_handlers if isinstance(auth_handlers, list) else [auth_handlers]
         if not self.auth_handlers:
             self.auth_handlers = [AuthHandler()]  # Default empty handler
         self.timeout = timeout
         self.parallel = parallel
+        self.max_workers = max_workers  # None: one thread per test, up to MAX_PARALLEL_REQUESTS
         self.verbose = verbose
         self.parser = SchemaParser()
         self.path_params = path_params or {}
@@ -116,6 +206,14 @@ class APITester:
         self.compare_baseline = compare_baseline
         self.test_generator = test_generator  # TestGenerator instance (with router)
         self.storage = storage  # Storage instance for AI test storage
+        self._session = _create_session()
+        # id(response schema node) -> (node, compiled validator); the node is
+        # kept so a recycled id can't match a different schema
+        self._validator_cache: Dict[int, tuple] = {}
+        # id(schema node) -> (node, resolved node), same keying as above
+        self._resolved_cache: Dict[int, tuple] = {}
+        # Set by run_tests while it runs (see _auth_requests)
+        self._auth_snapshot: Optional[List[tuple]] = None
         
         self.base_url = self.parser.get_base_url(schema)
         # Ensure we always have a valid base URL (must be full URL starting with http:// or https://)
@@ -129,6 +227,29 @@ class APITester:
             elif schema.get('servers') and isinstance(schema['servers'][0], dict):
                 schema['servers'][0]['url'] = self.base_url
     
+    def close(self):
+        """Close pooled HTTP connections"""
+        self._session.close()
+    
+    def __enter__(self):
+        """Context manager entry"""
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit"""
+        self.close()
+    
+    def _auth_requests(self) -> List[tuple]:
+        """
+        Get (headers, query params) for each auth handler, in trial order
+        
+        The returned dicts may be shared between requests and must not be
+        mutated.
+        """
+        if self._auth_snapshot is not None:
+            return self._auth_snapshot
+        return [(handler.get_headers(), handler.get_query_params()) for handler in self.auth_handlers]
+    
     def run_tests(self, progress=None, task=None) -> TestResults:
         """
         Run tests for all endpoints in the schema
@@ -144,46 +265,48 @@ class APITester:
         test_results = TestResults()
         paths = self.parser.get_paths(self.schema)
         
-        # Collect endpoints for test generation
-        endpoints = []
-        for path, path_item in paths.items():
-            if not isinstance(path_item, dict):
-                continue
-            
-            methods = ['get', 'post', 'put', 'delete', 'patch', 'head', 'options']
-            for method in methods:
-                if method in path_item:
-                    endpoints.append((method.upper(), path, path_item[method]))
+        # Collect endpoints for test generation (a list: it is counted and
+        # handed to the test generator whole)
+        endpoints = [
+            (method.upper(), path, path_item[method])
+            for path, path_item in paths.items() if isinstance(path_item, dict)
+            for method in HTTP_METHODS if method in path_item
+        ]
         
         if not endpoints:
             return test_results
         
-        # Generate test cases using TestGenerator router (if available)
-        # Otherwise, use legacy approach
-        if self.test_generator:
-            # Use TestGenerator router to generate tests (supports schema/ai/hybrid modes)
-            from apitest.core.test_generator import TestCase
-            generated_test_cases = self.test_generator.generate_tests(self.schema, endpoints)
+        # Auth headers and params don't change during a run: compute them once
+        self._auth_snapshot = self._auth_requests()
+        try:
+            # Generate test cases using TestGenerator router (if available)
+            # Otherwise, use legacy approach
+            if self.test_generator:
+                # Use TestGenerator router to generate tests (supports schema/ai/hybrid modes)
+                from apitest.core.test_generator import TestCase
+                generated_test_cases = self.test_generator.generate_tests(self.schema, endpoints)
             
-            # Execute tests
-            if self.parallel:
-                test_results = self._run_tests_parallel_from_test_cases(generated_test_cases)
-            else:
-                for test_case in generated_test_cases:
-                    result = self._test_endpoint_from_test_case(test_case)
-                    test_results.add_result(result)
-                    if progress and task is not None:
-                        progress.update(task, advance=1)
-        else:
-            # Legacy approach: generate tests on-the-fly
-            if self.parallel:
-                test_results = self._run_tests_parallel(endpoints)
+                # Execute tests
+                if self.parallel:
+                    test_results = self._run_tests_parallel_from_test_cases(generated_test_cases)
+                else:
+                    for test_case in generated_test_cases:
+                        result = self._test_endpoint_from_test_case(test_case)
+                        test_results.add_result(result)
+                        if progress and task is not None:
+                            progress.update(task, advance=1)
             else:
-                for method, path, operation in endpoints:
-                    result = self._test_endpoint(method, path, operation)
-                    test_results.add_result(result)
-                    if progress and task is not None:
-                        progress.update(task, advance=1)
+                # Legacy approach: generate tests on-the-fly
+                if self.parallel:
+                    test_results = self._run_tests_parallel(endpoints)
+                else:
+                    for method, path, operation in endpoints:
+                        result = self._test_endpoint(method, path, operation)
+                        test_results.add_result(result)
+                        if progress and task is not None:
+                            progress.update(task, advance=1)
+        finally:
+            self._auth_snapshot = None
         
         test_results.total_time_seconds = time.time() - start_time
         
@@ -193,11 +316,17 @@ class APITester:
         
         return test_results
     
+    def _parallel_workers(self, test_count: int) -> int:
+        """Number of threads to run test_count tests with in parallel mode"""
+        if self.max_workers:
+            return self.max_workers
+        return max(1, min(MAX_PARALLEL_REQUESTS, test_count))
+    
     def _run_tests_parallel(self, test_cases: List[tuple]) -> TestResults:
         """Run tests in parallel"""
         test_results = TestResults()
         
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with ThreadPoolExecutor(max_workers=self._parallel_workers(len(test_cases))) as executor:
             futures = {
                 executor.submit(self._test_endpoint, method, path, operation): (method, path)
                 for method, path, operation in test_cases
@@ -271,27 +400,22 @@ class APITester:
         last_result = None
         auth_attempts = 0
         
-        for auth_handler in self.auth_handlers:
+        for headers, params in self._auth_requests():
             auth_attempts += 1
             
-            # Build request with current auth handler
-            headers = auth_handler.get_headers()
-            params = auth_handler.get_query_params()
-            
-            # Add content-type if needed
-            if method in ['POST', 'PUT', 'PATCH']:
-                headers.setdefault('Content-Type', 'application/json')
+            # Add content-type if needed (copying: headers may be shared)
+            if method in ['POST', 'PUT', 'PATCH'] and 'Content-Type' not in headers:
+                headers = {**headers, 'Content-Type': 'application/json'}
             
             # Execute request
             start_time = time.time()
             try:
-                response = requests.request(
+                response = self._session.request(
                     method=method,
                     url=url,
                     headers=headers,
                     params=params,
-                    json=json_data,
-                    data=None,
+                    data=json_dumps_bytes(json_data) if json_data is not None else None,
                     timeout=self.timeout,
                     allow_redirects=False
                 )
@@ -305,7 +429,7 @@ class APITester:
                 if response.content:
                     try:
                         if 'application/json' in content_type or 'application/vnd.api+json' in content_type:
-                            response_body = response.json()
+                            response_body = _json_body(response)
                         elif 'application/xml' in content_type or 'text/xml' in content_type:
                             # XML response - can't validate with JSON schema, but store as string
                             response_body = {'_xml_content': response.text}
@@ -315,9 +439,9 @@ class APITester:
                         else:
                             # Try JSON anyway (some APIs don't set Content-Type correctly)
                             try:
-                                response_body = response.json()
+                                response_body = _json_body(response)
                             except:
-                                response_body = {'_raw_content': response.text[:500]}  # Truncate long responses
+                                response_body = {'_raw_content': _raw_preview(response)}  # Truncate long responses
                     except Exception as e:
                         if self.verbose:
                             self.console.print(f"[dim]Warning: Could not parse response: {e}[/dim]")
@@ -522,10 +646,7 @@ class APITester:
         path = path.lstrip('/')
         
         # Replace path parameters with test values based on schema
-        import re
-        
-        # Find all path parameters
-        param_matches = re.finditer(r'\{([^}]+)\}', path)
+        param_matches = _PATH_PARAM_RE.finditer(path)
         
         for match in param_matches:
             param_name = match.group(1)
@@ -562,22 +683,12 @@ class APITester:
             for param in parameters:
                 if param.get('in') == 'path' and param.get('name') == param_name:
                     schema = param.get('schema', {})
-                    param_type = schema.get('type', 'string')
-                    param_format = schema.get('format', '')
                     
-                    # Generate based on type and format
-                    if param_type == 'integer':
-                        return 1
-                    elif param_type == 'number':
-                        return 1.0
-                    elif param_format == 'uuid':
-                        return '123e4567-e89b-12d3-a456-426614174000'
-                    elif param_format == 'date':
-                        return '2024-01-01'
-                    elif param_format == 'date-time':
-                        return '2024-01-01T00:00:00Z'
-                    else:
-                        return 'test'
+                    # Generate based on type, then format
+                    param_type = schema.get('type', 'string')
+                    if param_type in _PATH_PARAM_TYPE_VALUES:
+                        return _PATH_PARAM_TYPE_VALUES[param_type]
+                    return _PATH_PARAM_FORMAT_VALUES.get(schema.get('format', ''), 'test')
         
         # Default fallback
         return 1
@@ -587,13 +698,13 @@ class APITester:
         responses = operation.get('responses', {})
         
         # Look for 2xx status codes first
-        for status_code in ['200', '201', '202', '204']:
-            if status_code in responses:
-                return int(status_code)
+        for status_key, status_code in _EXPECTED_2XX_STATUSES:
+            if status_key in responses:
+                return status_code
         
         # Return first available status code
         if responses:
-            first_status = list(responses.keys())[0]
+            first_status = next(iter(responses))
             if first_status.isdigit():
                 return int(first_status)
         
@@ -628,16 +739,15 @@ class APITester:
         if not schema:
             return errors
         
-        # Resolve $ref references if present
-        resolved_schema = self._resolve_schema_refs(schema)
-        
-        # Validate response against schema
+        # Validate response against schema (same error as jsonschema.validate)
         try:
-            jsonschema.validate(instance=response_body, schema=resolved_schema)
-        except jsonschema.ValidationError as e:
-            errors.append(f"Schema validation failed: {e.message}")
-            if e.path:
-                errors.append(f"  Path: {'/'.join(str(p) for p in e.path)}")
+            error = jsonschema.exceptions.best_match(
+                self._get_validator(schema).iter_errors(response_body)
+            )
+            if error is not None:
+                errors.append(f"Schema validation failed: {error.message}")
+                if error.path:
+                    errors.append(f"  Path: {'/'.join(str(p) for p in error.path)}")
         except jsonschema.SchemaError as e:
             errors.append(f"Invalid schema definition: {e.message}")
         except Exception as e:
@@ -645,14 +755,49 @@ class APITester:
         
         return errors
     
+    def _get_validator(self, schema: Dict[str, Any]):
+        """
+        Get a compiled validator for a response schema from self.schema
+        
+        Resolving $refs and checking the schema happen once per schema node;
+        endpoints sharing a response schema share the validator.
+        
+        Raises:
+            jsonschema.SchemaError: If the schema itself is invalid
+        """
+        cached = self._validator_cache.get(id(schema))
+        if cached is not None and cached[0] is schema:
+            return cached[1]
+        
+        # Resolve $ref references if present
+        resolved_schema = self._resolve_schema_refs(schema)
+        validator_class = jsonschema.validators.validator_for(resolved_schema)
+        validator_class.check_schema(resolved_schema)
+        validator = validator_class(resolved_schema)
+        self._validator_cache[id(schema)] = (schema, validator)
+        return validator
+    
     def _resolve_schema_refs(self, schema: Dict[str, Any]) -> Dict[str, Any]:
         """
         Resolve $ref references in schema
         Basic implementation - resolves components/schemas references
+        
+        Results are memoized per schema node (the OpenAPI document doesn't
+        change during a run), so a component referenced from many endpoints
+        is resolved once. Returned dicts are shared and must not be mutated.
         """
         if not isinstance(schema, dict):
             return schema
         
+        cached = self._resolved_cache.get(id(schema))
+        if cached is not None and cached[0] is schema:
+            return cached[1]
+        resolved = self._resolve_schema_node(schema)
+        self._resolved_cache[id(schema)] = (schema, resolved)
+        return resolved
+    
+    def _resolve_schema_node(self, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Resolve one schema node for _resolve_schema_refs (uncached)"""
         # Check for $ref
         if '$ref' in schema:
             ref_path = schema['$ref']
@@ -663,17 +808,23 @@ class APITester:
                 if schema_name in schemas:
                     return self._resolve_schema_refs(schemas[schema_name])
         
-        # Recursively resolve nested references
+        # Recursively resolve nested references; subtrees without any $ref
+        # come back as the original objects and are shared, not copied
         resolved = {}
+        changed = False
         for key, value in schema.items():
             if isinstance(value, dict):
-                resolved[key] = self._resolve_schema_refs(value)
+                resolved_value = self._resolve_schema_refs(value)
             elif isinstance(value, list):
-                resolved[key] = [self._resolve_schema_refs(item) if isinstance(item, dict) else item for item in value]
+                resolved_value = [self._resolve_schema_refs(item) if isinstance(item, dict) else item for item in value]
+                if all(new is old for new, old in zip(resolved_value, value)):
+                    resolved_value = value
             else:
-                resolved[key] = value
+                resolved_value = value
+            changed = changed or resolved_value is not value
+            resolved[key] = resolved_value
         
-        return resolved
+        return resolved if changed else schema
     
     def _test_endpoint_from_test_case(self, test_case) -> TestResult:
         """
@@ -722,22 +873,20 @@ class APITester:
         last_result = None
         auth_attempts = 0
         
-        for auth_handler in self.auth_handlers:
+        for headers, params in self._auth_requests():
             auth_attempts += 1
-            headers = auth_handler.get_headers()
-            params = auth_handler.get_query_params()
             
-            if test_case.method in ['POST', 'PUT', 'PATCH']:
-                headers.setdefault('Content-Type', 'application/json')
+            if (test_case.method in ['POST', 'PUT', 'PATCH'] or json_data is not None) and 'Content-Type' not in headers:
+                headers = {**headers, 'Content-Type': 'application/json'}
             
             start_time = time.time()
             try:
-                response = requests.request(
+                response = self._session.request(
                     method=test_case.method,
                     url=url,
                     headers=headers,
                     params=params,
-                    json=json_data,
+                    data=json_dumps_bytes(json_data) if json_data is not None else None,
                     timeout=self.timeout,
                     allow_redirects=False
                 )
@@ -751,14 +900,14 @@ class APITester:
                 if response.content:
                     try:
                         if 'application/json' in content_type:
-                            response_body = response.json()
+                            response_body = _json_body(response)
                         else:
                             try:
-                                response_body = response.json()
+                                response_body = _json_body(response)
                             except:
-                                response_body = {'_raw_content': response.text[:500]}
+                                response_body = {'_raw_content': _raw_preview(response)}
                     except Exception:
-                        response_body = {'_raw_content': response.text[:500]}
+                        response_body = {'_raw_content': _raw_preview(response)}
                 
                 # Validate response
                 status = TestStatus.PASS
@@ -827,7 +976,7 @@ class APITester:
         """Run tests in parallel from TestCase objects"""
         test_results = TestResults()
         
-        with ThreadPoolExecutor(max_workers=5) as executor:
+        with ThreadPoolExecutor(max_workers=self._parallel_workers(len(test_cases))) as executor:
             futures = {
                 executor.submit(self._test_endpoint_from_test_case, test_case): test_case
                 for test_case in test_cases
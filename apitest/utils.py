@@ -4,7 +4,19 @@ Utility functions
 
 import os
 import re
-from typing import Any, Dict
+import json
+import math
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Union
+
+try:
+    import orjson  # Optional: C-accelerated JSON encoder/decoder
+except ImportError:
+    orjson = None
+
+# Environment variable references understood by expand_env_vars
+_ENV_BRACED = re.compile(r'\$\{([^}:]+)(?::-([^}]*))?\}')  # ${VAR} / ${VAR:-default}
+_ENV_BARE = re.compile(r'\$([A-Za-z_][A-Za-z0-9_]*)')  # $VAR
 
 
 def deep_get(data: Dict[str, Any], path: str, default: Any = None) -> Any:
@@ -19,10 +31,38 @@ def deep_get(data: Dict[str, Any], path: str, default: Any = None) -> Any:
     Returns:
         Value at path or default
     """
-    keys = path.split('.')
-    value = data
+    return deep_get_compiled(data, compile_path(path), default)
+
+
+@lru_cache(maxsize=128)
+def compile_path(path: str) -> Tuple[str, ...]:
+    """
+    Split a dot-notation path into keys for deep_get_compiled
+    
+    Args:
+        path: Dot-separated path (e.g., "components.securitySchemes")
+    
+    Returns:
+        Tuple of keys
+    """
+    return tuple(path.split('.'))
+
+
+def deep_get_compiled(data: Dict[str, Any], keys: Tuple[str, ...], default: Any = None) -> Any:
+    """
+    Get nested dictionary value using a path from compile_path
     
+    Args:
+        data: Dictionary to search
+        keys: Keys to follow, outermost first
+        default: Default value if path not found
+    
+    Returns:
+        Value at path or default
+    """
+    value = data
     for key in keys:
+        # isinstance, not type() is dict: YAML loaders may produce subclasses
         if isinstance(value, dict) and key in value:
             value = value[key]
         else:
@@ -79,9 +119,84 @@ def expand_env_vars(value: str) -> str:
             return match.group(0)
     
     # Support ${VAR:-default} format
-    value = re.sub(r'\$\{([^}:]+)(?::-([^}]*))?\}', replace_env, value)
+    value = _ENV_BRACED.sub(replace_env, value)
     # Support $VAR format
-    value = re.sub(r'\$([A-Za-z_][A-Za-z0-9_]*)', lambda m: os.getenv(m.group(1), m.group(0)), value)
+    value = _ENV_BARE.sub(lambda m: os.getenv(m.group(1), m.group(0)), value)
     
     return value
 
+
+def _has_non_finite(value: Any) -> bool:
+    """Whether a JSON-like value contains a NaN or infinite float"""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(_has_non_finite(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(_has_non_finite(item) for item in value)
+    return False
+
+
+def json_dumps_bytes(value: Any, indent: bool = False) -> bytes:
+    """
+    Serialize value to compact UTF-8 JSON bytes
+    
+    Uses orjson when installed, otherwise the stdlib encoder. Values orjson
+    cannot encode (e.g. non-string keys, very large ints) fall back to stdlib,
+    as do values with NaN/Infinity, which orjson would silently write as null.
+    
+    Args:
+        value: JSON-serializable value
+        indent: Pretty-print with 2-space indentation (for files people read)
+    
+    Returns:
+        Encoded JSON bytes
+    """
+    if orjson is not None:
+        try:
+            data = orjson.dumps(value, option=orjson.OPT_INDENT_2 if indent else None)
+        except TypeError:
+            pass
+        else:
+            # Non-finite floats come out as null, so only output containing
+            # null needs the (slower) check
+            if b'null' not in data or not _has_non_finite(value):
+                return data
+    if indent:
+        return json.dumps(value, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def json_dumps(value: Any) -> str:
+    """
+    Serialize value to a compact JSON string
+    
+    Args:
+        value: JSON-serializable value
+    
+    Returns:
+        Encoded JSON string
+    """
+    return json_dumps_bytes(value).decode('utf-8')
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """
+    Parse JSON from a string or bytes
+    
+    Args:
+        data: JSON document
+    
+    Returns:
+        Decoded value
+    
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # Stdlib output may contain NaN/Infinity, which orjson rejects
+            pass
+    return json.loads(data)
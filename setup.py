@@ -30,6 +30,9 @@ setup(
         "rich>=13.0.0",
         "keyring>=24.0.0",
     ],
+    extras_require={
+        "fast": ["orjson>=3.9.0"],  # Faster JSON for stored payloads/baselines
+    },
     python_requires=">=3.8",
     entry_points={
         "console_scripts": [
@@ -0,0 +1,1002 @@
+"""
+Tests for the core SQLite database (test results, payloads and baselines)
+"""
+
+import pytest
+import json
+import sqlite3
+import zlib
+from apitest.storage.database import (
+    Database, CURRENT_SCHEMA_VERSION, DB_PAGE_SIZE, WAL_JOURNAL_SIZE_LIMIT,
+    HEADER_ZDICT_VERSION, encode_payload, decode_payload, _test_history_sql,
+    _LEGACY_HEADER_ZDICT
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh database in a temporary directory"""
+    database = Database(tmp_path / "test.db")
+    yield database
+    database.close()
+
+
+class TestConnectionSetup:
+    """Test connection-level configuration"""
+    
+    def test_new_database_uses_large_pages(self, db):
+        """Test that fresh databases are created with the larger page size"""
+        assert db.conn.execute("PRAGMA page_size").fetchone()[0] == DB_PAGE_SIZE
+    
+    def test_existing_database_keeps_page_size(self, tmp_path):
+        """Test that reopening a database does not change its page size"""
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.execute("PRAGMA page_size=4096")
+        conn.execute("CREATE TABLE legacy (id INTEGER)")
+        conn.commit()
+        conn.close()
+        
+        database = Database(db_path)
+        assert database.conn.execute("PRAGMA page_size").fetchone()[0] == 4096
+        database.close()
+    
+    def test_wal_autocheckpoint(self, db):
+        """Test that the automatic checkpoint threshold is pinned"""
+        assert db.conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 1000
+    
+    def test_in_memory_database(self):
+        """Test that ':memory:' databases skip the journal PRAGMAs"""
+        from pathlib import Path
+        database = Database(Path(':memory:'))
+        assert database.conn.execute("PRAGMA journal_mode").fetchone()[0] == 'memory'
+        assert database._read_conn() is database.conn
+        
+        test_id = database.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        assert database.get_test_history()[0]['id'] == test_id
+        database.close()
+        assert not Path(':memory:').exists()
+    
+    def test_warm_open_skips_schema_setup(self, tmp_path, monkeypatch):
+        """Test that reopening an up-to-date database runs no DDL"""
+        db_path = tmp_path / "warm.db"
+        Database(db_path).close()
+        
+        def fail(self):
+            raise AssertionError("schema setup ran on a warm open")
+        
+        monkeypatch.setattr(Database, '_create_schema', fail)
+        monkeypatch.setattr(Database, '_run_migrations', fail)
+        database = Database(db_path)
+        assert database.conn.execute("PRAGMA user_version").fetchone()[0] == CURRENT_SCHEMA_VERSION
+        database.close()
+    
+    def test_close_runs_optimize(self, tmp_path):
+        """Test that closing refreshes planner statistics"""
+        database = Database(tmp_path / "optimize.db")
+        statements = []
+        database.conn.set_trace_callback(statements.append)
+        database.close()
+        assert "PRAGMA optimize" in statements
+    
+    def test_in_memory_mode_persists_on_close(self, tmp_path):
+        """Test that in_memory=True loads from and saves back to db_path"""
+        db_path = tmp_path / "hot.db"
+        with Database(db_path) as database:
+            database.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        
+        database = Database(db_path, in_memory=True)
+        assert database.conn.execute("PRAGMA database_list").fetchone()[2] == ''
+        database.save_test_result('api.yaml', 'GET', '/orders', 'pass', 200)
+        assert len(database.get_test_history()) == 2
+        database.close()
+        
+        with Database(db_path) as database:
+            assert {r['path'] for r in database.get_test_history()} == {'/users', '/orders'}
+    
+    def test_unclosed_database_released_on_collect(self, tmp_path):
+        """Test that a collected, never-closed Database flushes and closes"""
+        import gc
+        import sqlite3
+        db_path = tmp_path / "unclosed.db"
+        database = Database(db_path, autocommit=False)
+        database.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        conn = database.conn
+        del database
+        gc.collect()
+        
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        with Database(db_path) as database:
+            assert len(database.get_test_history()) == 1
+    
+    def test_ddl_script_is_atomic(self, db):
+        """Test that a failing DDL script leaves none of its statements behind"""
+        import sqlite3
+        with pytest.raises(sqlite3.Error):
+            db._execute_ddl("CREATE TABLE ddl_first (a); CREATE TABLE ddl_second (;")
+        
+        assert not db.conn.in_transaction
+        assert db.conn.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'ddl_first'"
+        ).fetchone() is None
+    
+    def test_journal_size_limit(self, db):
+        """Test that the WAL file size is capped after checkpoints"""
+        limit = db.conn.execute("PRAGMA journal_size_limit").fetchone()[0]
+        assert limit == WAL_JOURNAL_SIZE_LIMIT
+    
+    def test_periodic_checkpoint(self, db, monkeypatch):
+        """Test that the WAL is checkpointed every WAL_CHECKPOINT_INTERVAL commits"""
+        monkeypatch.setattr('apitest.storage.database.WAL_CHECKPOINT_INTERVAL', 3)
+        modes = []
+        monkeypatch.setattr(db, 'checkpoint', lambda mode='PASSIVE': modes.append(mode))
+        
+        for path in ('/users', '/orders'):
+            db.save_test_result('api.yaml', 'GET', path, 'pass', 200)
+        assert modes == []
+        
+        db.save_test_result('api.yaml', 'GET', '/items', 'pass', 200)
+        assert modes == ['PASSIVE']
+    
+    def test_close_does_not_wait_for_readers(self, tmp_path):
+        """Test that the checkpoint in close() doesn't block on an open read"""
+        import time
+        db_path = tmp_path / "test.db"
+        database = Database(db_path)
+        database.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        
+        other = sqlite3.connect(str(db_path))
+        other.execute("BEGIN")
+        other.execute("SELECT COUNT(*) FROM test_results").fetchone()
+        
+        started = time.monotonic()
+        database.close()
+        assert time.monotonic() - started < 5
+        other.close()
+    
+    def test_checkpoint_rejects_unknown_mode(self, db):
+        """Test that checkpoint() validates its mode"""
+        with pytest.raises(ValueError):
+            db.checkpoint('EVERYTHING')
+
+class TestBulkInserts:
+    """Test batched insert helpers"""
+    
+    def test_save_test_results_bulk(self, db):
+        """Test inserting several test results at once"""
+        rows = [
+            ('api.yaml', 'GET', '/users', 'pass', 200, 200, 12.5, None, False, 42, 1, True),
+            ('api.yaml', 'POST', '/users', 'fail', 500, 201, 30.0, 'boom', False, 10, 1, True),
+        ]
+        
+        assert db.save_test_results_bulk(rows) == 2
+        
+        history = db.get_test_history(schema_file='api.yaml')
+        assert len(history) == 2
+        assert {(r['method'], r['status']) for r in history} == {('GET', 'pass'), ('POST', 'fail')}
+    
+    def test_save_test_result_row(self, db):
+        """Test the positional single-row fast path"""
+        test_id = db.save_test_result_row(
+            ('api.yaml', 'GET', '/users', 'fail', 500, 200, 3.5, 'boom', True, 7, 2, False)
+        )
+        
+        row = db.get_test_history(schema_file='api.yaml')[0]
+        assert row['id'] == test_id
+        assert (row['error_message'], row['schema_mismatch'], row['auth_succeeded']) == ('boom', True, False)
+    
+    def test_save_test_results_bulk_empty(self, db):
+        """Test that an empty batch is a no-op"""
+        assert db.save_test_results_bulk([]) == 0
+    
+    def test_save_test_results_bulk_return_ids(self, db):
+        """Test that bulk inserts can hand back the new ids in order"""
+        rows = [
+            ('api.yaml', 'GET', '/users', 'pass', 200, 200, 1.0, None, False, 0, 1, True),
+            ('api.yaml', 'GET', '/orders', 'pass', 200, 200, 1.0, None, False, 0, 1, True),
+        ]
+        
+        ids = db.save_test_results_bulk(rows, return_ids=True)
+        
+        assert len(ids) == 2 and ids[0] < ids[1]
+        paths = dict(db.conn.execute("SELECT id, path FROM test_results").fetchall())
+        assert [paths[i] for i in ids] == ['/users', '/orders']
+        assert db.save_test_results_bulk([], return_ids=True) == []
+    
+    def test_save_request_responses_bulk(self, db):
+        """Test inserting several request/response payloads at once"""
+        test_id = db.save_test_result('api.yaml', 'POST', '/users', 'pass', 201)
+        rows = [
+            (test_id, 'POST', '/users', {'Accept': 'application/json'}, {'name': 'a'},
+             None, 201, None, {'id': 1}, 5.0),
+            (test_id, 'POST', '/users', None, {'name': 'b'}, None, 201, None, {'id': 2}, 6.0),
+        ]
+        
+        assert db.save_request_responses_bulk(rows) == 2
+        
+        count = db.conn.execute(
+            "SELECT COUNT(*) FROM request_response_storage WHERE test_result_id = ?", (test_id,)
+        ).fetchone()[0]
+        assert count == 2
+
+
+class TestHistoryReaders:
+    """Test history and baseline readers"""
+    
+    def test_history_sql_built_once_per_filter_set(self, db):
+        """Test that each filter combination maps to one cached statement"""
+        assert _test_history_sql(0) is _test_history_sql(0)
+        assert 'WHERE' not in _test_history_sql(0)
+        assert 'schema_file = ? AND method = ? AND path = ?' in _test_history_sql(0b111)
+        
+        plan = db.conn.execute(
+            "EXPLAIN QUERY PLAN " + _test_history_sql(0b111), ('api.yaml', 'GET', '/users', 10)
+        ).fetchall()
+        assert 'idx_test_results_full' in ' '.join(row[3] for row in plan)
+    
+    def test_history_schema_identifier_memoized(self, db, tmp_path, monkeypatch):
+        """Test that TestHistory resolves each schema path once"""
+        import os
+        from apitest.storage.history import TestHistory
+        schema = tmp_path / "api.yaml"
+        schema.write_text("openapi: 3.0.0")
+        history = TestHistory(db)
+        assert history._normalize_schema_identifier(str(schema)) == os.path.abspath(schema)
+        
+        monkeypatch.setattr(os.path, 'exists', lambda path: pytest.fail("stat() repeated"))
+        assert history.get_test_history(str(schema)) == []
+        assert history.get_baseline(str(schema), 'GET', '/users') is None
+    
+    def test_history_extracts_response_schema(self, db):
+        """Test baseline schema types, including bool vs int and subclasses"""
+        from collections import OrderedDict
+        from apitest.storage.history import TestHistory
+        body = {
+            'id': 1, 'active': True, 'score': 1.5, 'name': 'a', 'note': None,
+            'tags': [], 'items': [{'id': 1}], 'meta': OrderedDict()
+        }
+        schema = TestHistory(db)._extract_schema_from_response(body)
+        assert schema == {'type': 'object', 'properties': {
+            'id': {'type': 'integer'}, 'active': {'type': 'boolean'},
+            'score': {'type': 'number'}, 'name': {'type': 'string'},
+            'note': {'type': 'string'}, 'tags': {'type': 'array'},
+            'items': {'type': 'array', 'items': {'type': 'object'}},
+            'meta': {'type': 'object'}
+        }}
+    
+    def test_get_test_history_filters_and_types(self, db):
+        """Test filtering and boolean coercion in get_test_history"""
+        db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200, schema_mismatch=True)
+        db.save_test_result('api.yaml', 'POST', '/users', 'pass', 201)
+        db.save_test_result('other.yaml', 'GET', '/users', 'pass', 200)
+        
+        history = db.get_test_history(schema_file='api.yaml', method='get')
+        assert len(history) == 1
+        assert history[0]['path'] == '/users'
+        assert history[0]['schema_mismatch'] is True
+        assert history[0]['auth_succeeded'] is True
+        assert 'timestamp' in history[0]
+    
+    def test_get_test_history_date_filters(self, db):
+        """Test that date filters compare against the stored Unix seconds"""
+        from datetime import datetime, timedelta, timezone
+        db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.conn.execute("UPDATE test_results SET timestamp = strftime('%s', '2024-01-01 12:00:00')")
+        db.conn.commit()
+        
+        assert db.get_test_history()[0]['timestamp'] == '2024-01-01 12:00:00'
+        assert len(db.get_test_history(start_date=datetime(2024, 1, 1, 6))) == 1
+        assert db.get_test_history(end_date=datetime(2024, 1, 1, 6)) == []
+        
+        plus_two = timezone(timedelta(hours=2))
+        assert len(db.get_test_history(end_date=datetime(2024, 1, 1, 14, tzinfo=plus_two))) == 1
+        assert db.get_test_history(start_date=datetime(2024, 1, 1, 14, 30, tzinfo=plus_two)) == []
+    
+    def test_get_test_history_json(self, db):
+        """Test that the JSON history matches the dict history"""
+        db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200, response_time_ms=5.0)
+        db.save_test_result('api.yaml', 'POST', '/users', 'fail', 500, error_message='boom')
+        
+        db.save_test_result('api.yaml', 'GET', '/orders', 'pass', 200)
+        
+        as_json = json.loads(db.get_test_history_json(schema_file='api.yaml'))
+        as_dicts = db.get_test_history(schema_file='api.yaml')
+        assert as_json == as_dicts
+        # Same-second rows fall back to newest id first
+        assert [r['id'] for r in as_json] == sorted((r['id'] for r in as_json), reverse=True)
+        assert json.loads(db.get_test_history_json(schema_file='api.yaml', limit=2)) == as_dicts[:2]
+    
+    def test_get_test_history_json_empty(self, db):
+        """Test JSON history with no matching rows"""
+        assert json.loads(db.get_test_history_json(schema_file='missing.yaml')) == []
+    
+    def test_get_all_baselines(self, db):
+        """Test reading all baselines with decoded response schemas"""
+        db.establish_baseline('api.yaml', 'GET', '/users', 200, 10.0, {'type': 'object'})
+        db.establish_baseline('api.yaml', 'POST', '/users', 201, 20.0)
+        
+        baselines = db.get_all_baselines('api.yaml')
+        assert [b['method'] for b in baselines] == ['GET', 'POST']
+        assert baselines[0]['response_schema'] == {'type': 'object'}
+        assert baselines[1]['response_schema'] is None
+
+
+class TestPayloadEncoding:
+    """Test compressed request/response payload storage"""
+    
+    def test_round_trip(self):
+        """Test that encoded payloads decode to the original value"""
+        payload = {'users': [{'id': i, 'name': f'User {i}'} for i in range(50)]}
+        encoded = encode_payload(payload)
+        
+        assert isinstance(encoded, bytes)
+        assert len(encoded) < len(json.dumps(payload))
+        assert decode_payload(encoded) == payload
+    
+    def test_empty_payload(self):
+        """Test that empty payloads are stored as NULL"""
+        assert encode_payload(None) is None
+        assert encode_payload({}) is None
+        assert decode_payload(None) is None
+    
+    def test_headers_use_preset_dictionary(self, db):
+        """Test that header payloads compress against the versioned dictionary and round-trip"""
+        headers = {
+            'Content-Type': 'application/json; charset=utf-8',
+            'Cache-Control': 'no-cache, no-store, must-revalidate',
+            'Connection': 'keep-alive',
+            'Date': 'Wed, 14 Oct 2026 10:11:12 GMT',
+        }
+        encoded = encode_payload(headers, HEADER_ZDICT_VERSION)
+        assert encoded[0] == HEADER_ZDICT_VERSION
+        assert len(encoded) < len(encode_payload(headers))
+        assert decode_payload(encoded) == headers
+        
+        test_id = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.save_request_response(test_id, 'GET', '/users', response_headers=headers)
+        assert db.get_request_responses(test_id)[0]['response_headers'] == headers
+    
+    def test_decode_legacy_dictionary_headers(self):
+        """Test decoding headers stored before dictionary version ids"""
+        headers = {'Content-Type': 'application/json', 'Server': 'nginx'}
+        compressor = zlib.compressobj(3, zdict=_LEGACY_HEADER_ZDICT)
+        stored = compressor.compress(json.dumps(headers).encode()) + compressor.flush()
+        assert decode_payload(stored) == headers
+    
+    def test_decode_legacy_text(self):
+        """Test decoding JSON TEXT written by older versions"""
+        assert decode_payload('{"id": 1}') == {'id': 1}
+    
+    def test_saved_payload_is_compressed(self, db):
+        """Test that save_request_response stores compressed bodies"""
+        test_id = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.save_request_response(test_id, 'GET', '/users', response_body={'id': 1})
+        
+        stored = db.conn.execute(
+            "SELECT response_body FROM request_response_storage WHERE test_result_id = ?", (test_id,)
+        ).fetchone()[0]
+        assert isinstance(stored, bytes)
+        assert decode_payload(stored) == {'id': 1}
+    
+    def test_get_response_body_streams_large_blob(self, db):
+        """Test reading a body larger than one chunk back from its BLOB"""
+        body = {'items': [{'id': i, 'token': f'{i:x}' * 8} for i in range(20000)]}
+        test_id = db.save_test_result('api.yaml', 'GET', '/items', 'pass', 200)
+        db.save_request_response(test_id, 'GET', '/items', response_body=body)
+        rr_id = db.get_request_responses(test_id, include_response_body=False)[0]['id']
+        
+        assert db.get_response_body(rr_id) == body
+        assert db.get_response_body(rr_id + 1) is None
+    
+    def test_get_response_body_legacy_text(self, db):
+        """Test that uncompressed JSON TEXT bodies are still readable"""
+        test_id = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.save_request_response(test_id, 'GET', '/users', response_body={'id': 1})
+        db.conn.execute("UPDATE request_response_storage SET response_body = '{\"id\": 2}'")
+        rr_id = db.get_request_responses(test_id)[0]['id']
+        
+        assert db.get_response_body(rr_id) == {'id': 2}
+    
+    def test_skip_response_body(self, db):
+        """Test that list reads can leave response bodies unloaded"""
+        test_id = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.save_request_response(test_id, 'GET', '/users', request_body={'q': 1}, response_body={'id': 1})
+        
+        row = db.get_request_responses(test_id, include_response_body=False)[0]
+        assert row['response_body'] is None
+        assert row['request_body'] == {'q': 1}
+
+
+class TestTransactions:
+    """Test explicit transaction handling"""
+    
+    def test_transaction_commits_once(self, db):
+        """Test that writes inside transaction() are committed on exit"""
+        with db.transaction():
+            db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+            db.save_test_result('api.yaml', 'GET', '/posts', 'pass', 200)
+            assert db.conn.in_transaction
+        
+        assert not db.conn.in_transaction
+        assert len(db.get_test_history(schema_file='api.yaml')) == 2
+    
+    def test_transaction_rolls_back_on_error(self, db):
+        """Test that an exception discards writes made in the block"""
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+                raise RuntimeError("boom")
+        
+        assert db.get_test_history(schema_file='api.yaml') == []
+    
+    def test_nested_transaction_joins_outer(self, db):
+        """Test that bulk writes inside transaction() do not commit early"""
+        with db.transaction():
+            db.save_test_results_bulk([
+                ('api.yaml', 'GET', '/users', 'pass', 200, 200, 1.0, None, False, 0, 1, True),
+            ])
+            assert db.conn.in_transaction
+        
+        assert len(db.get_test_history(schema_file='api.yaml')) == 1
+    
+    def test_autocommit_disabled_commits_on_close(self, tmp_path):
+        """Test that autocommit=False defers writes until close()"""
+        db_path = tmp_path / "test.db"
+        database = Database(db_path, autocommit=False)
+        database.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        assert database.conn.in_transaction
+        database.close()
+        
+        reopened = Database(db_path)
+        assert len(reopened.get_test_history(schema_file='api.yaml')) == 1
+        reopened.close()
+    
+    def test_begin_commit(self, db):
+        """Test grouping writes with explicit begin()/commit()"""
+        db.begin()
+        db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.save_test_result('api.yaml', 'GET', '/orders', 'pass', 200)
+        assert db.conn.in_transaction
+        db.commit()
+        
+        assert not db.conn.in_transaction
+        assert len(db.get_test_history(schema_file='api.yaml')) == 2
+    
+    def test_begin_rollback(self, db):
+        """Test discarding writes with explicit rollback()"""
+        db.begin()
+        db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.rollback()
+        
+        assert db.get_test_history(schema_file='api.yaml') == []
+    
+    def test_nested_rollback_fails_outer_commit(self, db):
+        """Test that a nested rollback() rolls back the whole transaction"""
+        db.begin()
+        db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.begin()
+        db.rollback()
+        with pytest.raises(sqlite3.OperationalError):
+            db.commit()
+        
+        assert db.get_test_history(schema_file='api.yaml') == []
+        assert db._transaction_depth == 0
+    
+    def test_context_manager_rolls_back_on_error(self, tmp_path):
+        """Test that leaving a with-block by exception discards pending writes"""
+        db_path = tmp_path / "test.db"
+        with pytest.raises(RuntimeError):
+            with Database(db_path, autocommit=False) as database:
+                database.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+                raise RuntimeError("boom")
+        
+        with Database(db_path) as reopened:
+            assert reopened.get_test_history(schema_file='api.yaml') == []
+    
+    def test_writes_are_explicit_transactions(self, tmp_path):
+        """Test that single writes commit on their own without implicit BEGIN"""
+        db_path = tmp_path / "test.db"
+        database = Database(db_path)
+        assert database.conn.isolation_level is None
+        
+        database.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        assert not database.conn.in_transaction
+        other = sqlite3.connect(str(db_path))
+        assert other.execute("SELECT COUNT(*) FROM test_results").fetchone()[0] == 1
+        other.close()
+        database.close()
+    
+    def test_failed_write_is_atomic(self, db):
+        """Test that a write failing midway leaves nothing behind"""
+        test_id = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        with pytest.raises(TypeError):
+            db.save_request_response(test_id, 'GET', '/orders', request_headers={'x': object()})
+        
+        assert not db.conn.in_transaction
+        assert db.conn.execute("SELECT COUNT(*) FROM endpoints").fetchone()[0] == 0
+    
+    def test_rollback_covers_ai_writers(self, db):
+        """Test that AI table writes join the surrounding transaction"""
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+                db.save_ai_test_case('api.yaml', 'GET', '/users', {'test_scenario': 'x'})
+                raise RuntimeError("boom")
+        
+        assert db.get_test_history(schema_file='api.yaml') == []
+        assert db.conn.execute("SELECT COUNT(*) FROM ai_test_cases").fetchone()[0] == 0
+    
+    def test_autocommit_disabled_applies_to_all_writers(self, db):
+        """Test that AI/pattern writers don't flush writes when autocommit is off"""
+        db.autocommit = False
+        db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        db.save_pattern('field', {'name': 'email'})
+        assert db.conn.in_transaction
+    
+    def test_history_save_uses_one_transaction(self, db, monkeypatch):
+        """Test that TestHistory.save_test_results commits once per run"""
+        from apitest.storage.history import TestHistory
+        from apitest.tester import TestResults, TestResult, TestStatus
+        
+        results = TestResults()
+        for path in ('/users', '/orders', '/items'):
+            results.add_result(TestResult(
+                method='GET', path=path, status=TestStatus.FAIL,
+                status_code=500, expected_status=200, response_time_ms=1.0
+            ))
+        
+        commits = []
+        monkeypatch.setattr(db, '_after_commit', lambda: commits.append(1))
+        
+        assert TestHistory(db).save_test_results('api.yaml', results) == 3
+        assert len(commits) == 1
+    
+    def test_history_save_bulk_payloads(self, db):
+        """Test that payloads are stored against their results, skipping bad ones"""
+        from apitest.storage.history import TestHistory
+        from apitest.tester import TestResults, TestResult, TestStatus
+        
+        results = TestResults()
+        for path, body in (('/users', {'id': 1}), ('/bad', {'x': object()}), ('/items', {'id': 3})):
+            result = TestResult(method='GET', path=path, status=TestStatus.FAIL,
+                                status_code=500, response_body=body)
+            result.request_headers = {'Accept': 'application/json'}
+            results.add_result(result)
+        
+        assert TestHistory(db).save_test_results('api.yaml', results) == 3
+        
+        saved = {}
+        for row in db.get_test_history(schema_file='api.yaml'):
+            payloads = db.get_request_responses(row['id'])
+            saved[row['path']] = payloads[0]['response_body'] if payloads else None
+        assert saved == {'/users': {'id': 1}, '/bad': None, '/items': {'id': 3}}
+    
+    def test_history_save_survives_baseline_failure(self, db):
+        """Test that a baseline insert failing in SQLite keeps the run's results"""
+        from apitest.storage.history import TestHistory
+        from apitest.tester import TestResults, TestResult, TestStatus
+        
+        db.conn.execute("""
+            CREATE TRIGGER fail_baselines BEFORE INSERT ON baselines
+            BEGIN SELECT RAISE(ABORT, 'baseline insert failed'); END
+        """)
+        results = TestResults()
+        for path in ('/users', '/orders'):
+            result = TestResult(method='GET', path=path, status=TestStatus.PASS,
+                                status_code=200, response_body={'id': 1})
+            result.request_headers = {'Accept': 'application/json'}
+            results.add_result(result)
+        
+        assert TestHistory(db).save_test_results('api.yaml', results) == 2
+        
+        rows = db.get_test_history(schema_file='api.yaml')
+        assert {row['path'] for row in rows} == {'/users', '/orders'}
+        assert all(db.get_request_responses(row['id']) for row in rows)
+        assert db.get_all_baselines('api.yaml') == []
+    
+    def test_savepoint_rolls_back_only_its_block(self, db):
+        """Test that a failed savepoint block keeps the outer transaction's writes"""
+        with db.transaction():
+            db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+            with pytest.raises(RuntimeError):
+                with db.savepoint():
+                    db.save_test_result('api.yaml', 'GET', '/orders', 'pass', 200)
+                    raise RuntimeError("boom")
+        
+        assert [row['path'] for row in db.get_test_history(schema_file='api.yaml')] == ['/users']
+
+
+class TestIndexes:
+    """Test query indexes"""
+    
+    def test_history_uses_full_endpoint_index(self, db):
+        """Test that endpoint-filtered history queries use the composite index"""
+        plan = db.conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT * FROM test_results
+            WHERE schema_file = ? AND method = ? AND path = ?
+            ORDER BY timestamp DESC LIMIT 10
+        """, ('api.yaml', 'GET', '/users')).fetchall()
+        
+        details = ' '.join(row[-1] for row in plan)
+        assert 'idx_test_results_full' in details
+        assert 'TEMP B-TREE' not in details
+
+
+class TestEndpoints:
+    """Test the endpoints lookup table used by request/response storage"""
+    
+    def test_endpoint_rows_are_shared(self, db):
+        """Test that repeated method/path pairs reuse one endpoints row"""
+        test_id = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        for _ in range(3):
+            db.save_request_response(test_id, 'GET', '/users', response_body={'ok': True})
+        db.save_request_response(test_id, 'POST', '/users')
+        
+        assert db.conn.execute("SELECT COUNT(*) FROM endpoints").fetchone()[0] == 2
+        assert db._endpoint_ids[('GET', '/users')] == db._endpoint_id('GET', '/users')
+    
+    def test_get_request_responses(self, db):
+        """Test reading payloads back with their endpoint"""
+        test_id = db.save_test_result('api.yaml', 'POST', '/users', 'pass', 201)
+        db.save_request_response(
+            test_id, 'POST', '/users', request_body={'name': 'a'},
+            request_params={'dry_run': 'true'}, response_status_code=201,
+            response_body={'id': 1}
+        )
+        
+        rows = db.get_request_responses(test_id)
+        assert len(rows) == 1
+        assert rows[0]['request_method'] == 'POST'
+        assert rows[0]['request_path'] == '/users'
+        assert rows[0]['request_body'] == {'name': 'a'}
+        assert rows[0]['request_params'] == {'dry_run': 'true'}
+        assert rows[0]['response_body'] == {'id': 1}
+    
+    def test_rollback_forgets_endpoint_ids(self, db):
+        """Test that ids inserted by a rolled-back transaction are not reused"""
+        test_id = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.save_request_response(test_id, 'GET', '/orders')
+                raise RuntimeError("boom")
+        
+        assert db._endpoint_ids == {}
+        db.save_request_response(test_id, 'GET', '/orders')
+        assert db.get_request_responses(test_id)[0]['request_path'] == '/orders'
+    
+    def test_migrates_legacy_request_response_table(self, tmp_path):
+        """Test that v2 databases are rebuilt to reference endpoints"""
+        db_path = tmp_path / "legacy.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.executescript("""
+            CREATE TABLE schema_versions (
+                version INTEGER PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                description TEXT
+            );
+            INSERT INTO schema_versions (version) VALUES (1), (2);
+            CREATE TABLE request_response_storage (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                test_result_id INTEGER,
+                request_method TEXT NOT NULL,
+                request_path TEXT NOT NULL,
+                request_headers TEXT,
+                request_body TEXT,
+                request_params TEXT,
+                response_status_code INTEGER,
+                response_headers TEXT,
+                response_body TEXT,
+                response_time_ms REAL,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            INSERT INTO request_response_storage (test_result_id, request_method, request_path, response_body)
+            VALUES (7, 'GET', '/users', '{"id": 1}'), (7, 'GET', '/users', '{"id": 2}');
+        """)
+        conn.close()
+        
+        database = Database(db_path)
+        columns = {row[1] for row in database.conn.execute("PRAGMA table_info(request_response_storage)")}
+        assert 'endpoint_id' in columns
+        assert 'request_method' not in columns
+        
+        rows = database.get_request_responses(7)
+        assert [r['response_body'] for r in rows] == [{'id': 1}, {'id': 2}]
+        assert {(r['request_method'], r['request_path']) for r in rows} == {('GET', '/users')}
+        assert database.conn.execute("SELECT MAX(version) FROM schema_versions").fetchone()[0] == CURRENT_SCHEMA_VERSION
+        database.close()
+
+
+class TestReaderConnections:
+    """Test per-thread reader connections alongside the writer"""
+    
+    def test_reads_use_separate_connection(self, db):
+        """Test that reads outside a transaction bypass the writer"""
+        reader = db._read_conn()
+        assert reader is not db.conn
+        assert db._read_conn() is reader
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM test_results")
+    
+    def test_each_thread_gets_its_own_reader(self, db):
+        """Test that reader connections are not shared between threads"""
+        import threading
+        main_reader = db._read_conn()
+        seen = []
+        
+        def read():
+            seen.append(db._read_conn() is main_reader)
+            seen.append(len(db._readers))
+        
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        
+        assert seen == [False, 2]
+        db.close()
+        assert db._readers == []
+    
+    def test_reader_closed_when_thread_exits(self, db):
+        """Test that worker threads don't leave reader connections behind"""
+        from concurrent.futures import ThreadPoolExecutor
+        for _ in range(5):
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                list(pool.map(lambda _: db.get_test_history(), range(8)))
+        
+        import gc
+        gc.collect()
+        assert db._readers == []
+    
+    def test_transaction_reads_own_writes(self, db):
+        """Test that reads inside a transaction see its uncommitted rows"""
+        with db.transaction():
+            db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+            assert db._read_conn() is db.conn
+            assert len(db.get_test_history(schema_file='api.yaml')) == 1
+    
+    def test_other_threads_read_committed_data(self, db):
+        """Test that other threads don't see a transaction's pending rows"""
+        import threading
+        db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        counts = []
+        
+        def read():
+            counts.append(len(db.get_test_history(schema_file='api.yaml')))
+        
+        with db.transaction():
+            db.save_test_result('api.yaml', 'GET', '/orders', 'pass', 200)
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        
+        assert counts == [1]
+        assert len(db.get_test_history(schema_file='api.yaml')) == 2
+    
+    def test_get_request_bodies(self, db):
+        """Test reading request bodies through the reader connection"""
+        test_id = db.save_test_result('api.yaml', 'POST', '/users', 'pass', 201)
+        db.save_request_response(test_id, 'POST', '/users', request_body={'name': 'a'})
+        
+        assert db.get_request_bodies([test_id]) == [{'name': 'a'}]
+        assert db.get_request_bodies([]) == []
+    
+    def test_no_readers_without_wal(self, tmp_path):
+        """Test that rollback-journal databases read through the writer"""
+        database = Database(tmp_path / "test.db", journal_mode=None)
+        assert database._read_conn() is database.conn
+        database.close()
+
+
+class TestResultsTable:
+    """Test the test_results table layout"""
+    
+    def test_same_second_repeat_runs_are_kept(self, db):
+        """Test that identical results saved in the same second don't collide"""
+        first = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        second = db.save_test_result('api.yaml', 'GET', '/users', 'pass', 200)
+        
+        assert first != second
+        assert len(db.get_test_history(schema_file='api.yaml')) == 2
+    
+    def test_migrates_unique_constraint_away(self, tmp_path):
+        """Test that v3 databases are rebuilt without the UNIQUE constraint"""
+        db_path = tmp_path / "legacy.db"
+        conn = sqlite3.connect(str(db_path))
+        conn.executescript("""
+            CREATE TABLE schema_versions (
+                version INTEGER PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                description TEXT
+            );
+            INSERT INTO schema_versions (version) VALUES (1), (2), (3);
+            CREATE TABLE test_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                schema_file TEXT NOT NULL,
+                method TEXT NOT NULL,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                status_code INTEGER,
+                expected_status INTEGER,
+                response_time_ms REAL,
+                error_message TEXT,
+                schema_mismatch BOOLEAN DEFAULT 0,
+                response_size_bytes INTEGER DEFAULT 0,
+                auth_attempts INTEGER DEFAULT 1,
+                auth_succeeded BOOLEAN DEFAULT 1,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(schema_file, method, path, timestamp)
+            );
+            INSERT INTO test_results (id, schema_file, method, path, status, timestamp)
+            VALUES (5, 'api.yaml', 'GET', '/users', 'pass', '2024-01-01 00:00:00');
+        """)
+        conn.close()
+        
+        database = Database(db_path)
+        indexes = {row[0] for row in database.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'test_results'"
+        )}
+        assert not any(name.startswith('sqlite_autoindex') for name in indexes)
+        assert {'idx_test_results_schema', 'idx_test_results_path', 'idx_test_results_full'} <= indexes
+        
+        history = database.get_test_history(schema_file='api.yaml')
+        assert [(r['id'], r['timestamp']) for r in history] == [(5, '2024-01-01 00:00:00')]
+        database.close()
+    
+    def test_migrates_text_timestamps(self, tmp_path):
+        """Test that v5 tables are rebuilt with Unix-second timestamps"""
+        db_path = tmp_path / "v5.db"
+        Database(db_path).close()
+        conn = sqlite3.connect(str(db_path))
+        conn.executescript("""
+            DROP TABLE test_results;
+            CREATE TABLE test_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                schema_file TEXT NOT NULL,
+                method TEXT NOT NULL,
+                path TEXT NOT NULL,
+                status TEXT NOT NULL,
+                status_code INTEGER,
+                expected_status INTEGER,
+                response_time_ms REAL,
+                error_message TEXT,
+                schema_mismatch BOOLEAN DEFAULT 0,
+                response_size_bytes INTEGER DEFAULT 0,
+                auth_attempts INTEGER DEFAULT 1,
+                auth_succeeded BOOLEAN DEFAULT 1,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            INSERT INTO test_results (id, schema_file, method, path, status, timestamp)
+            VALUES (3, 'api.yaml', 'GET', '/users', 'pass', '2024-01-01 12:00:00');
+            DELETE FROM schema_versions WHERE version >= 6;
+            PRAGMA user_version = 5;
+        """)
+        conn.close()
+        
+        database = Database(db_path)
+        stored = database.conn.execute("SELECT typeof(timestamp), timestamp FROM test_results").fetchone()
+        assert tuple(stored) == ('integer', 1704110400)
+        
+        database.save_test_result('api.yaml', 'GET', '/orders', 'pass', 200)
+        history = database.get_test_history()
+        assert history[-1]['timestamp'] == '2024-01-01 12:00:00'
+        assert history[0]['path'] == '/orders'
+        assert json.loads(database.get_test_history_json())[-1]['timestamp'] == '2024-01-01 12:00:00'
+        database.close()
+
+
+class TestBaselineCache:
+    """Test the in-process baseline lookup cache"""
+    
+    def test_baselines_loaded_once(self, db, monkeypatch):
+        """Test that repeated lookups reuse one bulk load"""
+        db.establish_baseline('api.yaml', 'GET', '/users', 200, 10.0, {'type': 'object'})
+        db.establish_baseline('api.yaml', 'GET', '/orders', 200, 12.0)
+        
+        loads = []
+        original = db.get_all_baselines
+        monkeypatch.setattr(db, 'get_all_baselines', lambda *a: loads.append(1) or original(*a))
+        
+        for _ in range(3):
+            assert db.get_baseline('api.yaml', 'get', '/users')['response_schema'] == {'type': 'object'}
+            assert db.get_baseline('api.yaml', 'GET', '/orders')['response_time_ms'] == 12.0
+            assert db.get_baseline('api.yaml', 'GET', '/missing') is None
+        assert loads == [1]
+    
+    def test_baseline_keys(self, db):
+        """Test listing the endpoints of one schema that have a baseline"""
+        db.establish_baseline('api.yaml', 'GET', '/users', 200, 10.0)
+        db.establish_baseline('api.yaml', 'POST', '/users', 201, 10.0)
+        db.establish_baseline('other.yaml', 'GET', '/orders', 200, 10.0)
+        
+        assert db.get_baseline_keys('api.yaml') == {('GET', '/users'), ('POST', '/users')}
+        assert db.get_baseline_keys('missing.yaml') == set()
+    
+    def test_establish_updates_cache(self, db):
+        """Test that new and replaced baselines are visible without a reload"""
+        assert db.get_baseline('api.yaml', 'GET', '/users') is None
+        
+        db.establish_baseline('api.yaml', 'GET', '/users', 200, 10.0)
+        assert db.get_baseline('api.yaml', 'GET', '/users')['status_code'] == 200
+        
+        db.establish_baseline('api.yaml', 'GET', '/users', 201, 8.0, {'type': 'array'})
+        baseline = db.get_baseline('api.yaml', 'GET', '/users')
+        assert (baseline['status_code'], baseline['response_schema']) == (201, {'type': 'array'})
+    
+    def test_update_keeps_baseline_id(self, db):
+        """Test that re-establishing a baseline updates the row in place"""
+        db.establish_baseline('api.yaml', 'GET', '/users', 200, 10.0)
+        first_id = db.get_all_baselines()[0]['id']
+        
+        db.establish_baseline('api.yaml', 'GET', '/users', 201, 8.0)
+        baselines = db.get_all_baselines()
+        assert [(b['id'], b['status_code']) for b in baselines] == [(first_id, 201)]
+    
+    def test_returned_baseline_is_a_copy(self, db):
+        """Test that mutating a result doesn't change the cached entry"""
+        db.establish_baseline('api.yaml', 'GET', '/users', 200, 10.0)
+        db.get_baseline('api.yaml', 'GET', '/users')['status_code'] = 500
+        assert db.get_baseline('api.yaml', 'GET', '/users')['status_code'] == 200
+    
+    def test_rollback_invalidates_cache(self, db):
+        """Test that baselines from a rolled-back transaction are forgotten"""
+        db.get_baseline('api.yaml', 'GET', '/users')
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.establish_baseline('api.yaml', 'GET', '/users', 200, 10.0)
+                raise RuntimeError("boom")
+        
+        assert db.get_baseline('api.yaml', 'GET', '/users') is None
+
+
+class TestIndexes:
+    """Test that getters are served by the composite indexes"""
+    
+    def test_status_filter_reads_rows_in_order(self, db):
+        """Test that status + schema_file lookups need no separate sort"""
+        plan = db.conn.execute("""
+            EXPLAIN QUERY PLAN
+            SELECT * FROM ai_test_cases WHERE validation_status = ? AND schema_file = ?
+            ORDER BY created_at DESC LIMIT ?
+        """, ('approved', 'api.yaml', 10)).fetchall()
+        details = ' '.join(row[3] for row in plan)
+        assert 'idx_ai_test_cases_status_schema' in details
+        assert 'TEMP B-TREE' not in details
+    
+    def test_ai_getters_avoid_sorts(self, db):
+        """Test that feedback, prompt and pattern getters read in index order"""
+        from apitest.storage.database import (
+            _SQL_GET_FEEDBACK_CORPUS, _SQL_GET_VALIDATIONS_BY_TEST_CASE,
+            _SQL_GET_ACTIVE_AI_PROMPT, _SQL_SELECT_PATTERNS_BY_TYPE
+        )
+        for sql, params in (
+            (_SQL_GET_FEEDBACK_CORPUS, (10,)),
+            (_SQL_GET_VALIDATIONS_BY_TEST_CASE, (1,)),
+            (_SQL_GET_ACTIVE_AI_PROMPT, ('generate',)),
+            (_SQL_SELECT_PATTERNS_BY_TYPE, (0.0, 'data_generation')),
+        ):
+            plan = db.conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+            details = ' '.join(row[3] for row in plan)
+            assert 'USING INDEX' in details or 'USING COVERING INDEX' in details
+            assert 'TEMP B-TREE' not in details, sql
+    
+    def test_migration_replaces_narrow_indexes(self, tmp_path):
+        """Test that v4 databases swap the single-column AI indexes"""
+        db_path = tmp_path / "v4.db"
+        Database(db_path).close()
+        conn = sqlite3.connect(str(db_path))
+        conn.executescript("""
+            DROP INDEX idx_ai_test_cases_status_schema;
+            CREATE INDEX idx_ai_test_cases_status ON ai_test_cases(validation_status);
+            DELETE FROM schema_versions WHERE version >= 5;
+            PRAGMA user_version = 4;
+        """)
+        conn.close()
+        
+        database = Database(db_path)
+        names = {row[0] for row in database.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'ai_test_cases'"
+        )}
+        assert 'idx_ai_test_cases_status' not in names
+        assert 'idx_ai_test_cases_status_schema' in names
+        database.close()
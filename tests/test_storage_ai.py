@@ -23,8 +23,8 @@ class TestDatabaseSchema:
     """Test database schema and migrations"""
     
     def test_schema_version(self):
-        """Test that schema version is 2"""
-        assert CURRENT_SCHEMA_VERSION == 2
+        """Test that schema version is 4"""
+        assert CURRENT_SCHEMA_VERSION == 7
     
     def test_database_initialization(self, tmp_path):
         """Test database initialization creates all tables"""
@@ -63,13 +63,53 @@ class TestDatabaseSchema:
         # Check schema version was recorded
         cursor.execute("SELECT MAX(version) FROM schema_versions")
         version = cursor.fetchone()[0]
-        assert version == 2
+        assert version == 7
         
         # Check AI tables were created
         cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='ai_test_cases'")
         assert cursor.fetchone() is not None
         
         db.close()
+    
+    def test_wal_journal_mode_enabled(self, tmp_path):
+        """Test that databases open in WAL mode by default"""
+        db = Database(tmp_path / "test.db")
+        
+        mode = db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == 'wal'
+        
+        db.close()
+    
+    def test_journal_mode_opt_out(self, tmp_path):
+        """Test that journal_mode=None keeps SQLite defaults"""
+        db = Database(tmp_path / "test.db", journal_mode=None)
+        
+        mode = db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == 'delete'
+        
+        db.close()
+    
+
+class TestResultsNamespace:
+    """Test ResultsNamespace"""
+    
+    def test_bulk_saves(self, tmp_path):
+        """Test the bulk save wrappers"""
+        storage = Storage(tmp_path / "test.db")
+        
+        ids = storage.results.save_test_results_bulk([
+            ('test.yaml', 'POST', '/users', 'pass', 201, 201, 4.0, None, False, 10, 1, True),
+            ('test.yaml', 'GET', '/users', 'pass', 200, 200, 2.0, None, False, 20, 1, True),
+        ], return_ids=True)
+        assert len(ids) == 2
+        
+        saved = storage.results.save_request_responses_bulk([
+            (ids[0], 'POST', '/users', None, {'name': 'Test User'}, None, 201, None, {'id': 1}, 4.0),
+        ])
+        assert saved == 1
+        assert len(storage.results.get_test_history(schema_file='test.yaml')) == 2
+        
+        storage.close()
 
 
 class TestAITestsNamespace:
@@ -107,6 +147,26 @@ class TestAITestsNamespace:
         
         storage.close()
     
+    def test_test_case_json_stored_as_blob(self, tmp_path):
+        """Test JSON is stored as a BLOB and legacy TEXT rows still decode"""
+        storage = Storage(tmp_path / "test.db")
+        
+        new_id = storage.ai_tests.save_test_case('test.yaml', 'GET', '/users', {'a': 1})
+        conn = storage._db.conn
+        storage_class = conn.execute(
+            "SELECT typeof(test_case_json) FROM ai_test_cases WHERE id = ?", (new_id,)
+        ).fetchone()[0]
+        assert storage_class == 'blob'
+        
+        legacy_id = conn.execute(
+            "INSERT INTO ai_test_cases (schema_file, method, path, test_case_json) "
+            "VALUES ('test.yaml', 'GET', '/legacy', ?)", ('{"b": 2}',)
+        ).lastrowid
+        assert storage.ai_tests.get_test_case(legacy_id)['test_case_json'] == {'b': 2}
+        assert storage.ai_tests.get_test_case(new_id)['test_case_json'] == {'a': 1}
+        
+        storage.close()
+    
     def test_get_test_cases_by_endpoint(self, tmp_path):
         """Test getting test cases by endpoint"""
         storage = Storage(tmp_path / "test.db")
@@ -156,6 +216,36 @@ class TestAITestsNamespace:
         
         storage.close()
     
+    def test_save_test_cases_bulk(self, tmp_path):
+        """Test saving several test cases in one call"""
+        storage = Storage(tmp_path / "test.db")
+        
+        saved = storage.ai_tests.save_test_cases_bulk([
+            ('test.yaml', 'post', '/users', {'test': '1'}),
+            ('test.yaml', 'GET', '/users', {'test': '2'}, 'approved', 2),
+        ])
+        assert saved == 2
+        
+        test_cases = storage.ai_tests.get_test_cases_by_endpoint('test.yaml', 'POST', '/users')
+        assert test_cases[0]['test_case_json'] == {'test': '1'}
+        assert test_cases[0]['validation_status'] == 'pending'
+        validated = storage.ai_tests.get_validated_test_cases()
+        assert [(tc['path'], tc['version']) for tc in validated] == [('/users', 2)]
+        
+        storage.close()
+    
+    def test_list_without_test_case_json(self, tmp_path):
+        """Test that list getters can skip loading test_case_json"""
+        storage = Storage(tmp_path / "test.db")
+        storage.ai_tests.save_test_case('test.yaml', 'POST', '/users', {'test': '1'}, 'approved')
+        
+        test_cases = storage._db.get_validated_ai_test_cases(load_json=False)
+        assert test_cases[0]['path'] == '/users'
+        assert test_cases[0]['test_case_json'] is None
+        assert storage._db.get_all_ai_test_cases()[0]['test_case_json'] == {'test': '1'}
+        
+        storage.close()
+    
     def test_delete_test_case(self, tmp_path):
         """Test deleting test case"""
         storage = Storage(tmp_path / "test.db")
@@ -222,6 +312,24 @@ class TestValidationFeedbackNamespace:
         
         storage.close()
     
+    def test_save_validations_bulk(self, tmp_path):
+        """Test saving several validations in one call"""
+        storage = Storage(tmp_path / "test.db")
+        test_case_id = storage.ai_tests.save_test_case('test.yaml', 'POST', '/users', {'test': 'data'})
+        
+        saved = storage.validation_feedback.save_validations_bulk([
+            (test_case_id, 'approved'),
+            (test_case_id, 'rejected', 'Wrong status', {'field': 'status'}, 'user1'),
+        ])
+        assert saved == 2
+        
+        validations = storage.validation_feedback.get_validations_by_test_case(test_case_id)
+        assert sorted(v['status'] for v in validations) == ['approved', 'rejected']
+        rejected = next(v for v in validations if v['status'] == 'rejected')
+        assert rejected['annotations_json'] == {'field': 'status'}
+        
+        storage.close()
+    
     def test_get_feedback_corpus(self, tmp_path):
         """Test getting feedback corpus"""
         storage = Storage(tmp_path / "test.db")
@@ -238,6 +346,25 @@ class TestValidationFeedbackNamespace:
         
         storage.close()
     
+    def test_iter_feedback_corpus(self, tmp_path):
+        """Test streaming the feedback corpus matches the list form"""
+        storage = Storage(tmp_path / "test.db")
+        
+        test_case_id = storage.ai_tests.save_test_case(
+            'test.yaml', 'POST', '/users', {'test': 'data'}
+        )
+        storage.validation_feedback.save_validation(
+            test_case_id, 'rejected', 'Bad', {'field': 'status'}
+        )
+        
+        stream = storage.validation_feedback.iter_feedback_corpus()
+        assert not isinstance(stream, list)
+        streamed = list(stream)
+        assert streamed == storage.validation_feedback.get_feedback_corpus()
+        assert streamed[0]['annotations_json'] == {'field': 'status'}
+        
+        storage.close()
+    
     def test_get_feedback_stats(self, tmp_path):
         """Test getting feedback statistics"""
         storage = Storage(tmp_path / "test.db")
@@ -295,6 +422,10 @@ class TestAIPromptsNamespace:
         assert latest['prompt_version'] == 2
         assert latest['prompt_template'] == 'Template v2'
         
+        # First save of a new prompt starts at version 1
+        storage.ai_prompts.save_prompt('other_prompt', 'Other v1')
+        assert storage.ai_prompts.get_latest_prompt('other_prompt')['prompt_version'] == 1
+        
         storage.close()
     
     def test_set_active_prompt(self, tmp_path):
@@ -324,6 +455,38 @@ class TestAIPromptsNamespace:
         assert len(versions) == 3
         assert versions[0]['prompt_version'] == 3  # Latest first
         
+        summary = storage.ai_prompts.list_prompt_versions_summary('test_prompt')
+        assert [v['prompt_version'] for v in summary] == [3, 2, 1]
+        assert 'prompt_template' not in summary[0]
+        
+        storage.close()
+    
+    def test_active_prompt_cache(self, tmp_path, monkeypatch):
+        """Test active prompt lookups are cached and invalidated on writes"""
+        storage = Storage(tmp_path / "test.db")
+        
+        assert storage.ai_prompts.get_active_prompt('test_prompt') is None
+        storage.ai_prompts.save_prompt('test_prompt', 'Template v1', version=1,
+                                       metadata={'author': 'test'})
+        storage.ai_prompts.save_prompt('test_prompt', 'Template v2', version=2)
+        storage.ai_prompts.set_active_prompt('test_prompt', 1)
+        
+        active = storage.ai_prompts.get_active_prompt('test_prompt')
+        assert active['prompt_version'] == 1
+        active['prompt_template'] = 'mutated'
+        active['metadata_json']['author'] = 'mutated'
+        cached = storage.ai_prompts.get_active_prompt('test_prompt')
+        assert cached['prompt_template'] == 'Template v1'
+        assert cached['metadata_json'] == {'author': 'test'}
+        
+        # A write from another connection is only seen once the entry expires
+        other = Database(tmp_path / "test.db")
+        other.set_active_ai_prompt('test_prompt', 2)
+        other.close()
+        assert storage.ai_prompts.get_active_prompt('test_prompt')['prompt_version'] == 1
+        monkeypatch.setattr('apitest.storage.database.PROMPT_CACHE_TTL', 0.0)
+        assert storage.ai_prompts.get_active_prompt('test_prompt')['prompt_version'] == 2
+        
         storage.close()
 
 
@@ -355,6 +518,23 @@ class TestPatternsNamespace:
         
         storage.close()
     
+    def test_save_patterns_bulk(self, tmp_path):
+        """Test saving several patterns in one call"""
+        storage = Storage(tmp_path / "test.db")
+        
+        saved = storage.patterns.save_patterns_bulk([
+            ('data_generation', {'field': 'email'}, 0.9),
+            ('test_scenario', {'steps': 2}),
+        ])
+        assert saved == 2
+        
+        patterns = storage.patterns.get_patterns()
+        assert [(p['pattern_type'], p['effectiveness_score']) for p in patterns] == [
+            ('data_generation', 0.9), ('test_scenario', 0.0)
+        ]
+        
+        storage.close()
+    
     def test_filter_patterns_by_effectiveness(self, tmp_path):
         """Test filtering patterns by effectiveness score"""
         storage = Storage(tmp_path / "test.db")
@@ -385,6 +565,24 @@ class TestPatternsNamespace:
         
         storage.close()
     
+    def test_batch_groups_writes(self, tmp_path):
+        """Test that batch() commits namespace writes together or not at all"""
+        storage = Storage(tmp_path / "test.db")
+        ids = [storage.patterns.save_pattern('data_generation', {'n': i}) for i in range(3)]
+        
+        with storage.patterns.batch():
+            for pattern_id in ids:
+                storage.patterns.update_pattern_effectiveness(pattern_id, 0.5)
+        assert {p['effectiveness_score'] for p in storage.patterns.get_patterns()} == {0.5}
+        
+        with pytest.raises(RuntimeError):
+            with storage.patterns.batch():
+                storage.patterns.update_pattern_effectiveness(ids[0], 0.9)
+                raise RuntimeError("boom")
+        assert {p['effectiveness_score'] for p in storage.patterns.get_patterns()} == {0.5}
+        
+        storage.close()
+    
     def test_delete_pattern(self, tmp_path):
         """Test deleting pattern"""
         storage = Storage(tmp_path / "test.db")
@@ -456,6 +654,77 @@ class TestTestCaseLibrary:
         test_cases = get_test_cases_by_endpoint('test.yaml', 'POST', '/users')
         assert len(test_cases) == 2
     
+    def test_endpoint_index_tracks_files(self, tmp_path, monkeypatch):
+        """Test the endpoint index only re-reads files that changed on disk"""
+        import apitest.storage.test_case_library as library
+        library_dir = tmp_path / 'library'
+        library_dir.mkdir()
+        monkeypatch.setattr('apitest.storage.test_case_library.get_library_dir', lambda: library_dir)
+        
+        users = {'schema_file': 'test.yaml', 'method': 'post', 'path': '/users'}
+        posts = {'schema_file': 'test.yaml', 'method': 'GET', 'path': '/posts'}
+        save_test_case_to_library(users)
+        posts_file = save_test_case_to_library(posts)
+        
+        reads = []
+        read_test_case = library._read_test_case
+        monkeypatch.setattr(library, '_read_test_case', lambda p: reads.append(p.name) or read_test_case(p))
+        
+        assert get_test_cases_by_endpoint('test.yaml', 'POST', '/users') == [users]
+        assert len(reads) == 1  # Only the match is loaded
+        
+        # Files written or removed outside the library API are picked up
+        (library_dir / 'manual.json').write_text(json.dumps(users))
+        posts_file.unlink()
+        reads.clear()
+        assert len(get_test_cases_by_endpoint('test.yaml', 'POST', '/users')) == 2
+        assert len(reads) == 3  # Index manual.json, then load both matches
+        assert reads.count('manual.json') == 2
+        assert get_test_cases_by_endpoint('test.yaml', 'GET', '/posts') == []
+        assert all(p.suffix == '.json' for p in list_test_cases_in_library())
+    
+    def test_get_test_cases_by_endpoint_many_files(self, tmp_path, monkeypatch):
+        """Test lookups over enough files to be read concurrently"""
+        library_dir = tmp_path / 'library'
+        library_dir.mkdir()
+        monkeypatch.setattr('apitest.storage.test_case_library.get_library_dir', lambda: library_dir)
+        
+        for version in range(10):
+            save_test_case_to_library({'schema_file': 'test.yaml', 'method': 'GET',
+                                       'path': '/users', 'version': version})
+        (library_dir / 'broken.json').write_text('{')
+        
+        test_cases = get_test_cases_by_endpoint('test.yaml', 'GET', '/users')
+        assert sorted(tc['version'] for tc in test_cases) == list(range(10))
+    
+    def test_get_library_dir_created_once(self, tmp_path, monkeypatch):
+        """Test the library directory is created on first use and then cached"""
+        monkeypatch.setenv('HOME', str(tmp_path))
+        get_library_dir.cache_clear()
+        try:
+            library_dir = get_library_dir()
+            assert library_dir == tmp_path / '.apitest' / 'validated_tests'
+            assert library_dir.is_dir()
+            
+            monkeypatch.setattr(Path, 'mkdir', lambda *a, **k: pytest.fail("mkdir called again"))
+            assert get_library_dir() is library_dir
+        finally:
+            get_library_dir.cache_clear()
+    
+    def test_save_test_case_unique_filenames(self, tmp_path, monkeypatch):
+        """Test saving the same endpoint twice doesn't overwrite the first file"""
+        library_dir = tmp_path / 'library'
+        library_dir.mkdir()
+        monkeypatch.setattr('apitest.storage.test_case_library.get_library_dir', lambda: library_dir)
+        
+        test_case = {'schema_file': 'specs/test.yaml', 'method': 'GET', 'path': '/users/{id}'}
+        first = save_test_case_to_library(test_case)
+        second = save_test_case_to_library(test_case)
+        
+        assert first.name == 'test_GET__users_id_v1.json'
+        assert second.name == 'test_GET__users_id_v1_1.json'
+        assert json.loads(second.read_text()) == test_case
+    
     def test_delete_test_case(self, tmp_path, monkeypatch):
         """Test deleting test case from library"""
         library_dir = tmp_path / 'library'
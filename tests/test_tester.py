@@ -2,6 +2,7 @@
 Comprehensive tests for APITester class
 """
 
+import json
 import pytest
 import requests
 from unittest.mock import Mock, patch, MagicMock
@@ -77,6 +78,34 @@ class TestAPITesterInitialization:
         assert tester.timeout == 30
         assert tester.parallel is False
     
+    def test_requests_share_one_session(self, sample_schema, empty_auth_handler):
+        """Test that all requests go through one pooled session, closed with the tester"""
+        from apitest.tester import MAX_PARALLEL_REQUESTS
+        tester = APITester(schema=sample_schema, auth_handlers=[empty_auth_handler])
+        adapter = tester._session.get_adapter('https://api.example.com')
+        assert adapter._pool_maxsize == MAX_PARALLEL_REQUESTS
+        
+        with patch.object(tester._session, 'close') as close:
+            with tester:
+                pass
+        close.assert_called_once()
+    
+    def test_session_does_not_keep_response_cookies(self, sample_schema, empty_auth_handler):
+        """Test that Set-Cookie from one response isn't sent with later requests"""
+        import urllib.request
+        from email.message import Message
+        tester = APITester(schema=sample_schema, auth_handlers=[empty_auth_handler])
+        
+        headers = Message()
+        headers['Set-Cookie'] = 'session=abc; Path=/'
+        response = Mock()
+        response.info.return_value = headers
+        tester._session.cookies.extract_cookies(
+            response, urllib.request.Request('https://api.example.com/users')
+        )
+        assert len(tester._session.cookies) == 0
+        tester.close()
+    
     def test_init_with_invalid_base_url(self, sample_schema, empty_auth_handler):
         """Test initialization with invalid base URL (should use default)"""
         schema = sample_schema.copy()
@@ -342,7 +371,7 @@ class TestExpectedStatusCode:
 class TestTestExecution:
     """Test test execution functionality"""
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_test_endpoint_success(self, mock_request, sample_schema, empty_auth_handler):
         """Test successful endpoint test"""
         mock_response = Mock()
@@ -366,7 +395,26 @@ class TestTestExecution:
         assert result.path == '/users'
         assert result.response_time_ms > 0
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
+    def test_test_endpoint_json_bodies(self, mock_request, sample_schema, empty_auth_handler):
+        """Test request bodies are sent pre-encoded and responses parsed from raw bytes"""
+        mock_response = Mock()
+        mock_response.status_code = 201
+        mock_response.content = b'{"id": 1}'
+        mock_response.headers = {'Content-Type': 'application/json'}
+        mock_response.json.side_effect = AssertionError("body should be parsed from content")
+        mock_request.return_value = mock_response
+        
+        tester = APITester(schema=sample_schema, auth_handlers=[empty_auth_handler])
+        operation = sample_schema['paths']['/users']['post']
+        result = tester._test_endpoint('POST', '/users', operation)
+        
+        assert result.response_body == {'id': 1}
+        kwargs = mock_request.call_args[1]
+        assert json.loads(kwargs['data']) == result.request_body
+        assert kwargs['headers']['Content-Type'] == 'application/json'
+    
+    @patch('apitest.tester.requests.Session.request')
     def test_test_endpoint_with_auth(self, mock_request, sample_schema):
         """Test endpoint test with authentication"""
         handler = AuthHandler()
@@ -391,7 +439,7 @@ class TestTestExecution:
         assert 'Authorization' in call_args[1]['headers']
         assert call_args[1]['headers']['Authorization'] == 'Bearer test_token'
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_test_endpoint_timeout(self, mock_request, sample_schema, empty_auth_handler):
         """Test endpoint test with timeout"""
         mock_request.side_effect = requests.exceptions.Timeout("Request timeout")
@@ -408,7 +456,7 @@ class TestTestExecution:
         assert result.status_code == 0
         assert 'timeout' in result.error_message.lower()
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_test_endpoint_connection_error(self, mock_request, sample_schema, empty_auth_handler):
         """Test endpoint test with connection error"""
         mock_request.side_effect = requests.exceptions.ConnectionError("Connection refused")
@@ -423,7 +471,7 @@ class TestTestExecution:
         assert result.status == TestStatus.ERROR
         assert 'connection' in result.error_message.lower()
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_test_endpoint_invalid_url(self, mock_request, sample_schema, empty_auth_handler):
         """Test endpoint test with invalid URL"""
         mock_request.side_effect = requests.exceptions.InvalidURL("Invalid URL")
@@ -438,7 +486,7 @@ class TestTestExecution:
         assert result.status == TestStatus.ERROR
         assert 'url' in result.error_message.lower()
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_test_endpoint_401_retry_auth(self, mock_request, sample_schema):
         """Test endpoint test with 401 retrying with different auth"""
         handler1 = AuthHandler()
@@ -472,7 +520,7 @@ class TestTestExecution:
         assert result.auth_attempts == 2
         assert result.auth_succeeded is True
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_test_endpoint_all_auth_fail(self, mock_request, sample_schema):
         """Test endpoint test when all auth methods fail"""
         handler1 = AuthHandler()
@@ -606,6 +654,24 @@ class TestResponseValidation:
             response_body, 200, operation['responses']
         )
         assert len(errors) == 0
+    
+    def test_validator_compiled_once_per_schema(self, sample_schema, empty_auth_handler):
+        """Test that repeated validations against one schema reuse its validator"""
+        tester = APITester(schema=sample_schema, auth_handlers=[empty_auth_handler])
+        responses = {'200': {'content': {'application/json': {'schema': {
+            'type': 'object', 'required': ['id'], 'properties': {'id': {'type': 'integer'}}
+        }}}}}
+        
+        assert tester._validate_response_schema({'id': 1}, 200, responses) == []
+        errors = tester._validate_response_schema({'id': 'x'}, 200, responses)
+        assert errors == ["Schema validation failed: 'x' is not of type 'integer'", "  Path: id"]
+        
+        schema = responses['200']['content']['application/json']['schema']
+        assert tester._get_validator(schema) is tester._get_validator(schema)
+        assert len(tester._validator_cache) == 1
+        
+        bad = {'200': {'content': {'application/json': {'schema': {'type': 'nope'}}}}}
+        assert tester._validate_response_schema({}, 200, bad)[0].startswith("Invalid schema definition")
 
 
 class TestTestResults:
@@ -667,6 +733,18 @@ class TestTestResults:
         warnings = results.get_warnings()
         assert len(warnings) == 1
     
+    def test_get_status_counts(self):
+        """Test counting results per status"""
+        results = TestResults()
+        results.add_result(TestResult('GET', '/users', 200, status=TestStatus.PASS))
+        results.add_result(TestResult('POST', '/users', 201, status=TestStatus.PASS))
+        results.add_result(TestResult('GET', '/error', 0, status=TestStatus.ERROR))
+        
+        counts = results.get_status_counts()
+        assert counts[TestStatus.PASS] == 2
+        assert counts[TestStatus.ERROR] == 1
+        assert counts[TestStatus.FAIL] == 0
+    
     def test_has_failures(self):
         """Test checking if results have failures"""
         results = TestResults()
@@ -696,7 +774,7 @@ class TestTestResults:
 class TestRunTests:
     """Test run_tests method"""
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_run_tests_sequential(self, mock_request, sample_schema, empty_auth_handler):
         """Test running tests sequentially"""
         mock_response = Mock()
@@ -716,7 +794,7 @@ class TestRunTests:
         assert len(results.results) > 0
         assert results.total_time_seconds > 0
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_run_tests_parallel(self, mock_request, sample_schema, empty_auth_handler):
         """Test running tests in parallel"""
         mock_response = Mock()
@@ -735,7 +813,39 @@ class TestRunTests:
         
         assert len(results.results) > 0
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
+    def test_run_tests_reads_auth_once(self, mock_request, sample_schema):
+        """Test auth headers are computed once per run, not per request"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = b''
+        mock_response.headers = {}
+        mock_request.return_value = mock_response
+        
+        handler = AuthHandler()
+        handler.parse_auth_string('bearer=test_token')
+        tester = APITester(schema=sample_schema, auth_handlers=[handler])
+        with patch.object(handler, 'get_headers', wraps=handler.get_headers) as get_headers:
+            tester.run_tests()
+        
+        assert get_headers.call_count == 1
+        assert mock_request.call_count == 3
+        sent = [call[1]['headers'] for call in mock_request.call_args_list]
+        assert all(headers['Authorization'] == 'Bearer test_token' for headers in sent)
+        assert sum('Content-Type' in headers for headers in sent) == 1  # Only the POST
+    
+    def test_parallel_workers(self, sample_schema, empty_auth_handler):
+        """Test parallel mode sizes its thread pool to the number of tests"""
+        from apitest.tester import MAX_PARALLEL_REQUESTS
+        tester = APITester(schema=sample_schema, auth_handlers=[empty_auth_handler], parallel=True)
+        assert tester._parallel_workers(3) == 3
+        assert tester._parallel_workers(0) == 1
+        assert tester._parallel_workers(1000) == MAX_PARALLEL_REQUESTS
+        
+        tester = APITester(schema=sample_schema, auth_handlers=[empty_auth_handler], max_workers=2)
+        assert tester._parallel_workers(1000) == 2
+    
+    @patch('apitest.tester.requests.Session.request')
     def test_run_tests_empty_schema(self, mock_request, empty_auth_handler):
         """Test running tests with empty schema"""
         schema = {
@@ -767,7 +877,7 @@ class TestEdgeCases:
         # Should fall back to default
         assert tester.base_url == 'http://localhost:8000'
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_non_json_response(self, mock_request, sample_schema, empty_auth_handler):
         """Test handling non-JSON response"""
         mock_response = Mock()
@@ -787,7 +897,22 @@ class TestEdgeCases:
         assert result.status_code == 200
         # Should handle gracefully
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
+    def test_unparseable_response_preview(self, mock_request, sample_schema, empty_auth_handler):
+        """Test bodies that aren't JSON keep a bounded preview of their text"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.content = 'é'.encode('utf-8') * 5000
+        mock_response.headers = {}
+        mock_response.encoding = None
+        mock_request.return_value = mock_response
+        
+        tester = APITester(schema=sample_schema, auth_handlers=[empty_auth_handler])
+        result = tester._test_endpoint('GET', '/users', sample_schema['paths']['/users']['get'])
+        
+        assert result.response_body == {'_raw_content': 'é' * 500}
+    
+    @patch('apitest.tester.requests.Session.request')
     def test_xml_response(self, mock_request, sample_schema, empty_auth_handler):
         """Test handling XML response"""
         mock_response = Mock()
@@ -807,7 +932,7 @@ class TestEdgeCases:
         assert result.status_code == 200
         assert result.response_body is not None
     
-    @patch('apitest.tester.requests.request')
+    @patch('apitest.tester.requests.Session.request')
     def test_empty_response_body(self, mock_request, sample_schema, empty_auth_handler):
         """Test handling empty response body"""
         mock_response = Mock()
@@ -856,4 +981,20 @@ class TestEdgeCases:
         })
         assert 'properties' in resolved
         assert 'id' in resolved['properties']
+    
+    def test_resolve_schema_refs_memoized(self, sample_schema, empty_auth_handler):
+        """Test that a component referenced from several places is resolved once"""
+        schema = sample_schema.copy()
+        schema['components'] = {'schemas': {
+            'User': {'type': 'object', 'properties': {'id': {'type': 'integer'}}}
+        }}
+        tester = APITester(schema=schema, auth_handlers=[empty_auth_handler])
+        
+        single = tester._resolve_schema_refs({'$ref': '#/components/schemas/User'})
+        listing = tester._resolve_schema_refs({'type': 'array', 'items': {'$ref': '#/components/schemas/User'}})
+        assert listing['items'] is single
+        assert single is schema['components']['schemas']['User']  # No refs inside: not copied
+        
+        plain = {'type': 'object', 'properties': {'tags': {'type': 'array', 'items': [{'type': 'string'}]}}}
+        assert tester._resolve_schema_refs(plain) is plain
 
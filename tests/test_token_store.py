@@ -0,0 +1,122 @@
+"""
+Tests for keyring-backed token storage
+"""
+
+import json
+import keyring
+import pytest
+from datetime import datetime, timedelta
+
+from apitest.storage.token_store import TokenStore
+
+
+@pytest.fixture
+def keyring_calls(monkeypatch):
+    """Replace the keyring backend with an in-memory dict, recording calls"""
+    passwords = {}
+    calls = []
+    
+    def set_password(service, key, value):
+        calls.append(('set', key))
+        passwords[(service, key)] = value
+    
+    def get_password(service, key):
+        calls.append(('get', key))
+        return passwords.get((service, key))
+    
+    def delete_password(service, key):
+        calls.append(('delete', key))
+        del passwords[(service, key)]
+    
+    monkeypatch.setattr('keyring.set_password', set_password)
+    monkeypatch.setattr('keyring.get_password', get_password)
+    monkeypatch.setattr('keyring.delete_password', delete_password)
+    monkeypatch.setattr(TokenStore, '_probed_services', set())
+    monkeypatch.delenv('APITEST_SKIP_KEYRING_PROBE', raising=False)
+    return calls
+
+
+class TestTokenStore:
+    """Test TokenStore"""
+    
+    def test_keyring_probed_once_per_service(self, keyring_calls, monkeypatch):
+        """Test the availability probe runs once per service, or not at all"""
+        TokenStore()
+        TokenStore()
+        assert [call[0] for call in keyring_calls] == ['set', 'delete']
+        
+        keyring_calls.clear()
+        monkeypatch.setenv('APITEST_SKIP_KEYRING_PROBE', '1')
+        TokenStore(service_name='other')
+        assert keyring_calls == []
+    
+    def test_store_and_get_token(self, keyring_calls):
+        """Test a stored token and its metadata read back"""
+        store = TokenStore()
+        store.store_token('api', 'secret', refresh_token='refresh')
+        
+        assert store.get_token('api') == 'secret'
+        assert store.get_refresh_token('api') == 'refresh'
+        assert store.get_token_metadata('api')['token_type'] == 'bearer'
+        assert store.token_exists('api')
+        assert store.get_token('missing') is None
+    
+    def test_expired_token(self, keyring_calls):
+        """Test that expired tokens are not returned"""
+        store = TokenStore()
+        store.store_token('api', 'secret', expires_at=datetime.now() - timedelta(seconds=1))
+        
+        assert store.is_token_expired('api')
+        assert store.get_token('api') is None
+        assert not store.token_exists('api')
+    
+    def test_legacy_iso_expiry(self, keyring_calls):
+        """Test metadata without expires_at_epoch still expires by its ISO string"""
+        store = TokenStore()
+        expired = (datetime.now() - timedelta(seconds=1)).isoformat()
+        keyring.set_password(store.service_name, 'token:api', 'secret')
+        keyring.set_password(store.service_name, 'metadata:api', json.dumps({'expires_at': expired}))
+        
+        assert store.is_token_expired('api')
+        assert store.get_token('api') is None
+        assert store.get_token_metadata('api') == {'expires_at': expired}
+    
+    def test_single_entry_and_legacy_migration(self, keyring_calls):
+        """Test tokens use one keyring entry and old two-entry tokens migrate"""
+        store = TokenStore()
+        keyring_calls.clear()
+        store.store_token('api', 'secret')
+        assert keyring_calls == [('set', 'entry:api')]
+        
+        keyring.set_password(store.service_name, 'token:old', 'legacy')
+        keyring.set_password(store.service_name, 'metadata:old', json.dumps({'refresh_token': 'r'}))
+        assert store.get_refresh_token('old') == 'r'
+        
+        fresh = TokenStore()
+        keyring_calls.clear()
+        assert fresh.get_token('old') == 'legacy'
+        assert keyring_calls == [('get', 'entry:old')]
+        assert keyring.get_password(store.service_name, 'token:old') is None
+        
+        fresh.delete_token('old')
+        assert TokenStore().get_token('old') is None
+    
+    def test_lookups_reuse_keyring_reads(self, keyring_calls):
+        """Test that one lookup reads the keyring once"""
+        TokenStore().store_token('api', 'secret')
+        store = TokenStore()
+        keyring_calls.clear()
+        
+        assert store.token_exists('api')
+        assert store.get_token('api') == 'secret'
+        assert not store.is_token_expired('api')
+        assert [call[0] for call in keyring_calls] == ['get']
+    
+    def test_delete_token_clears_cache(self, keyring_calls):
+        """Test that a deleted token is not served from the cache"""
+        store = TokenStore()
+        store.store_token('api', 'secret')
+        assert store.get_token('api') == 'secret'
+        
+        store.delete_token('api')
+        assert store.get_token('api') is None
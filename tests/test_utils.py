@@ -4,7 +4,11 @@ Comprehensive tests for utility functions
 
 import pytest
 import os
-from apitest.utils import deep_get, format_duration, expand_env_vars
+import json
+from apitest.utils import (
+    deep_get, compile_path, deep_get_compiled, format_duration, expand_env_vars,
+    json_dumps, json_dumps_bytes, json_loads
+)
 
 
 class TestDeepGet:
@@ -86,6 +90,16 @@ class TestDeepGet:
         }
         assert deep_get(data, 'api.endpoints.users.path') == '/users'
         assert deep_get(data, 'api.endpoints.users.methods') == ['GET', 'POST']
+    
+    def test_deep_get_compiled(self):
+        """Test looking up a pre-split path"""
+        data = {'components': {'securitySchemes': {'bearer': {}}}}
+        keys = compile_path('components.securitySchemes')
+        assert keys == ('components', 'securitySchemes')
+        assert compile_path('components.securitySchemes') is keys
+        assert deep_get_compiled(data, keys) == {'bearer': {}}
+        assert deep_get_compiled(data, compile_path('components.missing'), 'default') == 'default'
+        assert deep_get_compiled(data, ()) is data
 
 
 class TestFormatDuration:
@@ -286,3 +300,57 @@ class TestEdgeCases:
         # Should handle gracefully
         assert isinstance(result, str)
 
+
+
+class TestJsonHelpers:
+    """Test JSON serialization helpers"""
+    
+    def test_json_round_trip(self):
+        """Test dumps/loads round trip"""
+        value = {'name': 'test', 'items': [1, 2.5, None, True], 'nested': {'a': 'ü'}}
+        assert json_loads(json_dumps(value)) == value
+        assert json_loads(json_dumps_bytes(value)) == value
+    
+    def test_json_dumps_is_compact(self):
+        """Test that output has no extra whitespace"""
+        assert json_dumps({'a': 1, 'b': [1, 2]}) == '{"a":1,"b":[1,2]}'
+    
+    def test_json_dumps_bytes_indent(self, monkeypatch):
+        """Test indented output matches the stdlib layout with and without orjson"""
+        value = {'a': [1, {'b': 'ü'}], 'c': None}
+        expected = json.dumps(value, indent=2, ensure_ascii=False).encode('utf-8')
+        assert json_dumps_bytes(value, indent=True) == expected
+        monkeypatch.setattr('apitest.utils.orjson', None)
+        assert json_dumps_bytes(value, indent=True) == expected
+    
+    def test_json_dumps_non_string_keys(self):
+        """Test values orjson rejects still serialize"""
+        assert json_loads(json_dumps({1: 'one'})) == {'1': 'one'}
+    
+    def test_json_loads_invalid(self):
+        """Test invalid JSON raises the stdlib error type"""
+        with pytest.raises(json.JSONDecodeError):
+            json_loads('{invalid')
+    
+    def test_json_dumps_keeps_non_finite_floats(self):
+        """Test that NaN and Infinity are written as such, not as null"""
+        data = json_dumps_bytes({'x': float('nan'), 'y': [float('inf'), None]})
+        assert data == b'{"x":NaN,"y":[Infinity,null]}'
+        value = json_loads(data)
+        assert value['x'] != value['x']
+        assert value['y'] == [float('inf'), None]
+    
+    def test_json_loads_legacy_nan(self):
+        """Test that NaN written by the stdlib encoder still decodes"""
+        value = json_loads(json.dumps({'x': float('nan')}))
+        assert value['x'] != value['x']
+    
+    def test_stdlib_fallback(self, monkeypatch):
+        """Test the helpers without orjson installed"""
+        monkeypatch.setattr('apitest.utils.orjson', None)
+        value = {'name': 'test', 'items': [1, 2.5, None, True]}
+        
+        assert json_dumps(value) == '{"name":"test","items":[1,2.5,null,true]}'
+        assert json_loads(json_dumps_bytes(value)) == value
+        with pytest.raises(json.JSONDecodeError):
+            json_loads('{invalid')